@@ -1,5 +1,6 @@
 # // app/api/deps.py
-from collections.abc import AsyncGenerator
+from collections.abc import AsyncGenerator, AsyncIterator
+from contextlib import asynccontextmanager
 from typing import Annotated
 import logging
 
@@ -7,9 +8,12 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from jwt import ExpiredSignatureError, InvalidTokenError
 from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.session import async_session
+from app.core.admission import AdmissionRejected, Permit, admission, retry_after_header
+from app.core.config import settings
+from app.core.identity import identity_cache
+from app.core.metrics import stage
 from app.core.security import decode_access_token
 from app.models.user import User
 
@@ -17,13 +21,18 @@ logger = logging.getLogger(__name__)
 bearer = HTTPBearer(auto_error=False)
 
 async def get_session() -> AsyncGenerator:
+    # Holds a session (and, once used, a pooled connection) for the whole request. Only for handlers
+    # that do nothing slow; anything awaiting an upstream or bcrypt opens `async_session()` per query.
     async with async_session() as session:
         yield session
 
 async def get_current_user(
     creds: Annotated[HTTPAuthorizationCredentials | None, Depends(bearer)],
-    db: AsyncSession = Depends(get_session)
 ):
+    with stage("auth"):
+        return await _resolve_user(creds)
+
+async def _resolve_user(creds: HTTPAuthorizationCredentials | None):
     if not creds:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Missing Authorization header")
     if creds.scheme.lower() != "bearer":
@@ -46,14 +55,72 @@ async def get_current_user(
     except ValueError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload (sub not int)")
 
-    # Fetch user from database to get supermemory_user_id
-    result = await db.execute(select(User).where(User.id == user_id))
-    user = result.scalar_one_or_none()
+    # Fast path: identity is in the signed token (no DB hit)
+    smid = payload.get("smid")
+    if smid and identity_cache.claim_trusted(user_id, payload.get("iat")):
+        return {"user_id": user_id, "supermemory_user_id": smid}
+
+    identity = identity_cache.get(user_id)
+    if identity is not None:
+        return identity
+
+    # Fetch user from database to get supermemory_user_id (session only opened on a cache miss)
+    async with async_session() as db:
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalar_one_or_none()
 
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
-    return {
+    identity = {
         "user_id": user.id,
         "supermemory_user_id": user.supermemory_user_id
     }
+    identity_cache.set(user.id, identity)
+    return identity
+
+
+@asynccontextmanager
+async def admitted(limit_name: str, user: str, cost: float = 1.0) -> AsyncIterator[Permit]:
+    """
+    Enforce the `limit_name` admission limits for `user` (429 when over), charging `cost` tokens.
+    For handlers whose cost depends on the request body; others use the admit() dependency.
+    """
+    if not settings.ADMISSION_ENABLED:
+        yield Permit(admission.store, [])
+        return
+    max_cost = admission.max_cost(limit_name, user)
+    if max_cost is not None and cost > max_cost:
+        # Would never fit in the bucket; retrying can't help
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Request needs {cost:g} {limit_name} tokens but at most {max_cost:g} are allowed at once",
+        )
+    try:
+        with stage("admission"):
+            permit = await admission.admit(limit_name, user, cost)
+    except AdmissionRejected as e:
+        logger.info(f"Rejected {limit_name} request from {user}: {e.reason}")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Too many requests: {e.reason}",
+            headers={"Retry-After": retry_after_header(e.retry_after)},
+        )
+    try:
+        yield permit
+    finally:
+        if not permit.held:
+            await permit.release()
+
+
+def admit(limit_name: str):
+    """
+    Dependency enforcing the `limit_name` admission limits for the current user (429 when over).
+    Yields the Permit; concurrency slots are released when the handler returns, or, after
+    permit.hold(), by whoever takes over (streamed responses release them when the stream ends).
+    """
+    async def _admit(current: Annotated[dict, Depends(get_current_user)]) -> AsyncGenerator[Permit, None]:
+        async with admitted(limit_name, current["supermemory_user_id"]) as permit:
+            yield permit
+
+    return _admit
@@ -5,6 +5,7 @@ from app.api.routes.documents import router as documents_router
 from app.api.routes.debug import router as debug_router
 from app.api.routes.memory import router as memory_router
 from app.api.routes.chat import router as chat_router
+from app.api.routes.conversations import router as conversations_router
 
 api_router = APIRouter(prefix="/api")
 
@@ -12,4 +13,5 @@ api_router.include_router(auth_router, prefix="/auth", tags=["auth"])
 api_router.include_router(documents_router, prefix="/documents", tags=["documents"])
 api_router.include_router(debug_router, prefix="/debug", tags=["debug"])
 api_router.include_router(memory_router, tags=["memory"])
-api_router.include_router(chat_router, tags=["chat"])
\ No newline at end of file
+api_router.include_router(chat_router, tags=["chat"])
+api_router.include_router(conversations_router, prefix="/conversations", tags=["conversations"])
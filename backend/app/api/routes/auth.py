@@ -1,18 +1,19 @@
 # app/api/routes/auth.py
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, HTTPException, status
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
 import logging
 import uuid
 
-from app.api.deps import get_session
 from app.core.config import settings
 from app.core.security import (
+    PasswordHasherBusy,
     create_access_token,
-    get_password_hash,
-    verify_password,
+    hash_password_async,
+    verify_and_update_password,
 )
+from app.db.session import async_session
 from app.models.user import User
 from app.schemas.auth import (
     LoginRequest,
@@ -24,12 +25,20 @@ from app.schemas.auth import (
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server busy, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/register", response_model=AuthResponse, status_code=status.HTTP_201_CREATED)
-async def register(payload: RegisterRequest, db: AsyncSession = Depends(get_session)):
+async def register(payload: RegisterRequest):
     logger.info(f"Register request for email: {payload.email}")
     try:
-        # Check if email already exists
-        exists = await db.execute(select(User).where(User.email == payload.email.lower()))
+        # Check if email already exists (sessions are opened per query so no connection is held during hashing)
+        async with async_session() as db:
+            exists = await db.execute(select(User.id).where(User.email == payload.email.lower()))
         if exists.scalar_one_or_none():
             logger.warning(f"Email already registered: {payload.email}")
             raise HTTPException(status_code=400, detail="Email already registered")
@@ -38,21 +47,30 @@ async def register(payload: RegisterRequest, db: AsyncSession = Depends(get_sess
         supermemory_user_id = f"medesense_user_{uuid.uuid4().hex[:16]}"
 
         # Create user
+        try:
+            hashed_password = await hash_password_async(payload.password)
+        except PasswordHasherBusy:
+            raise _hasher_busy()
         user = User(
             email=payload.email.lower(),
-            hashed_password=get_password_hash(payload.password),
+            hashed_password=hashed_password,
             display_name=payload.display_name,
             supermemory_user_id=supermemory_user_id,
         )
-        db.add(user)
-        await db.commit()
-        await db.refresh(user)
+        try:
+            async with async_session() as db:
+                db.add(user)
+                await db.commit()
+                await db.refresh(user)
+        except IntegrityError:
+            # Registered concurrently while the password was being hashed
+            raise HTTPException(status_code=400, detail="Email already registered")
 
         logger.info(f"User created successfully: {user.email}")
 
         # Issue token
         token = create_access_token(
-            {"sub": str(user.id)},
+            {"sub": str(user.id), "smid": user.supermemory_user_id},
             expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
         )
         return AuthResponse(
@@ -73,14 +91,28 @@ async def register(payload: RegisterRequest, db: AsyncSession = Depends(get_sess
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.post("/login", response_model=AuthResponse)
-async def login(payload: LoginRequest, db: AsyncSession = Depends(get_session)):
-    res = await db.execute(select(User).where(User.email == payload.email.lower()))
-    user = res.scalar_one_or_none()
-    if not user or not verify_password(payload.password, user.hashed_password):
+async def login(payload: LoginRequest):
+    async with async_session() as db:
+        res = await db.execute(select(User).where(User.email == payload.email.lower()))
+        user = res.scalar_one_or_none()
+    # Connection is back in the pool before the (slow, by design) password check
+    if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    try:
+        ok, new_hash = await verify_and_update_password(payload.password, user.hashed_password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    if not ok:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+
+    if new_hash:
+        # BCRYPT_WORK_FACTOR changed since this hash was stored; upgrade it transparently
+        async with async_session() as db:
+            await db.execute(update(User).where(User.id == user.id).values(hashed_password=new_hash))
+            await db.commit()
 
     token = create_access_token(
-        {"sub": str(user.id)},
+        {"sub": str(user.id), "smid": user.supermemory_user_id},
         expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
     )
     return AuthResponse(
@@ -1,16 +1,26 @@
 # app/api/routes/chat.py
 """
-Smart chat endpoint with document awareness via Supermemory search
+Smart chat endpoint with document awareness via local index / Supermemory search
 """
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel
-from openai import OpenAI
-from app.api.deps import get_current_user
+import logging
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from pydantic import BaseModel, Field
+from app.api.deps import admit, get_current_user
+from app.core.admission import Permit
 from app.core.config import settings
-from app.core.safety import check_safety
-from app.services.memory_api_client import MemoryAPIClient
+from app.core.metrics import stage
+from app.core.responses import FieldSelection, field_selection, select_fields
+from app.core.safety import check_conversation
+from app.services.chat_stream import stream_chat_response
+from app.services.completion_cache import CACHE_BYPASS, CACHE_HIT, CACHE_MISS, cache_directives, completion_cache
+from app.services.context_packer import ContextStats, pack_context
+from app.services.conversation_store import ConversationNotFound, conversation_store
+from app.services.llm_client import get_openai_client
+from app.services.retrieval import retrieval_available, search_documents
+from app.services.single_flight import completion_flights
 
+logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
@@ -20,9 +30,11 @@ class ChatMessage(BaseModel):
 
 
 class ChatRequest(BaseModel):
-    messages: List[ChatMessage]
+    messages: List[ChatMessage]  # with conversation_id: only the new messages of this turn
     model: Optional[str] = None
     max_tokens: Optional[int] = 500
+    stream: bool = False  # relay tokens as Server-Sent Events
+    conversation_id: Optional[str] = Field(None, max_length=64)  # server-side history, see routes/conversations.py
 
 
 class ChatResponse(BaseModel):
@@ -30,25 +42,43 @@ class ChatResponse(BaseModel):
     model: str
     usage: dict
     memory_enabled: bool
+    context: Optional[ContextStats] = None  # how the document context was packed, incl. tokens saved
+    conversation_id: Optional[str] = None
+    cache: Optional[str] = None  # completion cache: hit | miss | bypass
 
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat(
     payload: ChatRequest,
-    current=Depends(get_current_user)
+    request: Request,
+    http_response: Response,
+    current=Depends(get_current_user),
+    permit: Permit = Depends(admit("chat")),
+    selection: FieldSelection = Depends(field_selection),
 ):
     """
     Smart chat endpoint with document awareness:
-    1. Searches Supermemory for relevant user documents
+    1. Searches the user's documents (local index and/or Supermemory, see app/services/retrieval.py)
     2. Injects document context into chat
     3. Uses OpenAI to answer with document awareness
+
+    With `stream: true` the answer is sent as text/event-stream (see app/services/chat_stream.py).
+    With `conversation_id` the earlier turns come from the server-side store and the new messages
+    plus the reply are appended to it.
+    Identical non-streamed requests are answered from the completion cache (status in `cache` and the
+    X-Completion-Cache header); send `Cache-Control: no-cache` to force a fresh completion.
+    `?verbose=false` leaves out `context` and `usage`; `?fields=content,model` picks fields.
     """
     # Safety check
     last_user_text = next(
         (m.content for m in reversed(payload.messages) if m.role == "user"),
         ""
     )
-    ok, msg = check_safety(last_user_text or "")
+    with stage("safety"):
+        ok, msg = check_conversation(
+            [(m.role, m.content) for m in payload.messages],
+            scope=payload.conversation_id or current["supermemory_user_id"],
+        )
     if not ok:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=msg)
 
@@ -60,75 +90,170 @@ async def chat(
         )
 
     # Build message list for OpenAI
-    messages = [{"role": m.role, "content": m.content} for m in payload.messages]
+    new_messages = [{"role": m.role, "content": m.content} for m in payload.messages]
+    messages = list(new_messages)
+    stored_count = 0
+    if payload.conversation_id:
+        try:
+            with stage("conversation"):
+                conversation, history = await conversation_store.load(
+                    current["user_id"], payload.conversation_id, create=True
+                )
+        except ConversationNotFound:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found")
+        messages = conversation_store.prompt(conversation, history) + new_messages
+        stored_count = len(history)
+
+    async def record_reply(content: str) -> None:
+        if payload.conversation_id:
+            await conversation_store.append(
+                payload.conversation_id,
+                new_messages + [{"role": "assistant", "content": content}],
+                stored_count,
+            )
+    model = payload.model or settings.SM_DEFAULT_MODEL
     memory_enabled = False
+    context_stats: Optional[ContextStats] = None
 
-    # Try to retrieve relevant documents from Supermemory
-    if settings.SUPERMEMORY_API_KEY and settings.SUPERMEMORY_API_KEY != "your_supermemory_api_key_here":
+    # Try to retrieve relevant documents (local index and/or Supermemory, see RETRIEVAL_MODE)
+    if retrieval_available():
         try:
-            memory_client = MemoryAPIClient()
-
             # Search for relevant documents using the user's question
-            search_result = await memory_client.search_documents(
-                query=last_user_text,
-                container_tag=current["supermemory_user_id"],
-                limit=3
-            )
+            with stage("retrieval"):
+                search_result = await search_documents(
+                    query=last_user_text,
+                    container_tag=current["supermemory_user_id"],
+                    limit=settings.CONTEXT_SEARCH_LIMIT
+                )
 
             # Extract document content (v4 API uses 'results' not 'documents')
             documents = search_result.get("results", [])
-            if documents:
-                # Build context from retrieved documents
-                doc_context = "**Relevant medical information from your uploaded documents:**\n\n"
-                for doc in documents:
-                    # v4 API returns 'memory' field, not 'content'!
-                    memory_text = doc.get("memory", "")
-                    if memory_text:
-                        doc_context += f"- {memory_text}\n"
-
+            # Deduplicate, rank and fit the memories into the model's context budget
+            with stage("context_pack"):
+                doc_context, context_stats = pack_context(documents, model)
+            if doc_context:
                 # Inject document context into the conversation
                 # Add it before the last user message
                 context_message = {
                     "role": "system",
-                    "content": f"{doc_context}\n\nUse the above information to answer the user's question accurately."
+                    "content": doc_context
                 }
 
                 # Insert context before the last user message
                 messages.insert(-1, context_message)
                 memory_enabled = True
-                print(f"✅ Found {len(documents)} relevant documents for query")
+                logger.info(f"Found {len(documents)} relevant documents for query ({search_result.get('source', 'remote')})")
+                logger.info(
+                    f"Packed {context_stats.included}/{context_stats.retrieved} memories into "
+                    f"{context_stats.context_tokens}/{context_stats.budget_tokens} tokens "
+                    f"({context_stats.duplicates} duplicates, {context_stats.truncated} truncated, "
+                    f"{context_stats.tokens_saved} tokens saved)"
+                )
             else:
-                print("ℹ️  No relevant documents found in Supermemory")
+                logger.info("No relevant documents found")
 
         except Exception as e:
             # Log but don't fail - continue without document context
-            print(f"Supermemory search failed, continuing without document context: {e}")
+            logger.warning(f"Document search failed, continuing without document context: {e}")
+
+    # Identical request (same user, model, limits and final messages incl. context) answered before?
+    cache_status = CACHE_BYPASS
+    cache_key = None
+    if completion_cache.enabled and not payload.stream:
+        may_read, may_write = cache_directives(request.headers.get("cache-control"))
+        if may_write:
+            cache_key = completion_cache.key(current["supermemory_user_id"], model, payload.max_tokens, messages)
+        if may_read:
+            with stage("cache"):
+                cached = await completion_cache.get(cache_key)
+            if cached is not None:
+                await record_reply(cached["content"])
+                http_response.headers["X-Completion-Cache"] = CACHE_HIT
+                return select_fields(
+                    ChatResponse(
+                        **cached,
+                        memory_enabled=memory_enabled,
+                        context=context_stats,
+                        conversation_id=payload.conversation_id,
+                        cache=CACHE_HIT
+                    ),
+                    selection,
+                    bulky=("context", "usage"),
+                    headers={"X-Completion-Cache": CACHE_HIT},
+                )
+            cache_status = CACHE_MISS
+        else:
+            completion_cache.bypasses += 1
 
     # Call OpenAI with or without document context
-    try:
-        client = OpenAI(api_key=settings.OPENAI_API_KEY)
+    if payload.stream:
+        try:
+            stream = await get_openai_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=payload.max_tokens,
+                stream=True,
+                stream_options={"include_usage": True},
+            )
+            # The upstream call lasts as long as the stream, so it keeps its admission slot until then
+            permit.hold()
+            return stream_chat_response(
+                request,
+                stream,
+                memory_enabled=memory_enabled,
+                conversation_id=payload.conversation_id,
+                headers={"X-Context-Tokens-Saved": str(context_stats.tokens_saved)} if context_stats else None,
+                on_complete=record_reply,
+                on_close=permit.release,
+            )
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Chat error: {str(e)}"
+            )
 
-        response = client.chat.completions.create(
-            model=payload.model or settings.SM_DEFAULT_MODEL,
-            messages=messages,
-            max_tokens=payload.max_tokens
-        )
+    async def complete() -> Dict[str, Any]:
+        try:
+            response = await get_openai_client().chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=payload.max_tokens
+            )
+            content = response.choices[0].message.content if response.choices else ""
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=f"Chat error: {str(e)}"
+            )
 
-        content = response.choices[0].message.content if response.choices else ""
-
-        return ChatResponse(
-            content=content,
-            model=response.model,
-            usage={
-                "prompt_tokens": response.usage.prompt_tokens,
-                "completion_tokens": response.usage.completion_tokens,
-                "total_tokens": response.usage.total_tokens
-            } if response.usage else {},
-            memory_enabled=memory_enabled
-        )
+        usage = {
+            "prompt_tokens": response.usage.prompt_tokens,
+            "completion_tokens": response.usage.completion_tokens,
+            "total_tokens": response.usage.total_tokens
+        } if response.usage else {}
+        if cache_key is not None and content:
+            await completion_cache.set(cache_key, {"content": content, "model": response.model, "usage": usage})
 
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_502_BAD_GATEWAY,
-            detail=f"Chat error: {str(e)}"
-        )
+        await record_reply(content or "")
+        return {"content": content, "model": response.model, "usage": usage}
+
+    # An identical request already in flight (double submit, client retry) shares its completion,
+    # and the conversation turn is stored once
+    flight_key = (
+        payload.conversation_id,
+        completion_cache.key(current["supermemory_user_id"], model, payload.max_tokens, messages),
+    )
+    result = await completion_flights.do(flight_key, complete)
+    http_response.headers["X-Completion-Cache"] = cache_status
+    return select_fields(
+        ChatResponse(
+            **result,
+            memory_enabled=memory_enabled,
+            context=context_stats,
+            conversation_id=payload.conversation_id,
+            cache=cache_status
+        ),
+        selection,
+        bulky=("context", "usage"),
+        headers={"X-Completion-Cache": cache_status},
+    )
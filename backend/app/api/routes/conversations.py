@@ -0,0 +1,52 @@
+# app/api/routes/conversations.py
+"""
+Server-side conversations. Pass the returned conversation_id to /api/chat or /api/chat/complete
+and send only the new messages of each turn; see app/services/conversation_store.py.
+"""
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from app.api.deps import get_current_user
+from app.schemas.conversation import ConversationMessageOut, ConversationResponse
+from app.services.conversation_store import ConversationNotFound, conversation_store
+
+router = APIRouter()
+
+
+def _not_found() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found")
+
+
+@router.post("", response_model=ConversationResponse, status_code=status.HTTP_201_CREATED)
+async def create_conversation(current=Depends(get_current_user)):
+    conversation = await conversation_store.create(current["user_id"])
+    return ConversationResponse(
+        conversation_id=conversation.id,
+        compacted_messages=0,
+        messages=[],
+        created_at=conversation.created_at,
+        updated_at=conversation.updated_at,
+    )
+
+
+@router.get("/{conversation_id}", response_model=ConversationResponse)
+async def get_conversation(conversation_id: str, current=Depends(get_current_user)):
+    try:
+        conversation, history = await conversation_store.load(current["user_id"], conversation_id)
+    except ConversationNotFound:
+        raise _not_found()
+    return ConversationResponse(
+        conversation_id=conversation.id,
+        summary=conversation.summary,
+        compacted_messages=conversation.compacted_messages,
+        messages=[ConversationMessageOut(role=m.role, content=m.content, created_at=m.created_at) for m in history],
+        created_at=conversation.created_at,
+        updated_at=conversation.updated_at,
+    )
+
+
+@router.delete("/{conversation_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_conversation(conversation_id: str, current=Depends(get_current_user)):
+    try:
+        await conversation_store.delete(current["user_id"], conversation_id)
+    except ConversationNotFound:
+        raise _not_found()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
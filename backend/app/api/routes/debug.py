@@ -1,9 +1,70 @@
 # // app/api/routes/debug.py
 from fastapi import APIRouter, Depends
 from app.api.deps import get_current_user
+from app.core.admission import admission
+from app.core.compression import compression_stats
+from app.core.security import password_hashing_stats
+from app.services.completion_cache import completion_cache
+from app.services.http_clients import http_clients
+from app.services.image_normalizer import image_normalizer
+from app.services.local_index import local_index
+from app.services.retrieval import answered_by
+from app.services.retrieval_guard import retrieval_guard
+from app.services.search_cache import search_cache
+from app.services.single_flight import single_flight_stats
 
 router = APIRouter()
 
 @router.get("/whoami")
 async def whoami(current=Depends(get_current_user)):
     return current
+
+@router.get("/http-pools")
+async def http_pools(current=Depends(get_current_user)):
+    """Connection pool occupancy and wait time per upstream."""
+    return http_clients.stats()
+
+@router.get("/search-cache")
+async def search_cache_stats(current=Depends(get_current_user)):
+    """Hit/miss/eviction counters for the Supermemory search cache."""
+    return search_cache.stats()
+
+@router.get("/password-hashing")
+async def password_hashing(current=Depends(get_current_user)):
+    """bcrypt pool queue depth, rejections and latency."""
+    return password_hashing_stats()
+
+@router.get("/completion-cache")
+async def completion_cache_stats(current=Depends(get_current_user)):
+    """Hit rate, size and evictions of the /api/chat completion cache."""
+    return completion_cache.stats()
+
+@router.get("/retrieval")
+async def retrieval(current=Depends(get_current_user)):
+    """Supermemory search circuit breaker state, deadline misses, hedging and latency."""
+    return retrieval_guard.stats()
+
+@router.get("/admission")
+async def admission_stats(current=Depends(get_current_user)):
+    """Configured admission limits and admitted/rejected counts per limit."""
+    return admission.stats()
+
+@router.get("/single-flight")
+async def single_flight(current=Depends(get_current_user)):
+    """Identical concurrent upstream calls collapsed into one, per upstream."""
+    return single_flight_stats()
+
+@router.get("/local-index")
+async def local_index_stats(current=Depends(get_current_user)):
+    """Local document index activity and how /api/chat retrievals were answered (local, remote, merged)."""
+    return {"index": local_index.stats(), "answered_by": answered_by}
+
+@router.get("/compression")
+async def compression(current=Depends(get_current_user)):
+    """Responses and bytes before/after compression, per content encoding."""
+    return compression_stats()
+
+@router.get("/image-normalization")
+async def image_normalization(current=Depends(get_current_user)):
+    """Images normalized before OCR, bytes saved and time spent in the pool."""
+    return image_normalizer.stats()
@@ -1,48 +1,211 @@
 # app/api/routes/documents.py
+import asyncio
+import json
 import logging
-from fastapi import APIRouter, Depends, HTTPException, status
-from app.schemas.document import DocumentUploadRequest, DocumentUploadResponse
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from sqlalchemy import delete, select
+from app.core.config import settings
+from app.core.responses import FieldSelection, field_selection, select_fields
+from app.schemas.document import (
+    DocumentBatchItemResult,
+    DocumentBatchUploadRequest,
+    DocumentBatchUploadResponse,
+    DocumentUploadRequest,
+    DocumentUploadResponse,
+    IngestionJobResponse,
+)
+from app.services.document_dedup import DocumentInFlight, hash_file, hash_image_base64, hash_text, process_once
 from app.services.document_processor import document_processor
-from app.api.deps import get_current_user
+from app.services.ingestion_worker import ingestion_worker
+from app.services.local_index import local_index
+from app.services.memory_api_client import MemoryAPIClient
+from app.api.deps import admit, admitted, get_current_user
+from app.db.session import async_session
+from app.models.document import Document
+from app.models.ingestion_job import IngestionJob
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-@router.post("/upload-document", response_model=DocumentUploadResponse, status_code=status.HTTP_200_OK)
+# Leading bytes -> media type for the formats the OCR Lambda accepts
+_MAGIC_NUMBERS = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"%PDF-", "application/pdf"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+)
+
+
+def _sniff_media_type(head: bytes) -> Optional[str]:
+    for magic, media_type in _MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return media_type
+    return None
+
+
+def _to_upload_response(lambda_response: Dict[str, Any]) -> DocumentUploadResponse:
+    # Extract response fields from Lambda
+    return DocumentUploadResponse(
+        message=lambda_response.get("message", "Document processed"),
+        de_identified_text_uploaded=lambda_response.get("de_identified_text_uploaded", False),
+        supermemory_document_id=lambda_response.get("supermemory_document_id"),
+        details=lambda_response
+    )
+
+
+def _duplicate_response(record: Document) -> DocumentUploadResponse:
+    return DocumentUploadResponse(
+        message=record.message or "Document already processed",
+        de_identified_text_uploaded=record.de_identified_text_uploaded,
+        supermemory_document_id=record.supermemory_document_id,
+        details={"duplicate": True, "processed_at": record.updated_at.isoformat()}
+    )
+
+
+def _content_key(payload: DocumentUploadRequest) -> tuple[str, str]:
+    """(sha256, kind) identifying the upload's content; raises 400 on undecodable base64."""
+    if payload.text:
+        return hash_text(payload.text), "text"
+    try:
+        return hash_image_base64(payload.image_base64), "image"
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="image_base64 is not valid base64")
+
+
+def _in_flight() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="This document is already being processed",
+        headers={"Retry-After": "5"},
+    )
+
+
+def _to_job_response(job: IngestionJob) -> IngestionJobResponse:
+    return IngestionJobResponse(
+        job_id=job.id,
+        status=job.status,
+        attempts=job.attempts,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        error=job.last_error,
+        result=_to_upload_response(json.loads(job.result)) if job.result else None,
+    )
+
+@router.post(
+    "/upload-document",
+    response_model=DocumentUploadResponse,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(admit("upload"))],
+)
 async def upload_document(
     payload: DocumentUploadRequest,
-    current=Depends(get_current_user)
+    current=Depends(get_current_user),
+    selection: FieldSelection = Depends(field_selection),
 ):
     """
     Process documents and store in user's personal memory space.
     Accepts text or base64-encoded images (JPEG, PNG, PDF, TIFF).
+    `?verbose=false` leaves out the echoed Lambda `details`, `?fields=a,b` picks top-level fields
+    (as on the other upload and job routes).
     """
     upload_type = "image" if payload.image_base64 else "text"
     logger.info(f"Received {upload_type} document upload request for user {current['user_id']}")
+    content_hash, kind = _content_key(payload)
 
     try:
-        # Call Lambda via the document processor service
+        # Call Lambda via the document processor service (skipped for content already processed)
         # Pass user's supermemory_user_id so document gets tagged correctly
-        lambda_response = await document_processor.process_document(
-            raw_text=payload.text,
-            image_base64=payload.image_base64,
-            user_id=current["supermemory_user_id"]
+        lambda_response, duplicate = await process_once(
+            current["user_id"],
+            content_hash,
+            kind,
+            lambda: document_processor.process_document(
+                raw_text=payload.text,
+                image_base64=payload.image_base64,
+                user_id=current["supermemory_user_id"],
+                deidentify=payload.deidentify,
+            ),
         )
+        if duplicate is not None:
+            return select_fields(_duplicate_response(duplicate), selection)
 
-        # Extract response fields from Lambda
-        message = lambda_response.get("message", "Document processed")
-        de_identified = lambda_response.get("de_identified_text_uploaded", False)
-        doc_id = lambda_response.get("supermemory_document_id")
+        response = _to_upload_response(lambda_response)
+        logger.info(f"Document processed successfully. Supermemory ID: {response.supermemory_document_id}")
+        return select_fields(response, selection)
 
-        logger.info(f"Document processed successfully. Supermemory ID: {doc_id}")
+    except DocumentInFlight:
+        raise _in_flight()
+    except ValueError as e:
+        logger.error(f"Configuration error: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"Error processing document: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to process document. Please try again later."
+        )
+
+
+@router.post(
+    "/upload-file",
+    response_model=DocumentUploadResponse,
+    status_code=status.HTTP_200_OK,
+    dependencies=[Depends(admit("upload"))],
+)
+async def upload_file(
+    file: UploadFile = File(..., description="JPEG, PNG, PDF or TIFF scan"),
+    current=Depends(get_current_user),
+    selection: FieldSelection = Depends(field_selection),
+):
+    """
+    Multipart alternative to /upload-document for images and PDFs.
+    The upload is capped at UPLOAD_MAX_BYTES while it is received (app/core/body_limit.py),
+    spooled to a temp file (not held in memory), sniffed by magic number, and base64-encoded only
+    while streaming it to the Lambda. JPEG and PNG photos are normalized (grayscale, downsampled)
+    before they are sent.
+    """
+    if file.size is not None and file.size > settings.UPLOAD_MAX_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the {settings.UPLOAD_MAX_BYTES} byte limit"
+        )
+
+    head = await file.read(8)
+    media_type = _sniff_media_type(head)
+    if media_type is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Unsupported file type. Upload a JPEG, PNG, PDF or TIFF."
+        )
+    await file.seek(0)
+    logger.info(f"Received {media_type} file upload ({file.size} bytes) for user {current['user_id']}")
+    content_hash = await hash_file(file)
 
-        return DocumentUploadResponse(
-            message=message,
-            de_identified_text_uploaded=de_identified,
-            supermemory_document_id=doc_id,
-            details=lambda_response
+    try:
+        lambda_response, duplicate = await process_once(
+            current["user_id"],
+            content_hash,
+            "image",
+            lambda: document_processor.process_file(
+                file,
+                size=file.size,
+                user_id=current["supermemory_user_id"]
+            ),
         )
+        if duplicate is not None:
+            return select_fields(_duplicate_response(duplicate), selection)
+
+        response = _to_upload_response(lambda_response)
+        logger.info(f"Document processed successfully. Supermemory ID: {response.supermemory_document_id}")
+        return select_fields(response, selection)
 
+    except DocumentInFlight:
+        raise _in_flight()
     except ValueError as e:
         logger.error(f"Configuration error: {str(e)}")
         raise HTTPException(
@@ -55,3 +218,150 @@ async def upload_document(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Failed to process document. Please try again later."
         )
+    finally:
+        await file.close()
+
+
+@router.post(
+    "/upload-documents",
+    response_model=DocumentBatchUploadResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def upload_documents(
+    payload: DocumentBatchUploadRequest,
+    current=Depends(get_current_user),
+    selection: FieldSelection = Depends(field_selection),
+):
+    """
+    Process many documents in one request, at most DOCUMENT_BATCH_CONCURRENCY at a time.
+    Each item succeeds or fails on its own; per-item errors and timeouts are reported in `results`.
+    Admission charges one upload token per document, as if each had been sent on its own.
+    """
+    logger.info(f"Received batch of {len(payload.documents)} documents for user {current['user_id']}")
+    async with admitted("upload", current["supermemory_user_id"], cost=len(payload.documents)):
+        results = await _process_batch(payload, current)
+    succeeded = sum(1 for r in results if r.ok)
+    return select_fields(
+        DocumentBatchUploadResponse(succeeded=succeeded, failed=len(results) - succeeded, results=results),
+        selection,
+    )
+
+
+async def _process_batch(payload: DocumentBatchUploadRequest, current: dict) -> List[DocumentBatchItemResult]:
+    semaphore = asyncio.Semaphore(settings.DOCUMENT_BATCH_CONCURRENCY)
+
+    async def _process(index: int, doc: DocumentUploadRequest) -> DocumentBatchItemResult:
+        async with semaphore:
+            try:
+                content_hash, kind = _content_key(doc)
+                lambda_response, duplicate = await asyncio.wait_for(
+                    process_once(
+                        current["user_id"],
+                        content_hash,
+                        kind,
+                        lambda: document_processor.process_document(
+                            raw_text=doc.text,
+                            image_base64=doc.image_base64,
+                            user_id=current["supermemory_user_id"],
+                            deidentify=doc.deidentify,
+                        ),
+                    ),
+                    timeout=settings.DOCUMENT_BATCH_ITEM_TIMEOUT,
+                )
+            except HTTPException as e:
+                return DocumentBatchItemResult(index=index, ok=False, error=e.detail)
+            except DocumentInFlight:
+                return DocumentBatchItemResult(index=index, ok=False, error="This document is already being processed")
+            except asyncio.TimeoutError:
+                logger.warning(f"Batch item {index} timed out")
+                return DocumentBatchItemResult(index=index, ok=False, error="Timed out processing document")
+            except ValueError as e:
+                return DocumentBatchItemResult(index=index, ok=False, error=str(e))
+            except Exception as e:
+                logger.error(f"Batch item {index} failed: {str(e)}")
+                return DocumentBatchItemResult(index=index, ok=False, error="Failed to process document")
+        if duplicate is not None:
+            return DocumentBatchItemResult(index=index, ok=True, result=_duplicate_response(duplicate))
+        return DocumentBatchItemResult(index=index, ok=True, result=_to_upload_response(lambda_response))
+
+    return list(await asyncio.gather(*(_process(i, doc) for i, doc in enumerate(payload.documents))))
+
+
+@router.post(
+    "/jobs",
+    response_model=IngestionJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    dependencies=[Depends(admit("upload"))],
+)
+async def create_ingestion_job(
+    payload: DocumentUploadRequest,
+    current=Depends(get_current_user),
+    selection: FieldSelection = Depends(field_selection),
+):
+    """
+    Queue a document for background processing and return immediately.
+    Poll GET /jobs/{job_id} for status and, once succeeded, the processing result.
+    """
+    try:
+        job = await ingestion_worker.submit(
+            user_id=current["user_id"],
+            supermemory_user_id=current["supermemory_user_id"],
+            raw_text=payload.text,
+            image_base64=payload.image_base64,
+            deidentify=payload.deidentify,
+        )
+    except Exception as e:
+        logger.error(f"Error queueing document: {str(e)}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Failed to queue document. Please try again later."
+        )
+    logger.info(f"Queued ingestion job {job.id} for user {current['user_id']}")
+    return select_fields(_to_job_response(job), selection, status_code=status.HTTP_202_ACCEPTED)
+
+
+@router.get("/jobs/{job_id}", response_model=IngestionJobResponse)
+async def get_ingestion_job(
+    job_id: str,
+    current=Depends(get_current_user),
+    selection: FieldSelection = Depends(field_selection),
+):
+    async with async_session() as db:
+        job = await db.get(IngestionJob, job_id)
+    if not job or job.user_id != current["user_id"]:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return select_fields(_to_job_response(job), selection)
+
+
+@router.delete("/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_document(document_id: str, current=Depends(get_current_user)):
+    """
+    Delete one of the user's documents (by Supermemory document id) from Supermemory and the local
+    index, and forget its upload record so the same content can be uploaded again.
+    """
+    async with async_session() as db:
+        uploaded = (await db.execute(
+            select(Document.id).where(
+                Document.user_id == current["user_id"],
+                Document.supermemory_document_id == document_id,
+            )
+        )).first()
+    # Documents added through /memory/add have no upload record, but are in the user's local index
+    if uploaded is None and not await local_index.contains(current["supermemory_user_id"], document_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Document not found")
+
+    try:
+        await MemoryAPIClient().delete_document(document_id, current["supermemory_user_id"])
+    except Exception as e:
+        logger.error(f"Error deleting document {document_id}: {str(e)}")
+        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="Failed to delete document")
+
+    async with async_session() as db:
+        await db.execute(
+            delete(Document).where(
+                Document.user_id == current["user_id"],
+                Document.supermemory_document_id == document_id,
+            )
+        )
+        await db.commit()
+    logger.info(f"Deleted document {document_id} for user {current['user_id']}")
@@ -1,11 +1,18 @@
 # // app/api/routes/memory.py
 from typing import List, Dict, Optional
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from pydantic import BaseModel, Field
-from app.api.deps import get_current_user
+from app.api.deps import admit, get_current_user
+from app.core.admission import Permit
+from app.core.responses import FieldSelection, field_selection, select_fields
 from app.services.memory_api_client import MemoryAPIClient
-from app.services.memory_router_client import MemoryRouterClient
-from app.core.safety import check_safety
+from app.services.memory_router_client import get_router_client
+from app.core.safety import check_conversation
+from app.core.metrics import stage
+from app.services.chat_stream import stream_chat_response
+from app.services.completion_cache import completion_cache
+from app.services.conversation_store import ConversationNotFound, conversation_store
+from app.services.single_flight import completion_flights
 
 router = APIRouter()
 
@@ -15,8 +22,12 @@ class AddMemoryRequest(BaseModel):
     custom_id: Optional[str] = None
     raw: Optional[str] = None
 
-@router.post("/memory/add")
-async def add_memory(payload: AddMemoryRequest, current=Depends(get_current_user)):
+@router.post("/memory/add", dependencies=[Depends(admit("memory"))])
+async def add_memory(
+    payload: AddMemoryRequest,
+    current=Depends(get_current_user),
+    selection: FieldSelection = Depends(field_selection),
+):
     client = MemoryAPIClient()
     # Use the user's unique supermemory_user_id as the container tag
     tag = current["supermemory_user_id"]
@@ -28,7 +39,7 @@ async def add_memory(payload: AddMemoryRequest, current=Depends(get_current_user
             custom_id=payload.custom_id,
             raw=payload.raw,
         )
-        return result  # { id: "...", status: "queued" }
+        return select_fields(result, selection, bulky=())  # { id: "...", status: "queued" }
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
 
@@ -37,27 +48,89 @@ class ChatMessage(BaseModel):
     content: str
 
 class ChatRequest(BaseModel):
-    messages: List[ChatMessage]
+    messages: List[ChatMessage]  # with conversation_id: only the new messages of this turn
     model: Optional[str] = None
-    conversation_id: Optional[str] = None
+    conversation_id: Optional[str] = Field(None, max_length=64)  # server-side history, see routes/conversations.py
+    stream: bool = False  # relay tokens as Server-Sent Events
 
 @router.post("/chat/complete")
-async def chat_complete(payload: ChatRequest, current=Depends(get_current_user)):
+async def chat_complete(
+    payload: ChatRequest,
+    request: Request,
+    current=Depends(get_current_user),
+    permit: Permit = Depends(admit("chat")),
+):
     # Safety guardrail (block before hitting LLM)
-    last_user_text = next((m.content for m in reversed(payload.messages) if m.role == "user"), "")
-    ok, msg = check_safety(last_user_text or "")
+    with stage("safety"):
+        ok, msg = check_conversation(
+            [(m.role, m.content) for m in payload.messages],
+            scope=payload.conversation_id or current["supermemory_user_id"],
+        )
     if not ok:
         # Fail-closed: do NOT call the LLM
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=msg)
 
+    # Earlier turns come from the server-side store; the client only sends the new ones. The router
+    # gets the full history in `messages` and no conversation header, so it keeps no copy of its own
+    new_messages = [m.model_dump() for m in payload.messages]
+    messages = list(new_messages)
+    stored_count = 0
+    if payload.conversation_id:
+        try:
+            with stage("conversation"):
+                conversation, history = await conversation_store.load(
+                    current["user_id"], payload.conversation_id, create=True
+                )
+        except ConversationNotFound:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Conversation not found")
+        messages = conversation_store.prompt(conversation, history) + new_messages
+        stored_count = len(history)
+
+    async def record_reply(content: str) -> None:
+        if payload.conversation_id:
+            await conversation_store.append(
+                payload.conversation_id,
+                new_messages + [{"role": "assistant", "content": content}],
+                stored_count,
+            )
+
     # Use the user's unique supermemory_user_id for memory isolation
-    router_client = MemoryRouterClient(user_id=current["supermemory_user_id"])
-    try:
-        result = router_client.chat(
-            messages=[m.model_dump() for m in payload.messages],
-            model=payload.model,
-            conversation_id=payload.conversation_id,
-        )
+    router_client = get_router_client(current["supermemory_user_id"])
+    if payload.stream:
+        try:
+            stream = await router_client.chat_stream(
+                messages=messages,
+                model=payload.model,
+            )
+            # The router injects memories itself, so memory is always on for this path
+            permit.hold()
+            return stream_chat_response(
+                request,
+                stream,
+                memory_enabled=True,
+                conversation_id=payload.conversation_id,
+                on_complete=record_reply,
+                on_close=permit.release,
+            )
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+
+    async def complete() -> Dict:
+        try:
+            result = await router_client.chat(
+                messages=messages,
+                model=payload.model,
+            )
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+        await record_reply(result["content"] or "")
         return result
-    except Exception as e:
-        raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail=str(e))
+
+    # Identical concurrent requests (double submit, retry) share one router call and one stored turn
+    flight_key = (
+        "router",
+        payload.conversation_id,
+        completion_cache.key(current["supermemory_user_id"], payload.model or "", None, messages),
+    )
+    result = await completion_flights.do(flight_key, complete)
+    return {**result, "conversation_id": payload.conversation_id}
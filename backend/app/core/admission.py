@@ -0,0 +1,224 @@
+# app/core/admission.py
+"""
+Admission control in front of the expensive upstream calls (OpenAI, the Supermemory router, the
+PHI Lambda, Supermemory writes).
+
+Each protected route names a limit ("chat", "upload", "memory"; routes sharing a name share its
+budget). A limit has, per supermemory_user_id and globally across all users:
+  - a token bucket: `rate` requests per second sustained, bursts of up to `burst` (a request that
+    does several upstream calls' worth of work, like a batch upload, takes one token per call)
+  - a concurrency cap: at most `concurrency` requests in flight
+A request over any of them is rejected with AdmissionRejected (the API answers 429 with
+Retry-After) before any upstream call is made. A 0 disables that part of the limit.
+
+Limits come from ADMISSION_USER_LIMITS / ADMISSION_GLOBAL_LIMITS, e.g.
+"chat=0.5:10:3,upload=0.2:10:3" (name=rate:burst:concurrency). State lives in an AdmissionStore;
+the default keeps it in process memory (so limits are per worker). ADMISSION_STORE can name
+another implementation as "package.module:ClassName", e.g. one backed by Redis for a fleet.
+"""
+import importlib
+import math
+from abc import ABC, abstractmethod
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from app.core.config import settings
+
+GLOBAL_SCOPE = "*"
+
+
+class Limit(NamedTuple):
+    rate: float  # tokens per second; 0 = no rate limit
+    burst: float  # bucket capacity
+    concurrency: int  # max in flight; 0 = no concurrency limit
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionStore(ABC):
+    """Where bucket levels and in-flight counts live. Methods are async so a networked store fits."""
+
+    @abstractmethod
+    async def take(self, key: str, rate: float, burst: float, tokens: float = 1.0) -> float:
+        """Take `tokens` tokens: 0.0 if taken, otherwise seconds until that many will be available."""
+
+    @abstractmethod
+    async def refund(self, key: str, burst: float, tokens: float = 1.0) -> None:
+        """Return tokens taken for a request that was rejected by a later check."""
+
+    @abstractmethod
+    async def acquire(self, key: str, limit: int) -> bool:
+        """Take one of `limit` concurrency slots, or False if all are in use."""
+
+    @abstractmethod
+    async def release(self, key: str) -> None:
+        """Give back a slot taken with acquire()."""
+
+
+class InMemoryAdmissionStore(AdmissionStore):
+    # Full buckets are indistinguishable from missing ones; drop them once this many keys exist
+    SWEEP_THRESHOLD = 100_000
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}  # key -> (tokens, updated at, full again at)
+        self._in_flight: Dict[str, int] = {}
+
+    def _level(self, key: str, rate: float, burst: float, now: float) -> float:
+        entry = self._buckets.get(key)
+        if entry is None:
+            return burst
+        tokens, updated_at, _ = entry
+        return min(burst, tokens + (now - updated_at) * rate)
+
+    async def take(self, key: str, rate: float, burst: float, tokens: float = 1.0) -> float:
+        now = time.monotonic()
+        level = self._level(key, rate, burst, now)
+        wait = 0.0
+        if level >= tokens:
+            level -= tokens
+        else:
+            wait = (tokens - level) / rate
+        self._buckets[key] = (level, now, now + (burst - level) / rate)
+        if len(self._buckets) > self.SWEEP_THRESHOLD:
+            self._buckets = {k: v for k, v in self._buckets.items() if v[2] > now}
+        return wait
+
+    async def refund(self, key: str, burst: float, tokens: float = 1.0) -> None:
+        entry = self._buckets.get(key)
+        if entry is not None:
+            level, updated_at, full_at = entry
+            self._buckets[key] = (min(burst, level + tokens), updated_at, full_at)
+
+    async def acquire(self, key: str, limit: int) -> bool:
+        in_flight = self._in_flight.get(key, 0)
+        if in_flight >= limit:
+            return False
+        self._in_flight[key] = in_flight + 1
+        return True
+
+    async def release(self, key: str) -> None:
+        in_flight = self._in_flight.get(key, 0) - 1
+        if in_flight > 0:
+            self._in_flight[key] = in_flight
+        else:
+            self._in_flight.pop(key, None)
+
+
+def parse_limits(spec: str) -> Dict[str, Limit]:
+    """Parse "chat=0.5:10:3,upload=0.2:10:3" (name=rate:burst:concurrency) into Limits."""
+    limits: Dict[str, Limit] = {}
+    for item in spec.split(","):
+        name, _, values = item.partition("=")
+        if not name.strip() or not values:
+            continue
+        rate, burst, concurrency = (values.split(":") + ["0", "0"])[:3]
+        rate, burst = float(rate or 0), float(burst or 0)
+        # A bucket smaller than one token would reject everything
+        limits[name.strip()] = Limit(rate, max(burst, 1.0) if rate > 0 else 0.0, int(concurrency or 0))
+    return limits
+
+
+def _load_store(path: str) -> AdmissionStore:
+    if path in ("", "memory"):
+        return InMemoryAdmissionStore()
+    module_name, _, class_name = path.partition(":")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class Permit:
+    """Concurrency slots held by one admitted request; release() is idempotent."""
+
+    def __init__(self, store: AdmissionStore, keys: List[str]):
+        self._store = store
+        self._keys = keys
+        self.held = False
+
+    def hold(self) -> None:
+        """Keep the slots past the handler (a streamed response releases them when it ends)."""
+        self.held = True
+
+    async def release(self) -> None:
+        keys, self._keys = self._keys, []
+        for key in keys:
+            await self._store.release(key)
+
+
+class AdmissionController:
+    def __init__(self, store: AdmissionStore, user_limits: Dict[str, Limit], global_limits: Dict[str, Limit]):
+        self.store = store
+        self.user_limits = user_limits
+        self.global_limits = global_limits
+        self.admitted: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+
+    def _checks(self, name: str, user: str) -> List[Tuple[str, Limit]]:
+        checks = []
+        if name in self.user_limits:
+            checks.append((f"{name}:{user}", self.user_limits[name]))
+        if name in self.global_limits:
+            checks.append((f"{name}:{GLOBAL_SCOPE}", self.global_limits[name]))
+        return checks
+
+    def max_cost(self, name: str, user: str) -> Optional[float]:
+        """The largest cost admit() can ever accept for `name` (the smallest bucket), or None if unlimited."""
+        bursts = [limit.burst for _, limit in self._checks(name, user) if limit.rate > 0]
+        return min(bursts) if bursts else None
+
+    async def admit(self, name: str, user: str, cost: float = 1.0) -> Permit:
+        """
+        Admit one `name` request for `user` or raise AdmissionRejected (nothing is left held).
+        `cost` is the number of rate-limit tokens it takes, e.g. one per document in a batch.
+        """
+        checks = self._checks(name, user)
+        permit = Permit(self.store, [])
+        taken: List[Tuple[str, Limit]] = []
+        try:
+            for key, limit in checks:
+                if limit.concurrency > 0:
+                    if not await self.store.acquire(key, limit.concurrency):
+                        scope = "global" if key.endswith(GLOBAL_SCOPE) else "per-user"
+                        raise AdmissionRejected(f"too many concurrent {name} requests ({scope})", 1.0)
+                    permit._keys.append(key)
+            for key, limit in checks:
+                if limit.rate > 0:
+                    wait = await self.store.take(key, limit.rate, limit.burst, cost)
+                    if wait > 0:
+                        scope = "global" if key.endswith(GLOBAL_SCOPE) else "per-user"
+                        raise AdmissionRejected(f"{name} rate limit exceeded ({scope})", wait)
+                    taken.append((key, limit))
+        except AdmissionRejected:
+            for key, limit in taken:
+                await self.store.refund(key, limit.burst, cost)
+            await permit.release()
+            self.rejected[name] = self.rejected.get(name, 0) + 1
+            raise
+        self.admitted[name] = self.admitted.get(name, 0) + 1
+        return permit
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": settings.ADMISSION_ENABLED,
+            "store": type(self.store).__name__,
+            "user_limits": {name: limit._asdict() for name, limit in self.user_limits.items()},
+            "global_limits": {name: limit._asdict() for name, limit in self.global_limits.items()},
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+def retry_after_header(seconds: float) -> str:
+    # Retry-After takes whole seconds; never tell a client to retry immediately
+    return str(max(1, math.ceil(seconds)))
+
+
+# Singleton instance
+admission = AdmissionController(
+    store=_load_store(settings.ADMISSION_STORE),
+    user_limits=parse_limits(settings.ADMISSION_USER_LIMITS),
+    global_limits=parse_limits(settings.ADMISSION_GLOBAL_LIMITS),
+)
@@ -0,0 +1,61 @@
+# app/core/body_limit.py
+"""
+Upload size limit enforced before the body is parsed.
+
+Starlette reads and spools the whole multipart body before a route runs, so a size check inside
+/upload-file only fires after the client has already streamed everything to disk. This middleware
+caps multipart bodies at UPLOAD_MAX_BYTES (plus room for the part headers and boundaries):
+  - a declared Content-Length over the cap is answered 413 without reading the body
+  - otherwise (chunked uploads, or a Content-Length that lies) bytes are counted as they are
+    received, and the parse is aborted with 413 as soon as the cap is crossed
+"""
+from fastapi import HTTPException, status
+from starlette.datastructures import Headers
+
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+
+# Multipart framing around the file: boundaries, part headers, small form fields
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def _too_large(limit: int) -> str:
+    return f"File exceeds the {limit} byte limit"
+
+
+class BodyLimitMiddleware:
+    """Pure ASGI middleware; only multipart/form-data requests are limited."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        if not headers.get("content-type", "").startswith("multipart/form-data"):
+            await self.app(scope, receive, send)
+            return
+
+        limit = settings.UPLOAD_MAX_BYTES
+        cap = limit + MULTIPART_OVERHEAD_BYTES
+        declared = headers.get("content-length")
+        if declared is not None and declared.isdigit() and int(declared) > cap:
+            response = FastJSONResponse({"detail": _too_large(limit)}, status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def receive_limited():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > cap:
+                    # Raised inside the form parse; FastAPI re-raises HTTPExceptions from body parsing
+                    raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=_too_large(limit))
+            return message
+
+        await self.app(scope, receive_limited, send)
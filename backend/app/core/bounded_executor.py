@@ -0,0 +1,41 @@
+# app/core/bounded_executor.py
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class BoundedExecutor:
+    """
+    Thread pool for CPU-heavy calls (bcrypt, image decoding) that counts the jobs queued or running,
+    so callers can turn work away once `max_pending` are in flight instead of queueing behind them.
+    """
+
+    def __init__(self, workers: int, thread_name_prefix: str):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=thread_name_prefix)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _release(self, _future: Optional[Future] = None) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def submit(self, max_pending: int, fn: Callable[..., Any], *args: Any) -> Optional["asyncio.Future[Any]"]:
+        """Start `fn(*args)` in the pool and return an awaitable for it, or None if it is full."""
+        with self._lock:
+            if self._pending >= max_pending:
+                return None
+            self._pending += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        # The slot is freed when the job finishes (in the worker thread), not when the caller stops
+        # waiting: a cancelled caller's job keeps its worker busy until it completes
+        future.add_done_callback(self._release)
+        return asyncio.wrap_future(future)
@@ -0,0 +1,138 @@
+# app/core/compression.py
+"""
+Response compression: brotli or gzip, whichever the client's Accept-Encoding prefers (brotli wins
+ties; it is used only when the `brotli` package is installed).
+
+Only bodies sent in one piece are compressed, which covers every JSON response. Streamed responses
+such as chat token streams pass through untouched, because compressing them would hold tokens back
+in the compressor. Bodies under COMPRESSION_MIN_BYTES aren't worth the CPU and are sent as they are.
+"""
+import asyncio
+import gzip
+import importlib.util
+from typing import Dict, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from app.core.config import settings
+from app.core.metrics import stage
+
+# Optional (gzip only without it); imported on the first brotli response rather than at startup,
+# which keeps it out of Lambda cold starts
+_brotli = None
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None
+
+_COMPRESSIBLE = ("application/json", "text/")
+_NEVER = ("text/event-stream",)
+# Bodies this large are compressed in a worker thread instead of on the event loop
+_OFFLOAD_BYTES = 256 * 1024
+
+SUPPORTED: Tuple[str, ...] = ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+_stats: Dict[str, Dict[str, int]] = {name: {"responses": 0, "bytes_in": 0, "bytes_out": 0} for name in SUPPORTED}
+_stats["identity"] = {"responses": 0, "bytes_in": 0, "bytes_out": 0}
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """The supported encoding with the highest q-value in an Accept-Encoding header, if any."""
+    qualities: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in SUPPORTED:
+        quality = qualities.get(encoding, qualities.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def _brotli_module():
+    global _brotli
+    if _brotli is None:
+        import brotli
+
+        _brotli = brotli
+    return _brotli
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return _brotli_module().compress(body, quality=settings.COMPRESSION_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=settings.COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+def compression_stats() -> Dict[str, Dict[str, int]]:
+    return _stats
+
+
+class CompressionMiddleware:
+    """Pure ASGI middleware; holds back the response start until the body shows whether to compress."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", "")) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def send_compressed(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if start is None:
+                await send(message)
+                return
+
+            held, start = start, None
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=list(held.get("headers", [])))
+            content_type = headers.get("content-type", "")
+            if (
+                message["type"] != "http.response.body"
+                or message.get("more_body", False)
+                or len(body) < settings.COMPRESSION_MIN_BYTES
+                or "content-encoding" in headers
+                or not content_type.startswith(_COMPRESSIBLE)
+                or content_type.startswith(_NEVER)
+            ):
+                if message["type"] == "http.response.body" and not message.get("more_body", False):
+                    _stats["identity"]["responses"] += 1
+                    _stats["identity"]["bytes_in"] += len(body)
+                    _stats["identity"]["bytes_out"] += len(body)
+                await send(held)
+                await send(message)
+                return
+
+            with stage("compress"):
+                if len(body) >= _OFFLOAD_BYTES:
+                    compressed = await asyncio.to_thread(compress, body, encoding)
+                else:
+                    compressed = compress(body, encoding)
+            stats = _stats[encoding]
+            stats["responses"] += 1
+            stats["bytes_in"] += len(body)
+            stats["bytes_out"] += len(compressed)
+
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            held["headers"] = headers.raw
+            await send(held)
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,17 +1,38 @@
 # app/core/config.py
 from pydantic import BaseModel
 import os
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+# Load environment variables from .env file (not on Lambda: configuration comes from the function's
+# environment there, and skipping the .env lookup keeps it off the cold start)
+if not os.getenv("AWS_LAMBDA_FUNCTION_NAME"):
+    from dotenv import load_dotenv
+
+    load_dotenv()
 
 class _Settings(BaseModel):
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./medesense.db")
+    # Connection pool (pooled backends; sessions are short-lived, so the pool only needs to cover
+    # concurrent queries, not concurrent requests). PRE_PING drops connections the server closed.
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "10"))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+    # SQLite only: wait this long for a competing writer instead of failing with "database is locked"
+    SQLITE_BUSY_TIMEOUT_MS: int = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
     SECRET_KEY: str = os.getenv("SECRET_KEY", "")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
     BCRYPT_WORK_FACTOR: int = int(os.getenv("BCRYPT_WORK_FACTOR", "12"))
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+    # user id -> identity cache used by get_current_user for tokens without an smid claim
+    IDENTITY_CACHE_TTL_SECONDS: float = float(os.getenv("IDENTITY_CACHE_TTL_SECONDS", "300"))
+    IDENTITY_CACHE_MAX_ENTRIES: int = int(os.getenv("IDENTITY_CACHE_MAX_ENTRIES", "10000"))
     PHI_STRIPPER_LAMBDA_API_URL: str = os.getenv("PHI_STRIPPER_LAMBDA_API_URL", "")
+    # De-identify text uploads via the Lambda ("lambda") or in-process ("local"); images always use the Lambda
+    PHI_TEXT_MODE: str = os.getenv("PHI_TEXT_MODE", "lambda").lower()
+    # Extra comma-separated name dictionary files for the local de-identifier (one term per line)
+    PHI_DICTIONARY_PATHS: str = os.getenv("PHI_DICTIONARY_PATHS", "")
     SUPERMEMORY_API_KEY: str = os.getenv("SUPERMEMORY_API_KEY", "")
     SUPERMEMORY_BASE_URL: str = os.getenv("SUPERMEMORY_BASE_URL", "https://api.supermemory.ai").rstrip("/")
     SUPERMEMORY_ROUTER_BASE: str = os.getenv("SUPERMEMORY_ROUTER_BASE", "https://api.supermemory.ai/v3/").rstrip("/")
@@ -20,4 +41,111 @@ class _Settings(BaseModel):
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     SM_DEFAULT_MODEL: str = os.getenv("SM_DEFAULT_MODEL", "gpt-4o-mini")
 
+    # Pooled upstream HTTP clients (one keep-alive pool per upstream, see app/services/http_clients.py)
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+    HTTP_CONNECT_TIMEOUT: float = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+    HTTP_READ_TIMEOUT: float = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+    HTTP_POOL_TIMEOUT: float = float(os.getenv("HTTP_POOL_TIMEOUT", "10"))
+    HTTP2_ENABLED: bool = os.getenv("HTTP2_ENABLED", "false").lower() in ("1", "true", "yes")
+    HTTP_WARM_ON_STARTUP: bool = os.getenv("HTTP_WARM_ON_STARTUP", "true").lower() in ("1", "true", "yes")
+
+    # Max per-user Supermemory router clients kept alive (LRU)
+    ROUTER_CLIENT_POOL_SIZE: int = int(os.getenv("ROUTER_CLIENT_POOL_SIZE", "1024"))
+
+    # POST /api/documents/upload-file (multipart); larger files are rejected with 413 while still
+    # being received, see app/core/body_limit.py
+    UPLOAD_MAX_BYTES: int = int(os.getenv("UPLOAD_MAX_BYTES", str(25 * 1024 * 1024)))
+
+    # Skip the Lambda for content a user already uploaded (documents table, keyed by SHA-256)
+    DEDUP_ENABLED: bool = os.getenv("DEDUP_ENABLED", "true").lower() in ("1", "true", "yes")
+    # A 'processing' claim older than this is assumed abandoned and may be taken over
+    DEDUP_PROCESSING_TIMEOUT: float = float(os.getenv("DEDUP_PROCESSING_TIMEOUT", "120"))
+
+    # POST /api/documents/upload-documents (batch)
+    DOCUMENT_BATCH_MAX_ITEMS: int = int(os.getenv("DOCUMENT_BATCH_MAX_ITEMS", "50"))
+    DOCUMENT_BATCH_CONCURRENCY: int = int(os.getenv("DOCUMENT_BATCH_CONCURRENCY", "4"))
+    DOCUMENT_BATCH_ITEM_TIMEOUT: float = float(os.getenv("DOCUMENT_BATCH_ITEM_TIMEOUT", "45"))
+
+    # Background document ingestion (POST /api/documents/jobs)
+    INGESTION_WORKERS: int = int(os.getenv("INGESTION_WORKERS", "4"))
+    INGESTION_MAX_ATTEMPTS: int = int(os.getenv("INGESTION_MAX_ATTEMPTS", "3"))
+    INGESTION_RETRY_BASE_SECONDS: float = float(os.getenv("INGESTION_RETRY_BASE_SECONDS", "2"))
+    INGESTION_RETRY_MAX_SECONDS: float = float(os.getenv("INGESTION_RETRY_MAX_SECONDS", "60"))
+
+    # Per-user Supermemory search cache (0 disables either bound)
+    SEARCH_CACHE_TTL_SECONDS: float = float(os.getenv("SEARCH_CACHE_TTL_SECONDS", "120"))
+    SEARCH_CACHE_MAX_ENTRIES: int = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "4096"))
+    # Supermemory indexes new documents asynchronously: don't cache a user's searches this soon after an add
+    SEARCH_CACHE_SETTLE_SECONDS: float = float(os.getenv("SEARCH_CACHE_SETTLE_SECONDS", "30"))
+
+    # Supermemory search for /api/chat: give up after DEADLINE_MS; skip search for RESET_SECONDS after
+    # BREAKER_FAILURES consecutive failures (0 disables); hedge a second request once past the recent p95
+    RETRIEVAL_DEADLINE_MS: float = float(os.getenv("RETRIEVAL_DEADLINE_MS", "800"))
+    RETRIEVAL_BREAKER_FAILURES: int = int(os.getenv("RETRIEVAL_BREAKER_FAILURES", "5"))
+    RETRIEVAL_BREAKER_RESET_SECONDS: float = float(os.getenv("RETRIEVAL_BREAKER_RESET_SECONDS", "30"))
+    RETRIEVAL_HEDGE_ENABLED: bool = os.getenv("RETRIEVAL_HEDGE_ENABLED", "true").lower() in ("1", "true", "yes")
+    RETRIEVAL_HEDGE_MIN_SAMPLES: int = int(os.getenv("RETRIEVAL_HEDGE_MIN_SAMPLES", "20"))
+
+    # /api/chat document context: memories to retrieve, then pack into a token budget per model.
+    # CONTEXT_TOKEN_BUDGETS is "model-prefix=tokens,..." (longest prefix wins) over CONTEXT_TOKEN_BUDGET.
+    CONTEXT_SEARCH_LIMIT: int = int(os.getenv("CONTEXT_SEARCH_LIMIT", "6"))
+    CONTEXT_TOKEN_BUDGET: int = int(os.getenv("CONTEXT_TOKEN_BUDGET", "600"))
+    CONTEXT_TOKEN_BUDGETS: str = os.getenv("CONTEXT_TOKEN_BUDGETS", "gpt-4o=1200,gpt-4o-mini=800")
+    # Longest single memory, in tokens (0 = only the overall budget applies)
+    CONTEXT_MAX_SNIPPET_TOKENS: int = int(os.getenv("CONTEXT_MAX_SNIPPET_TOKENS", "250"))
+
+    # Local BM25 index of de-identified uploads (SQLite FTS5 file; empty path disables), see
+    # app/services/local_index.py. RETRIEVAL_MODE picks where /api/chat gets its documents from:
+    # remote (Supermemory only) | local_first (Supermemory only when the index has < limit hits) | merge | local
+    LOCAL_INDEX_PATH: str = os.getenv("LOCAL_INDEX_PATH", "./local_index.db")
+    LOCAL_INDEX_CHUNK_WORDS: int = int(os.getenv("LOCAL_INDEX_CHUNK_WORDS", "120"))
+    RETRIEVAL_MODE: str = os.getenv("RETRIEVAL_MODE", "local_first")
+
+    # Exact-match /api/chat completion cache in a local SQLite file (empty path or 0 disables)
+    COMPLETION_CACHE_PATH: str = os.getenv("COMPLETION_CACHE_PATH", "./completion_cache.db")
+    COMPLETION_CACHE_TTL_SECONDS: float = float(os.getenv("COMPLETION_CACHE_TTL_SECONDS", "86400"))
+    COMPLETION_CACHE_MAX_ENTRIES: int = int(os.getenv("COMPLETION_CACHE_MAX_ENTRIES", "10000"))
+
+    # Admission control for upstream-heavy routes, see app/core/admission.py.
+    # name=rate:burst:concurrency per limit (rate in requests/second; 0 disables that part)
+    ADMISSION_ENABLED: bool = os.getenv("ADMISSION_ENABLED", "true").lower() in ("1", "true", "yes")
+    ADMISSION_USER_LIMITS: str = os.getenv("ADMISSION_USER_LIMITS", "chat=0.5:10:3,upload=0.2:10:3,memory=1:20:4")
+    ADMISSION_GLOBAL_LIMITS: str = os.getenv("ADMISSION_GLOBAL_LIMITS", "chat=20:60:100,upload=5:20:20,memory=20:50:50")
+    ADMISSION_STORE: str = os.getenv("ADMISSION_STORE", "memory")  # or "package.module:ClassName"
+
+    # GET /metrics (Prometheus text format) and Server-Timing response headers, see app/core/metrics.py
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
+    SERVER_TIMING_ENABLED: bool = os.getenv("SERVER_TIMING_ENABLED", "true").lower() in ("1", "true", "yes")
+
+    # Brotli/gzip compression of JSON responses of at least MIN_BYTES (streams are never compressed),
+    # see app/core/compression.py. Brotli quality 4 is about gzip -6 speed with smaller output.
+    COMPRESSION_ENABLED: bool = os.getenv("COMPRESSION_ENABLED", "true").lower() in ("1", "true", "yes")
+    COMPRESSION_MIN_BYTES: int = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+
+    # JPEG/PNG uploads are auto-oriented, grayscaled, downsampled to a long side of MAX_DIMENSION px and
+    # re-encoded before the Lambda call, see app/services/image_normalizer.py. Images under MIN_BYTES,
+    # and images arriving while MAX_PENDING are already being normalized, are sent unchanged.
+    IMAGE_NORMALIZE_ENABLED: bool = os.getenv("IMAGE_NORMALIZE_ENABLED", "true").lower() in ("1", "true", "yes")
+    IMAGE_MAX_DIMENSION: int = int(os.getenv("IMAGE_MAX_DIMENSION", "2400"))
+    IMAGE_JPEG_QUALITY: int = int(os.getenv("IMAGE_JPEG_QUALITY", "80"))
+    IMAGE_NORMALIZE_MIN_BYTES: int = int(os.getenv("IMAGE_NORMALIZE_MIN_BYTES", str(512 * 1024)))
+    IMAGE_NORMALIZE_WORKERS: int = int(os.getenv("IMAGE_NORMALIZE_WORKERS", str(min(4, os.cpu_count() or 1))))
+    IMAGE_NORMALIZE_MAX_PENDING: int = int(os.getenv("IMAGE_NORMALIZE_MAX_PENDING", "16"))
+
+    # Server-side conversations: keep the last KEEP_TURNS turns verbatim; once COMPACT_TURNS more have
+    # accumulated, fold the older ones into a stored summary (SUMMARY_MODEL defaults to SM_DEFAULT_MODEL)
+    CONVERSATION_KEEP_TURNS: int = int(os.getenv("CONVERSATION_KEEP_TURNS", "6"))
+    CONVERSATION_COMPACT_TURNS: int = int(os.getenv("CONVERSATION_COMPACT_TURNS", "4"))
+    CONVERSATION_SUMMARY_MODEL: str = os.getenv("CONVERSATION_SUMMARY_MODEL", "")
+    CONVERSATION_SUMMARY_MAX_TOKENS: int = int(os.getenv("CONVERSATION_SUMMARY_MAX_TOKENS", "300"))
+
+    # Safety gate term lists (one <category>.txt per file; defaults to app/core/safety_terms), re-read on change
+    SAFETY_TERMS_DIR: str = os.getenv("SAFETY_TERMS_DIR", "")
+    SAFETY_RELOAD_SECONDS: float = float(os.getenv("SAFETY_RELOAD_SECONDS", "5"))
+    SAFETY_VERDICT_CACHE_SIZE: int = int(os.getenv("SAFETY_VERDICT_CACHE_SIZE", "50000"))
+
 settings = _Settings()
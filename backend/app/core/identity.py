@@ -0,0 +1,85 @@
+# app/core/identity.py
+"""
+Identity resolution for authenticated requests without a DB round trip.
+
+Two layers, checked in order by app.api.deps.get_current_user:
+1. Signed `smid` claim: tokens minted by create_access_token carry the user's
+   supermemory_user_id, so the JWT signature alone proves the identity.
+2. In-process TTL cache of user id -> identity for tokens without the claim.
+
+invalidate_identity(user_id) must be called whenever a user is deleted or their
+supermemory_user_id changes: it drops the cache entry and marks every token issued up to
+now as needing a DB re-check, so stale claims stop being trusted immediately.
+Revocations are per process; multi-worker deployments should keep token lifetimes short.
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from app.core.config import settings
+
+Identity = Dict[str, object]
+
+
+class IdentityCache:
+    def __init__(self, max_entries: int, ttl_seconds: float, token_lifetime_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.token_lifetime_seconds = token_lifetime_seconds
+        self._entries: "OrderedDict[int, Tuple[float, Identity]]" = OrderedDict()
+        # user id -> revocation time, oldest first
+        self._revoked_at: Dict[int, float] = {}
+
+    def get(self, user_id: int) -> Optional[Identity]:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, identity = entry
+        if expires_at <= time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return identity
+
+    def set(self, user_id: int, identity: Identity) -> None:
+        if self.max_entries <= 0 or self.ttl_seconds <= 0:
+            return
+        self._entries[user_id] = (time.monotonic() + self.ttl_seconds, identity)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+        now = time.time()
+        self._revoked_at.pop(user_id, None)
+        self._revoked_at[user_id] = now
+        self._prune_revocations(now)
+
+    def _prune_revocations(self, now: float) -> None:
+        # Every token issued at or before an older revocation has expired, so it can't match one
+        horizon = now - self.token_lifetime_seconds
+        while self._revoked_at:
+            user_id, revoked_at = next(iter(self._revoked_at.items()))
+            if revoked_at > horizon:
+                break
+            del self._revoked_at[user_id]
+
+    def claim_trusted(self, user_id: int, issued_at: Optional[int]) -> bool:
+        """A token's smid claim is trusted unless it was issued at/before a revocation."""
+        revoked_at = self._revoked_at.get(user_id)
+        if revoked_at is None:
+            return True
+        # iat has 1s resolution; treat same-second tokens as revoked and re-check the DB
+        return issued_at is not None and issued_at > revoked_at
+
+
+identity_cache = IdentityCache(
+    max_entries=settings.IDENTITY_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.IDENTITY_CACHE_TTL_SECONDS,
+    token_lifetime_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+
+def invalidate_identity(user_id: int) -> None:
+    identity_cache.invalidate(user_id)
@@ -0,0 +1,206 @@
+# app/core/metrics.py
+"""
+Request timing: per-endpoint and per-stage latency histograms, exported in the Prometheus text
+format on GET /metrics and echoed to clients as a Server-Timing header.
+
+    with stage("retrieval"):
+        ...
+
+records the block's duration under the current request's route, and adds it to that request's
+Server-Timing header (`retrieval;dur=12.3`). Upstream HTTP calls (per upstream and status code)
+and database statements are recorded the same way from app.services.http_clients and the engine
+hooks below, so a slow /api/chat can be attributed to auth, safety, the DB, retrieval or the LLM.
+
+Everything here is in-process counters updated with a bisect and a dict lookup (~1-2us per
+observation), cheap enough to leave on in production. It is deliberately dependency-free; the
+output is what prometheus_client would produce for the same histograms.
+"""
+import bisect
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+# Seconds; spans a cached lookup (sub-ms) up to a long LLM completion
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str], buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, series in sorted(self._series.items()):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, labels))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound}"}} {cumulative}')
+            cumulative += series[len(self.buckets)]
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {series[-1]}")
+            lines.append(f"{self.name}_count{{{base}}} {cumulative}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_DURATION = Histogram(
+    "medesense_http_request_duration_seconds", "Time to first response byte per endpoint.",
+    ("method", "route", "status"),
+)
+STAGE_DURATION = Histogram(
+    "medesense_stage_duration_seconds", "Time spent in each stage of a request.", ("route", "stage"),
+)
+UPSTREAM_DURATION = Histogram(
+    "medesense_upstream_request_duration_seconds", "Upstream HTTP calls by upstream and status code.",
+    ("upstream", "status"),
+)
+DB_DURATION = Histogram(
+    "medesense_db_query_duration_seconds", "Database statement execution time.", ("operation",),
+)
+_REGISTRY = (REQUEST_DURATION, STAGE_DURATION, UPSTREAM_DURATION, DB_DURATION)
+
+
+class _RequestTimings:
+    __slots__ = ("scope", "entries")
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.entries: List[Tuple[str, float]] = []
+
+    @property
+    def route(self) -> str:
+        # Templated path ("/api/documents/jobs/{job_id}") once routing has matched, to bound label cardinality
+        route = self.scope.get("route")
+        return route.path if route is not None else "unmatched"
+
+    def add(self, name: str, seconds: float) -> None:
+        self.entries.append((name, seconds))
+
+    def server_timing(self, total: float) -> str:
+        # Repeated stages (e.g. several DB queries) are summed into one entry
+        totals: Dict[str, float] = {}
+        for name, seconds in self.entries:
+            totals[name] = totals.get(name, 0.0) + seconds
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items()]
+        parts.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[_RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    timings = _current.get()
+    STAGE_DURATION.observe(seconds, timings.route if timings else "background", name)
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a block as one stage of the current request (works in sync and async code)."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - started)
+
+
+def record_upstream(upstream: str, status: str, seconds: float) -> None:
+    UPSTREAM_DURATION.observe(seconds, upstream, status)
+    timings = _current.get()
+    if timings is not None:
+        timings.add(upstream, seconds)
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in _REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no per-request task or body buffering, so streaming is unaffected):
+    times each HTTP request and adds the Server-Timing header when the response starts.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = _RequestTimings(scope)
+        token = _current.set(timings)
+        started = time.perf_counter()
+        responded = False
+
+        async def send_with_timing(message):
+            nonlocal responded
+            if message["type"] == "http.response.start":
+                responded = True
+                elapsed = time.perf_counter() - started
+                REQUEST_DURATION.observe(elapsed, scope["method"], timings.route, str(message["status"]))
+                if settings.SERVER_TIMING_ENABLED:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"server-timing", timings.server_timing(elapsed).encode("latin-1"))
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if not responded:
+                # Unhandled error before any response; the server will answer 500
+                REQUEST_DURATION.observe(time.perf_counter() - started, scope["method"], timings.route, "500")
+            _current.reset(token)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record every statement's execution time (use engine.sync_engine for an AsyncEngine)."""
+
+    # The start time lives on the statement's execution context, not the pooled connection:
+    # after_cursor_execute doesn't fire for a statement that raises, and the context (unlike the
+    # connection) is discarded with it
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._medesense_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "_medesense_started", None)
+        if started is None:
+            return
+        seconds = time.perf_counter() - started
+        DB_DURATION.observe(seconds, statement.lstrip().split(None, 1)[0].upper())
+        timings = _current.get()
+        if timings is not None:
+            timings.add("db", seconds)
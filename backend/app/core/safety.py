@@ -1,15 +1,212 @@
 # // app/core/safety.py
+"""
+Safety gate run before any LLM call.
+
+Vocabulary lives in term-list files (one category per file, see app/core/safety_terms/) rather
+than in code. All lists are compiled into one trie-shaped regex, and a whole conversation is
+scanned in a single pass over its messages joined together. The files are re-read automatically
+when they change (checked at most every SAFETY_RELOAD_SECONDS), so the vocabulary can be updated
+without a redeploy.
+
+A request is gated on its latest user message and on every system message, every time. Earlier
+user turns are not: each was gated when it was the latest, and clients resend the whole history
+(including turns that were blocked), so enforcing them would block the rest of the conversation.
+Verdicts are cached per (conversation scope, message text) so a resent system prompt isn't
+re-scanned; the cache only saves work and never changes the answer.
+"""
+import hashlib
+import logging
 import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.text_patterns import trie_regex
+
+logger = logging.getLogger(__name__)
+
+_DEFAULT_TERMS_DIR = Path(__file__).parent / "safety_terms"
+
+# Checked in this order; a message matching several categories gets the first one's reply
+_PRIORITY = ["crisis", "medical"]
+
+_REPLIES = {
+    "crisis": ("It sounds like you might be in crisis. "
+               "I can’t help with that here. If you’re in immediate danger, call local emergency services. "
+               "You can also contact your regional crisis hotline."),
+    "medical": ("I can’t provide medical advice. Please consult a qualified clinician. "
+                "If this is urgent, seek emergency care."),
+}
+_DEFAULT_REPLY = "I can’t help with that request."
+
+# Blanks inside terms also match hyphens or no gap, so "self harm" covers "self-harm" and "selfharm"
+_SPACE = r"[\s\-]?"
+
+# Joins messages for the single-pass scan; \b can't match across it, so terms never straddle messages
+_SEPARATOR = "\n\x00\n"
+
+
+class SafetyScanner:
+    def __init__(self, terms_dir: Path, reload_seconds: float, cache_size: int):
+        self.terms_dir = terms_dir
+        self.reload_seconds = reload_seconds
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._pattern: Optional[re.Pattern] = None
+        self._categories: Dict[str, str] = {}
+        self._signature: Tuple = ()
+        self._checked_at = 0.0
+        self._verdicts: "OrderedDict[Tuple[str, str], Optional[str]]" = OrderedDict()
+        self.reloads = 0
+        self.load()
+
+    # --- term lists ------------------------------------------------------------------------
+
+    def _files(self) -> List[Path]:
+        return sorted(self.terms_dir.glob("*.txt"))
+
+    def _current_signature(self) -> Tuple:
+        return tuple((f.name, f.stat().st_mtime_ns, f.stat().st_size) for f in self._files())
+
+    def load(self) -> None:
+        """(Re)build the matcher from the term files; keeps the previous one if that fails."""
+        try:
+            signature = self._current_signature()
+            lists: Dict[str, List[str]] = {}
+            for path in self._files():
+                terms = [
+                    line.strip().lower()
+                    for line in path.read_text(encoding="utf-8").splitlines()
+                    if line.strip() and not line.strip().startswith("#")
+                ]
+                if terms:
+                    lists[path.stem] = terms
+            ordered = [c for c in _PRIORITY if c in lists] + sorted(c for c in lists if c not in _PRIORITY)
+
+            groups, categories = [], {}
+            for i, category in enumerate(ordered):
+                group = f"c{i}"
+                groups.append(f"(?P<{group}>{trie_regex(lists[category], space=_SPACE)})")
+                categories[group] = category
+            # (?<!\w) rather than \b up front lets the scanner skip mid-word positions cheaply
+            pattern = re.compile(r"(?<!\w)(?:" + "|".join(groups) + r")\b", re.IGNORECASE) if groups else None
+        except Exception as e:
+            logger.error(f"Failed to load safety term lists from {self.terms_dir}: {e}")
+            return
+
+        with self._lock:
+            self._pattern = pattern
+            self._categories = categories
+            self._signature = signature
+            self._verdicts.clear()  # verdicts depend on the vocabulary
+            self.reloads += 1
+        logger.info(f"Loaded safety term lists: {', '.join(f'{c} ({len(t)})' for c, t in lists.items())}")
+
+    def maybe_reload(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.reload_seconds:
+            return
+        self._checked_at = now
+        try:
+            changed = self._current_signature() != self._signature
+        except OSError:
+            return
+        if changed:
+            self.load()
+
+    # --- scanning ---------------------------------------------------------------------------
+
+    def scan(self, texts: Sequence[str]) -> List[Optional[str]]:
+        """Return the flagged category (or None) for each text, in one pass over all of them."""
+        verdicts: List[Optional[str]] = [None] * len(texts)
+        pattern, categories = self._pattern, self._categories
+        if pattern is None or not texts:
+            return verdicts
+
+        # Offsets of each message in the joined string, to map matches back to messages
+        starts, pos = [], 0
+        for text in texts:
+            starts.append(pos)
+            pos += len(text) + len(_SEPARATOR)
+
+        index = 0
+        for m in pattern.finditer(_SEPARATOR.join(texts)):
+            while index + 1 < len(starts) and starts[index + 1] <= m.start():
+                index += 1
+            category = categories[m.lastgroup]
+            current = verdicts[index]
+            if current is None or _rank(category) < _rank(current):
+                verdicts[index] = category
+        return verdicts
+
+    def check(self, messages: Sequence[Tuple[str, str]], scope: str = "") -> Tuple[bool, str]:
+        """
+        Gate a conversation given as (role, content) pairs: the latest user message and all system
+        messages are enforced (assistant turns are our own output, earlier user turns were gated
+        when they were sent); see the module docstring.
+        """
+        self.maybe_reload()
+
+        last_user = max((i for i, (role, _) in enumerate(messages) if role == "user"), default=None)
+        enforced = [content for i, (role, content) in enumerate(messages) if role == "system" or i == last_user]
+
+        flagged: Optional[str] = None
+        unseen: List[Tuple[str, Tuple[str, str]]] = []
+        for content in enforced:
+            key = (scope, hashlib.sha1(content.encode("utf-8")).hexdigest())
+            with self._lock:
+                cached = key in self._verdicts
+                verdict = self._verdicts.get(key)
+                if cached:
+                    self._verdicts.move_to_end(key)
+            if not cached:
+                unseen.append((content, key))
+            elif verdict is not None:
+                flagged = _pick(flagged, verdict)
+
+        if unseen:
+            verdicts = self.scan([content for content, _ in unseen])
+            with self._lock:
+                for (_, key), verdict in zip(unseen, verdicts):
+                    self._verdicts[key] = verdict
+                while len(self._verdicts) > self.cache_size:
+                    self._verdicts.popitem(last=False)
+            for verdict in verdicts:
+                if verdict is not None:
+                    flagged = _pick(flagged, verdict)
+
+        if flagged is None:
+            return True, ""
+        return False, _REPLIES.get(flagged, _DEFAULT_REPLY)
+
+
+def _rank(category: str) -> int:
+    return _PRIORITY.index(category) if category in _PRIORITY else len(_PRIORITY)
+
+
+def _pick(current: Optional[str], new: str) -> str:
+    return new if current is None or _rank(new) < _rank(current) else current
+
+
+scanner = SafetyScanner(
+    terms_dir=Path(settings.SAFETY_TERMS_DIR) if settings.SAFETY_TERMS_DIR else _DEFAULT_TERMS_DIR,
+    reload_seconds=settings.SAFETY_RELOAD_SECONDS,
+    cache_size=settings.SAFETY_VERDICT_CACHE_SIZE,
+)
 
-_MEDICAL = re.compile(r"\b(diagnos(e|is)|prescrib(e|ption)|dose|treat(ment)?|symptom|side effect|medicine|drug interaction)\b", re.I)
-_CRISIS  = re.compile(r"\b(kill myself|suicid(e|al)|self[- ]?harm|overdose|hurt myself|end my life)\b", re.I)
 
 def check_safety(user_text: str) -> tuple[bool, str]:
-    if _CRISIS.search(user_text):
-        return False, ("It sounds like you might be in crisis. "
-                       "I can’t help with that here. If you’re in immediate danger, call local emergency services. "
-                       "You can also contact your regional crisis hotline.")
-    if _MEDICAL.search(user_text):
-        return False, ("I can’t provide medical advice. Please consult a qualified clinician. "
-                       "If this is urgent, seek emergency care.")
-    return True, ""
+    """Gate a single piece of user text (no verdict caching)."""
+    scanner.maybe_reload()
+    verdict = scanner.scan([user_text])[0]
+    if verdict is None:
+        return True, ""
+    return False, _REPLIES.get(verdict, _DEFAULT_REPLY)
+
+
+def check_conversation(messages: Sequence[Tuple[str, str]], scope: str = "") -> tuple[bool, str]:
+    """Gate a request's latest user message and its system messages; `scope` isolates the verdict cache."""
+    return scanner.check(messages, scope)
@@ -1,12 +1,30 @@
 # app/core/security.py
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
 
 import jwt
-from passlib.context import CryptContext
+from app.core.bounded_executor import BoundedExecutor
 from app.core.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+
+@lru_cache(maxsize=1)
+def pwd_context() -> "CryptContext":
+    # passlib/bcrypt load on the first hash or verify rather than at import (cold starts)
+    from passlib.context import CryptContext
+
+    # min == max == default so any stored hash with a different cost is flagged for rehash on login
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=settings.BCRYPT_WORK_FACTOR,
+        bcrypt__min_rounds=settings.BCRYPT_WORK_FACTOR,
+        bcrypt__max_rounds=settings.BCRYPT_WORK_FACTOR,
+    )
 import jwt
 from app.core.config import settings
 
@@ -14,13 +32,78 @@ def decode_access_token(token: str) -> dict:
     # HS256 must match your create_access_token() encoder
     return jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
 
 def create_access_token(data: Dict[str, Any], expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
     expire = datetime.now(tz=timezone.utc) + (expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire, "iat": datetime.now(tz=timezone.utc)})
     return jwt.encode(to_encode, settings.SECRET_KEY, algorithm="HS256")
+
+
+# --- Off-loop password hashing -------------------------------------------------------------
+# bcrypt releases the GIL, so a small thread pool keeps hundreds of ms of CPU per call off the
+# event loop. Callers beyond PASSWORD_HASH_MAX_PENDING are rejected immediately instead of queueing.
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool already has PASSWORD_HASH_MAX_PENDING calls queued or running."""
+
+
+class _HashMetrics:
+    def __init__(self):
+        self.calls = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.seconds_total = 0.0
+        self.seconds_max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.calls += 1
+        self.seconds_total += seconds
+        if seconds > self.seconds_max:
+            self.seconds_max = seconds
+
+
+hash_metrics = _HashMetrics()
+_hash_pool = BoundedExecutor(workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="pwhash")
+
+
+async def _run_in_hash_pool(fn: Callable[..., Any], *args: Any) -> Any:
+    future = _hash_pool.submit(settings.PASSWORD_HASH_MAX_PENDING, fn, *args)
+    if future is None:
+        hash_metrics.rejected += 1
+        raise PasswordHasherBusy()
+    started = time.perf_counter()
+    try:
+        return await future
+    finally:
+        hash_metrics.observe(time.perf_counter() - started)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify off-loop; returns (ok, new_hash) where new_hash is set if BCRYPT_WORK_FACTOR changed."""
+    ok, new_hash = await _run_in_hash_pool(pwd_context().verify_and_update, plain_password, hashed_password)
+    if new_hash:
+        hash_metrics.rehashed += 1
+    return ok, new_hash
+
+
+def password_hashing_stats() -> Dict[str, Any]:
+    calls = hash_metrics.calls
+    return {
+        "workers": settings.PASSWORD_HASH_WORKERS,
+        "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+        "pending": _hash_pool.pending,
+        "calls": calls,
+        "rejected": hash_metrics.rejected,
+        "rehashed": hash_metrics.rehashed,
+        "latency_ms_avg": round(hash_metrics.seconds_total / calls * 1000, 3) if calls else 0.0,
+        "latency_ms_max": round(hash_metrics.seconds_max * 1000, 3),
+    }
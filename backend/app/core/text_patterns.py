@@ -0,0 +1,35 @@
+# app/core/text_patterns.py
+"""Helpers for compiling large term lists into fast regexes."""
+import re
+from typing import Dict, Iterable
+
+
+def trie_regex(terms: Iterable[str], space: str = " ") -> str:
+    """
+    Compile terms into a prefix-shared alternation, e.g. {Ann, Anna, Anne, Bob} -> (?:Ann(?:a|e)?|Bob).
+
+    The regex engine then walks the trie instead of trying every term at each position, so cost
+    stays flat as term lists grow. `space` is substituted for blanks inside terms (e.g. r"[\\s\\-]?"
+    so "self harm" also matches "self-harm").
+    """
+    trie: Dict[str, dict] = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def atom(ch: str) -> str:
+        return space if ch == " " else re.escape(ch)
+
+    def build(node: Dict[str, dict]) -> str:
+        optional = "" in node
+        branches = [atom(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if optional:
+            return ("(?:" + body + ")?") if len(branches) == 1 else body + "?"
+        return body
+
+    return build(trie)
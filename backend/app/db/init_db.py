@@ -6,6 +6,9 @@ from app.db.base import Base
 
 # Import models so they register with Base.metadata
 import app.models.user  # noqa: F401
+import app.models.ingestion_job  # noqa: F401
+import app.models.document  # noqa: F401
+import app.models.conversation  # noqa: F401
 
 
 async def init_db() -> None:
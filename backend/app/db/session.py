@@ -1,9 +1,73 @@
 # app/db/session.py
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+
+_url = make_url(settings.DATABASE_URL)
+_is_sqlite = _url.get_backend_name() == "sqlite"
+# In-memory SQLite lives in a single connection (StaticPool), so pool settings don't apply
+_is_sqlite_memory = _is_sqlite and (_url.database in (None, "", ":memory:") or _url.query.get("mode") == "memory")
+
+
+def _engine_options() -> Dict[str, Any]:
+    options: Dict[str, Any] = {"echo": False, "future": True}
+    if _is_sqlite_memory:
+        return options
+    if _is_sqlite:
+        # The aiosqlite default is NullPool (a new connection and thread per session); pool them instead
+        options["poolclass"] = AsyncAdaptedQueuePool
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+    return options
+
+
+def _sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL lets readers run alongside the single writer; NORMAL sync is durable across app crashes in WAL mode
+    cursor = dbapi_connection.cursor()
+    if not _is_sqlite_memory:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.close()
+
+
+_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[async_sessionmaker] = None
+
+
+def get_engine() -> AsyncEngine:
+    """
+    The async engine from env (SQLite by default; can be Postgres), created on first use so that
+    importing the app doesn't load the DB driver or build the pool (serverless cold starts).
+    """
+    global _engine, _session_factory
+    if _engine is None:
+        _engine = create_async_engine(settings.DATABASE_URL, **_engine_options())
+        instrument_engine(_engine.sync_engine)  # per-statement timings for /metrics and Server-Timing
+        if _is_sqlite:
+            event.listen(_engine.sync_engine, "connect", _sqlite_pragmas)
+        _session_factory = async_sessionmaker(_engine, expire_on_commit=False, class_=AsyncSession)
+    return _engine
+
+
+def async_session(**kwargs: Any) -> AsyncSession:
+    """A new AsyncSession on the shared engine (used as `async with async_session() as db`)."""
+    get_engine()
+    return _session_factory(**kwargs)
 
-# Create the async engine from env (SQLite by default; can be Postgres)
-engine = create_async_engine(settings.DATABASE_URL, echo=False, future=True)
 
-# Factory that yields AsyncSession objects (used by get_session dependency)
-async_session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+def __getattr__(name: str) -> Any:
+    # `from app.db.session import engine` keeps working; the engine is built when first imported that way
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,27 @@
+# app/lambda_handler.py
+"""
+AWS Lambda entry point (API Gateway / function URL events via Mangum).
+
+Handler setting: `app.lambda_handler.handler`.
+
+Cold starts pay only for importing the app: the OpenAI SDK, passlib/bcrypt, the database driver and
+engine, httpx and the upstream HTTP pools are all created on first use and then kept in module
+globals, so warm invocations of the same execution environment reuse them (and their open
+connections).
+
+The ASGI lifespan is off: Mangum would run startup and shutdown around every invocation, closing
+the pools each time. As a consequence the background ingestion worker doesn't run here, so the
+queued upload endpoints (/api/documents/jobs) are unavailable; the synchronous upload routes work.
+Only /tmp is writable on Lambda, so the completion cache file defaults to it. The local document
+index defaults to off: a per-execution-environment copy would only hold a fraction of each user's
+documents, so retrieval goes to Supermemory unless LOCAL_INDEX_PATH points at shared storage.
+"""
+import os
+
+os.environ.setdefault("COMPLETION_CACHE_PATH", "/tmp/completion_cache.db")
+os.environ.setdefault("LOCAL_INDEX_PATH", "")
+
+from mangum import Mangum  # noqa: E402
+from app.main import app  # noqa: E402
+
+handler = Mangum(app, lifespan="off")
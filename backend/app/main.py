@@ -1,8 +1,41 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from app.api.router import api_router
+from app.core.body_limit import BodyLimitMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, render_metrics
+from app.core.responses import FastJSONResponse
+from app.services.completion_cache import completion_cache
+from app.services.conversation_store import conversation_store
+from app.services.http_clients import http_clients
+from app.services.local_index import local_index
+from app.services.ingestion_worker import ingestion_worker
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open (and warm) the shared upstream HTTP pools once per process
+    await http_clients.start()
+    await ingestion_worker.start()
+    try:
+        yield
+    finally:
+        await ingestion_worker.stop()
+        await conversation_store.aclose()
+        await http_clients.aclose()
+        completion_cache.close()
+        local_index.close()
+
 
-app = FastAPI(title="MedeSense API", version="0.1.0")
+app = FastAPI(title="MedeSense API", version="0.1.0", lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# Multipart uploads over UPLOAD_MAX_BYTES get 413 before they are spooled (innermost, so CORS and
+# the timings still apply to the rejection)
+app.add_middleware(BodyLimitMiddleware)
 
 # CORS configuration for frontend temp for dev deploy 
 app.add_middleware(
@@ -13,10 +46,23 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Brotli/gzip for large JSON bodies (inside the timings, so compression time is counted)
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Per-endpoint/per-stage timings (outermost, so it sees the full request)
+if settings.METRICS_ENABLED or settings.SERVER_TIMING_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 # Include all API routes from router.py
 app.include_router(api_router)
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        """Prometheus scrape endpoint (latency histograms per endpoint, stage, upstream and DB statement)."""
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health")
 async def health():
     return {"status": "ok"}
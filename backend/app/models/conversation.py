@@ -0,0 +1,38 @@
+# app/models/conversation.py
+from datetime import datetime, timezone
+from sqlalchemy import ForeignKey, Integer, String, Text, TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class Conversation(Base):
+    """
+    Server-side chat history; see app.services.conversation_store.
+
+    Recent messages are kept verbatim in conversation_messages. Older ones are folded into
+    `summary` by compaction and deleted; `compacted_messages` counts how many that was.
+    """
+    __tablename__ = "conversations"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    summary: Mapped[str | None] = mapped_column(Text, nullable=True)
+    compacted_messages: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=_now, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=_now, onupdate=_now, nullable=False)
+
+
+class ConversationMessage(Base):
+    __tablename__ = "conversation_messages"
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)  # also the message order
+    conversation_id: Mapped[str] = mapped_column(
+        ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    role: Mapped[str] = mapped_column(String(16), nullable=False)
+    content: Mapped[str] = mapped_column(Text, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=_now, nullable=False)
@@ -0,0 +1,33 @@
+# app/models/document.py
+from datetime import datetime, timezone
+from sqlalchemy import Boolean, ForeignKey, String, Text, TIMESTAMP, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+DOC_PROCESSING = "processing"
+DOC_COMPLETED = "completed"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class Document(Base):
+    """
+    One processed upload per (user, content hash); see app.services.document_dedup.
+
+    Only the hash and the Lambda's outcome are stored, never the document itself.
+    """
+    __tablename__ = "documents"
+    __table_args__ = (UniqueConstraint("user_id", "content_hash", name="uq_documents_user_hash"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)  # SHA-256 hex
+    kind: Mapped[str] = mapped_column(String(16), nullable=False)  # text | image
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default=DOC_PROCESSING)
+    supermemory_document_id: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    message: Mapped[str | None] = mapped_column(Text, nullable=True)
+    de_identified_text_uploaded: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=_now, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=_now, onupdate=_now, nullable=False)
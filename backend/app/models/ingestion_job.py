@@ -0,0 +1,39 @@
+# app/models/ingestion_job.py
+from datetime import datetime, timezone
+from sqlalchemy import ForeignKey, Integer, String, Text, TIMESTAMP
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.base import Base
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class IngestionJob(Base):
+    """
+    A document upload processed in the background by app.services.ingestion_worker.
+
+    The document itself (text_to_process / image_base64) is only kept while the job can still
+    run, so it survives a restart; it is cleared as soon as the job succeeds or fails for good.
+    """
+    __tablename__ = "ingestion_jobs"
+
+    id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    supermemory_user_id: Mapped[str] = mapped_column(String(255), nullable=False)
+    status: Mapped[str] = mapped_column(String(16), nullable=False, default=JOB_QUEUED, index=True)
+    text_to_process: Mapped[str | None] = mapped_column(Text, nullable=True)
+    image_base64: Mapped[str | None] = mapped_column(Text, nullable=True)
+    deidentify: Mapped[str | None] = mapped_column(String(16), nullable=True)  # "lambda" | "local" | None (PHI_TEXT_MODE)
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=3)
+    next_attempt_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    result: Mapped[str | None] = mapped_column(Text, nullable=True)  # JSON-encoded Lambda response
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=_now, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=_now, onupdate=_now, nullable=False)
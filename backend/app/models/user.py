@@ -1,7 +1,8 @@
 # app/models/user.py
 from datetime import datetime, timezone
-from sqlalchemy import String, UniqueConstraint, TIMESTAMP
+from sqlalchemy import String, UniqueConstraint, TIMESTAMP, event, inspect
 from sqlalchemy.orm import Mapped, mapped_column
+from app.core.identity import invalidate_identity
 from app.db.base import Base
 
 class User(Base):
@@ -14,3 +15,16 @@ class User(Base):
     display_name: Mapped[str | None] = mapped_column(String(100), nullable=True)
     supermemory_user_id: Mapped[str] = mapped_column(String(255), nullable=False, index=True)
     created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
+
+
+# Keep get_current_user's token/cache fast path honest when identities change.
+# (Bulk UPDATE/DELETE statements bypass ORM events; call invalidate_identity() directly there.)
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target: User) -> None:
+    if inspect(target).attrs.supermemory_user_id.history.has_changes():
+        invalidate_identity(target.id)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target: User) -> None:
+    invalidate_identity(target.id)
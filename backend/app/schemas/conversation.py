@@ -0,0 +1,17 @@
+# app/schemas/conversation.py
+from pydantic import BaseModel
+from datetime import datetime
+from typing import List
+
+class ConversationMessageOut(BaseModel):
+    role: str
+    content: str
+    created_at: datetime
+
+class ConversationResponse(BaseModel):
+    conversation_id: str
+    summary: str | None = None  # older turns, folded by compaction
+    compacted_messages: int  # how many messages the summary replaced
+    messages: List[ConversationMessageOut]  # recent turns, verbatim
+    created_at: datetime
+    updated_at: datetime
@@ -1,10 +1,15 @@
 # app/schemas/document.py
 from pydantic import BaseModel, Field, model_validator
-from typing import Optional
+from app.core.config import settings
+from datetime import datetime
+from typing import List, Literal, Optional
 
 class DocumentUploadRequest(BaseModel):
     text: Optional[str] = Field(None, description="Raw document text to process")
     image_base64: Optional[str] = Field(None, description="Base64 encoded image for OCR processing")
+    deidentify: Optional[Literal["lambda", "local"]] = Field(
+        None, description="Where to strip PHI from text uploads (defaults to PHI_TEXT_MODE); images always use the Lambda"
+    )
 
     @model_validator(mode='after')
     def check_text_or_image(self):
@@ -19,3 +24,26 @@ class DocumentUploadResponse(BaseModel):
     de_identified_text_uploaded: bool
     supermemory_document_id: str | None = None
     details: dict | None = None
+
+class IngestionJobResponse(BaseModel):
+    job_id: str
+    status: str  # queued | running | succeeded | failed
+    attempts: int
+    created_at: datetime
+    updated_at: datetime
+    error: str | None = None
+    result: DocumentUploadResponse | None = None
+
+class DocumentBatchUploadRequest(BaseModel):
+    documents: List[DocumentUploadRequest] = Field(..., min_length=1, max_length=settings.DOCUMENT_BATCH_MAX_ITEMS)
+
+class DocumentBatchItemResult(BaseModel):
+    index: int  # position in the request's `documents` list
+    ok: bool
+    result: DocumentUploadResponse | None = None
+    error: str | None = None
+
+class DocumentBatchUploadResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[DocumentBatchItemResult]
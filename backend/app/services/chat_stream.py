@@ -0,0 +1,96 @@
+# app/services/chat_stream.py
+"""
+Server-Sent-Events relay for streamed chat completions.
+
+Event sequence:
+    event: token           data: {"content": "..."}        (one per upstream delta)
+    event: memory_enabled  data: {"memory_enabled": true}
+    event: usage           data: {"prompt_tokens": ..., ...}
+    event: done            data: {"model": "...", "conversation_id": ...}
+An upstream failure mid-stream is reported as `event: error` and ends the stream.
+"""
+import json
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+logger = logging.getLogger(__name__)
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _relay(
+    request: Request,
+    stream: Any,
+    memory_enabled: bool,
+    conversation_id: Optional[str],
+    on_complete: Optional[Callable[[str], Awaitable[None]]],
+    on_close: Optional[Callable[[], Awaitable[None]]],
+) -> AsyncIterator[str]:
+    model = ""
+    usage: Dict[str, Any] = {}
+    parts: List[str] = []
+    try:
+        async for chunk in stream:
+            # Stop paying for tokens nobody will read
+            if await request.is_disconnected():
+                logger.info("Client disconnected, cancelling upstream completion")
+                return
+            model = chunk.model or model
+            if chunk.usage:
+                usage = {
+                    "prompt_tokens": chunk.usage.prompt_tokens,
+                    "completion_tokens": chunk.usage.completion_tokens,
+                    "total_tokens": chunk.usage.total_tokens,
+                }
+            if chunk.choices and chunk.choices[0].delta.content:
+                parts.append(chunk.choices[0].delta.content)
+                yield sse_event("token", {"content": chunk.choices[0].delta.content})
+    except Exception as e:
+        logger.error(f"Streaming chat error: {str(e)}")
+        yield sse_event("error", {"detail": f"Chat error: {str(e)}"})
+        return
+    finally:
+        # Closing the upstream response aborts generation if we exited early
+        # (disconnect, error, or cancellation of this generator by the server)
+        await stream.close()
+        if on_close is not None:
+            await on_close()
+
+    if on_complete is not None:
+        try:
+            await on_complete("".join(parts))
+        except Exception as e:
+            logger.error(f"Failed to record streamed reply: {str(e)}")
+
+    yield sse_event("memory_enabled", {"memory_enabled": memory_enabled})
+    yield sse_event("usage", usage)
+    yield sse_event("done", {"model": model, "conversation_id": conversation_id})
+
+
+def stream_chat_response(
+    request: Request,
+    stream: Any,
+    memory_enabled: bool = False,
+    conversation_id: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+    on_complete: Optional[Callable[[str], Awaitable[None]]] = None,
+    on_close: Optional[Callable[[], Awaitable[None]]] = None,
+) -> StreamingResponse:
+    """
+    Wrap an OpenAI AsyncStream of chat chunks as a text/event-stream response.
+    `on_complete` receives the full reply text once the stream finished without error.
+    `on_close` runs once the upstream stream is closed, however the relay ended (it must be
+    idempotent: it also runs after the response, in case the relay never started).
+    """
+    return StreamingResponse(
+        _relay(request, stream, memory_enabled, conversation_id, on_complete, on_close),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **(headers or {})},
+        background=BackgroundTask(on_close) if on_close is not None else None,
+    )
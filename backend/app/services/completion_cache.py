@@ -0,0 +1,181 @@
+# app/services/completion_cache.py
+"""
+Exact-match cache of /api/chat completions.
+
+FAQ-style traffic repeats byte-identical requests; each repeat can be answered from here instead
+of a full OpenAI call. The key is SHA-256 over (user scope, model, max_tokens, final message list
+with the injected document context), so a different retrieved context or model is a different
+entry, and one user's answers are never served to another.
+
+Entries live in a local SQLite file (COMPLETION_CACHE_PATH) so they survive restarts, separate from
+the application database. Reads and writes run in a worker thread. Entries expire after
+COMPLETION_CACHE_TTL_SECONDS; beyond COMPLETION_CACHE_MAX_ENTRIES the least recently used go.
+
+Clients skip the cache per request with `Cache-Control: no-cache` (don't read, still refresh the
+entry) or `no-store` (neither read nor write).
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_HIT = "hit"
+CACHE_MISS = "miss"
+CACHE_BYPASS = "bypass"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS completions (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_completions_last_used ON completions (last_used_at);
+"""
+
+
+class CompletionCache:
+    def __init__(self, path: str, max_entries: int, ttl_seconds: float):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._count = 0
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.stores = 0
+        self.evictions = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path) and self.max_entries > 0 and self.ttl_seconds > 0
+
+    @staticmethod
+    def key(scope: str, model: str, max_tokens: Optional[int], messages: List[Dict[str, str]]) -> str:
+        material = json.dumps([scope, model, max_tokens, messages], ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Called with the lock held
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._count = conn.execute("SELECT COUNT(*) FROM completions").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def _get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value FROM completions WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl_seconds),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE completions SET last_used_at = ? WHERE key = ?", (now, key))
+        return json.loads(row[0])
+
+    def _set(self, key: str, value: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            exists = conn.execute("SELECT 1 FROM completions WHERE key = ?", (key,)).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO completions (key, value, created_at, last_used_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now, now),
+            )
+            if not exists:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        # Expired rows first, then least recently used down to 90% of the bound so this doesn't run on every write
+        self._count -= conn.execute("DELETE FROM completions WHERE created_at <= ?", (now - self.ttl_seconds,)).rowcount
+        excess = self._count - int(self.max_entries * 0.9)
+        if excess > 0:
+            evicted = conn.execute(
+                "DELETE FROM completions WHERE key IN "
+                "(SELECT key FROM completions ORDER BY last_used_at LIMIT ?)",
+                (excess,),
+            ).rowcount
+            self._count -= evicted
+            self.evictions += evicted
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = await asyncio.to_thread(self._get, key)
+        except Exception as e:
+            # A broken cache must never fail the chat request
+            self.errors += 1
+            logger.warning(f"Completion cache read failed: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        try:
+            await asyncio.to_thread(self._set, key, value)
+            self.stores += 1
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Completion cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "entries": self._count,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypasses": self.bypasses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "errors": self.errors,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def cache_directives(cache_control: Optional[str]) -> tuple[bool, bool]:
+    """(may read, may write) for a request's Cache-Control header."""
+    directives = {d.strip().lower() for d in (cache_control or "").split(",")}
+    if "no-store" in directives:
+        return False, False
+    if "no-cache" in directives:
+        return False, True
+    return True, True
+
+
+# Singleton instance
+completion_cache = CompletionCache(
+    path=settings.COMPLETION_CACHE_PATH,
+    max_entries=settings.COMPLETION_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.COMPLETION_CACHE_TTL_SECONDS,
+)
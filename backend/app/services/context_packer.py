@@ -0,0 +1,170 @@
+# app/services/context_packer.py
+"""
+Assembles retrieved Supermemory results into the document-context system message for /api/chat.
+
+Search results often repeat the same fact in slightly different words, and single memories can be
+long. Sending them all verbatim inflates prompt tokens (latency and cost) without helping the
+answer. The packer:
+  1. drops exact and near-duplicate memories (word-shingle overlap), keeping the higher-scored one
+  2. ranks what is left by search score
+  3. fills a per-model token budget, cutting snippets that don't fit at a sentence boundary
+
+Token counts come from an offline estimate (no tokenizer download or API call) modelled on how BPE
+tokenizers split words, numbers and punctuation. It is meant for budgeting, not billing.
+"""
+import logging
+import math
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pydantic import BaseModel
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_HEADER = "**Relevant medical information from your uploaded documents:**\n\n"
+CONTEXT_FOOTER = "\n\nUse the above information to answer the user's question accurately."
+
+_PIECE = re.compile(r"[A-Za-z]+|\d+|[^\sA-Za-z\d]")
+_WORD = re.compile(r"\w+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Shingle overlap above which two memories count as the same fact
+_NEAR_DUPLICATE = 0.8
+# A cut-down snippet shorter than this isn't worth including
+_MIN_SNIPPET_TOKENS = 16
+
+
+class ContextStats(BaseModel):
+    retrieved: int
+    included: int
+    duplicates: int
+    truncated: int
+    budget_tokens: int
+    retrieved_tokens: int
+    context_tokens: int
+    tokens_saved: int
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate BPE token count: words split into ~4-letter pieces, digits in ~3s, 1 per symbol."""
+    tokens = 0
+    for piece in _PIECE.findall(text):
+        first = piece[0]
+        if first.isalpha():
+            tokens += math.ceil(len(piece) / 4) if len(piece) > 4 else 1
+        elif first.isdigit():
+            tokens += math.ceil(len(piece) / 3)
+        else:
+            tokens += 1
+    return tokens
+
+
+def budget_for(model: str) -> int:
+    """CONTEXT_TOKEN_BUDGETS entry for the model (prefix match, longest wins), else the default."""
+    best, best_len = settings.CONTEXT_TOKEN_BUDGET, -1
+    for entry in settings.CONTEXT_TOKEN_BUDGETS.split(","):
+        name, sep, value = entry.partition("=")
+        name = name.strip()
+        if sep and name and model.startswith(name) and len(name) > best_len:
+            best, best_len = int(value), len(name)
+    return best
+
+
+def _score(result: Dict[str, Any]) -> float:
+    for field in ("similarity", "score"):
+        value = result.get(field)
+        if isinstance(value, (int, float)):
+            return float(value)
+    return 0.0
+
+
+def _shingles(text: str) -> Set[Tuple[str, ...]]:
+    words = _WORD.findall(text.lower())
+    if len(words) < 3:
+        return {tuple(words)}
+    return {tuple(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+def _is_near_duplicate(a: Set[Tuple[str, ...]], b: Set[Tuple[str, ...]]) -> bool:
+    # Overlap relative to the smaller set, so a memory contained in a longer one also counts
+    smaller = min(len(a), len(b))
+    return smaller > 0 and len(a & b) / smaller >= _NEAR_DUPLICATE
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> Optional[str]:
+    """Longest run of whole sentences from the start that fits; None if not even one does."""
+    kept, used = [], 0
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        cost = estimate_tokens(sentence) + (1 if kept else 0)
+        if used + cost > max_tokens:
+            break
+        kept.append(sentence)
+        used += cost
+    return " ".join(kept) if kept else None
+
+
+def pack_context(results: List[Dict[str, Any]], model: str) -> Tuple[Optional[str], ContextStats]:
+    """
+    Build the context system-message text from search results.
+    Returns (None, stats) when nothing usable was retrieved.
+    """
+    budget = budget_for(model)
+    snippet_cap = settings.CONTEXT_MAX_SNIPPET_TOKENS or budget
+
+    # v4 search returns the text in 'memory', not 'content'
+    memories = [(r.get("memory") or "").strip() for r in results]
+    retrieved_tokens = sum(estimate_tokens(m) for m in memories if m)
+    candidates = sorted(
+        ((_score(r), m) for r, m in zip(results, memories) if m),
+        key=lambda item: item[0],
+        reverse=True,
+    )
+
+    kept: List[Tuple[str, Set[Tuple[str, ...]]]] = []
+    duplicates = 0
+    for _, memory in candidates:
+        shingles = _shingles(memory)
+        if any(_is_near_duplicate(shingles, other) for _, other in kept):
+            duplicates += 1
+            continue
+        kept.append((memory, shingles))
+
+    remaining = budget - estimate_tokens(CONTEXT_HEADER) - estimate_tokens(CONTEXT_FOOTER)
+    lines: List[str] = []
+    truncated = 0
+    for memory, _ in kept:
+        limit = min(remaining, snippet_cap) - 2  # the "- " bullet and newline
+        if limit < _MIN_SNIPPET_TOKENS:
+            break
+        snippet = memory
+        if estimate_tokens(memory) > limit:
+            snippet = truncate_to_tokens(memory, limit)
+            if snippet is None:
+                continue
+            truncated += 1
+        lines.append(f"- {snippet}\n")
+        remaining -= estimate_tokens(snippet) + 2
+
+    text = CONTEXT_HEADER + "".join(lines) + CONTEXT_FOOTER if lines else None
+    context_tokens = estimate_tokens(text) if text else 0
+    # Measured against what the old code sent: every memory verbatim under the same header/footer
+    unpacked_tokens = (
+        estimate_tokens(CONTEXT_HEADER + "".join(f"- {m}\n" for m in memories if m) + CONTEXT_FOOTER)
+        if retrieved_tokens else 0
+    )
+    stats = ContextStats(
+        retrieved=len(results),
+        included=len(lines),
+        duplicates=duplicates,
+        truncated=truncated,
+        budget_tokens=budget,
+        retrieved_tokens=retrieved_tokens,
+        context_tokens=context_tokens,
+        tokens_saved=max(0, unpacked_tokens - context_tokens),
+    )
+    return text, stats
@@ -0,0 +1,202 @@
+# app/services/conversation_store.py
+"""
+Server-side conversation history for the chat endpoints.
+
+A chat request that carries a conversation_id sends only its new messages; the earlier ones are
+loaded from the conversations / conversation_messages tables and prepended here. After a reply the
+new messages and the reply are appended.
+
+Rolling compaction keeps prompts bounded: the last CONVERSATION_KEEP_TURNS turns stay verbatim,
+and once CONVERSATION_COMPACT_TURNS more have piled up on top of that, the older ones are folded
+into a stored summary by one LLM call and deleted. Compaction runs in the background after the
+reply has been sent, so it never adds latency to a chat request; if it fails the messages simply
+stay verbatim until the next attempt.
+"""
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.db.session import async_session
+from app.models.conversation import Conversation, ConversationMessage
+from app.services.llm_client import get_openai_client
+
+logger = logging.getLogger(__name__)
+
+_SUMMARY_INSTRUCTIONS = (
+    "You maintain a running summary of a conversation between a user and a health-information "
+    "assistant. Merge the existing summary and the new messages into one concise summary. Keep what "
+    "the user said about themselves, their documents and results, the questions they asked and the "
+    "answers they were given. Drop greetings and small talk. Reply with the summary only."
+)
+
+
+class ConversationNotFound(Exception):
+    """No conversation with that id belongs to this user."""
+
+
+class ConversationStore:
+    def __init__(self):
+        self._compacting: Set[str] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def create(self, user_id: int, conversation_id: Optional[str] = None) -> Conversation:
+        conversation = Conversation(id=conversation_id or str(uuid.uuid4()), user_id=user_id)
+        async with async_session() as db:
+            db.add(conversation)
+            await db.commit()
+        return conversation
+
+    async def load(
+        self,
+        user_id: int,
+        conversation_id: str,
+        create: bool = False,
+    ) -> Tuple[Conversation, List[ConversationMessage]]:
+        """
+        Return the conversation and its verbatim messages, oldest first.
+        With create=True an unknown id starts a new, empty conversation under that id.
+        """
+        async with async_session() as db:
+            conversation = await db.get(Conversation, conversation_id)
+        if conversation is None and create:
+            try:
+                return await self.create(user_id, conversation_id), []
+            except IntegrityError:
+                # Created concurrently (possibly by another user); re-read to find out whose
+                async with async_session() as db:
+                    conversation = await db.get(Conversation, conversation_id)
+        if conversation is None or conversation.user_id != user_id:
+            raise ConversationNotFound()
+
+        async with async_session() as db:
+            result = await db.execute(
+                select(ConversationMessage)
+                .where(ConversationMessage.conversation_id == conversation_id)
+                .order_by(ConversationMessage.id)
+            )
+            return conversation, list(result.scalars())
+
+    @staticmethod
+    def prompt(conversation: Conversation, history: List[ConversationMessage]) -> List[Dict[str, str]]:
+        """The stored part of the prompt: the summary (if any) followed by the verbatim messages."""
+        messages = []
+        if conversation.summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{conversation.summary}"})
+        messages.extend({"role": m.role, "content": m.content} for m in history)
+        return messages
+
+    async def append(self, conversation_id: str, messages: List[Dict[str, str]], stored_count: int) -> None:
+        """
+        Store the new messages of a turn. `stored_count` is how many verbatim messages the
+        conversation had before them; it decides whether a compaction is due.
+        """
+        async with async_session() as db:
+            db.add_all(
+                ConversationMessage(conversation_id=conversation_id, role=m["role"], content=m["content"])
+                for m in messages
+            )
+            await db.execute(
+                update(Conversation)
+                .where(Conversation.id == conversation_id)
+                .values(updated_at=datetime.now(timezone.utc))
+            )
+            await db.commit()
+
+        threshold = 2 * (settings.CONVERSATION_KEEP_TURNS + settings.CONVERSATION_COMPACT_TURNS)
+        if stored_count + len(messages) > threshold and conversation_id not in self._compacting:
+            task = asyncio.create_task(self.compact(conversation_id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def delete(self, user_id: int, conversation_id: str) -> None:
+        async with async_session() as db:
+            conversation = await db.get(Conversation, conversation_id)
+            if conversation is None or conversation.user_id != user_id:
+                raise ConversationNotFound()
+            # Explicit, since SQLite doesn't enforce ON DELETE CASCADE by default
+            await db.execute(delete(ConversationMessage).where(ConversationMessage.conversation_id == conversation_id))
+            await db.delete(conversation)
+            await db.commit()
+
+    async def compact(self, conversation_id: str) -> None:
+        """Fold everything but the last CONVERSATION_KEEP_TURNS turns into the summary."""
+        if conversation_id in self._compacting:
+            return
+        self._compacting.add(conversation_id)
+        try:
+            async with async_session() as db:
+                conversation = await db.get(Conversation, conversation_id)
+                if conversation is None:
+                    return
+                result = await db.execute(
+                    select(ConversationMessage)
+                    .where(ConversationMessage.conversation_id == conversation_id)
+                    .order_by(ConversationMessage.id)
+                )
+                history = list(result.scalars())
+                summary, compacted = conversation.summary, conversation.compacted_messages
+
+            # Cut on a turn boundary, so the verbatim part starts with a user message
+            cut = len(history) - 2 * settings.CONVERSATION_KEEP_TURNS
+            while cut > 0 and history[cut].role != "user":
+                cut -= 1
+            if cut <= 0:
+                return
+            folded = history[:cut]
+
+            # No DB session is held while waiting on the LLM
+            new_summary = await self._summarize(summary, folded)
+
+            async with async_session() as db:
+                # Only apply if nobody compacted in the meantime
+                applied = await db.execute(
+                    update(Conversation)
+                    .where(Conversation.id == conversation_id, Conversation.compacted_messages == compacted)
+                    .values(summary=new_summary, compacted_messages=compacted + len(folded))
+                )
+                if applied.rowcount == 1:
+                    await db.execute(
+                        delete(ConversationMessage).where(
+                            ConversationMessage.conversation_id == conversation_id,
+                            ConversationMessage.id <= folded[-1].id,
+                        )
+                    )
+                await db.commit()
+            logger.info(f"Compacted {len(folded)} messages of conversation {conversation_id} into its summary")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Compaction of conversation {conversation_id} failed, keeping messages verbatim: {e}")
+        finally:
+            self._compacting.discard(conversation_id)
+
+    async def _summarize(self, summary: Optional[str], messages: List[ConversationMessage]) -> str:
+        transcript = "\n".join(f"{m.role}: {m.content}" for m in messages)
+        response = await get_openai_client().chat.completions.create(
+            model=settings.CONVERSATION_SUMMARY_MODEL or settings.SM_DEFAULT_MODEL,
+            messages=[
+                {"role": "system", "content": _SUMMARY_INSTRUCTIONS},
+                {"role": "user", "content": f"Existing summary:\n{summary or '(none)'}\n\nNew messages:\n{transcript}"},
+            ],
+            max_tokens=settings.CONVERSATION_SUMMARY_MAX_TOKENS,
+        )
+        content = response.choices[0].message.content if response.choices else ""
+        if not content:
+            raise ValueError("empty summary")
+        return content.strip()
+
+    async def aclose(self) -> None:
+        # Pending compactions are simply retried after the next turn
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+
+# Singleton instance
+conversation_store = ConversationStore()
@@ -0,0 +1,163 @@
+# app/services/document_dedup.py
+"""
+Content-addressed deduplication of uploads.
+
+Each upload is keyed by SHA-256 of its normalized text or decoded image bytes, per user. The first
+request for a key claims a `documents` row and runs the Lambda. Later requests with the same
+content get the stored outcome back without calling the Lambda; an outcome the Lambda reports as
+not uploaded isn't stored, so the same content can be sent again. A request that arrives while the
+first is still processing (e.g. a client retry after a timeout) gets DocumentInFlight rather than
+processing it a second time, so the content hash doubles as an idempotency key. Within one process
+such a request instead joins the first one (single flight) and gets the same result.
+"""
+import asyncio
+import base64
+import hashlib
+import logging
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+from app.core.config import settings
+from app.db.session import async_session
+from app.models.document import DOC_COMPLETED, DOC_PROCESSING, Document
+from app.services.single_flight import upload_flights
+
+logger = logging.getLogger(__name__)
+
+_HASH_CHUNK_BYTES = 256 * 1024
+
+
+class DocumentInFlight(Exception):
+    """The same content is already being processed for this user."""
+
+
+def hash_text(text: str) -> str:
+    # Unicode NFC, LF line endings, no trailing whitespace: cosmetic re-pastes hash the same
+    normalized = unicodedata.normalize("NFC", text).replace("\r\n", "\n").replace("\r", "\n")
+    normalized = "\n".join(line.rstrip() for line in normalized.split("\n")).strip()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def hash_image_base64(image_base64: str) -> str:
+    # Hash the decoded bytes so a base64 upload and a multipart upload of the same scan match
+    if image_base64.startswith("data:"):
+        image_base64 = image_base64.split(",", 1)[-1]
+    return hashlib.sha256(base64.b64decode(image_base64)).hexdigest()
+
+
+async def hash_file(file: Any) -> str:
+    """Hash an UploadFile-like object, leaving it rewound for the upload that follows."""
+    digest = hashlib.sha256()
+    while chunk := await file.read(_HASH_CHUNK_BYTES):
+        digest.update(chunk)
+    await file.seek(0)
+    return digest.hexdigest()
+
+
+async def _claim(user_id: int, content_hash: str, kind: str) -> Optional[Document]:
+    """Claim the key for processing (returns None) or return the completed record."""
+    async with async_session() as db:
+        db.add(Document(user_id=user_id, content_hash=content_hash, kind=kind, status=DOC_PROCESSING))
+        try:
+            await db.commit()
+            return None
+        except IntegrityError:
+            await db.rollback()
+
+        existing = (await db.execute(
+            select(Document).where(Document.user_id == user_id, Document.content_hash == content_hash)
+        )).scalar_one()
+        if existing.status == DOC_COMPLETED:
+            return existing
+
+        # Take over a claim whose owner died without releasing it
+        stale_before = datetime.now(timezone.utc) - timedelta(seconds=settings.DEDUP_PROCESSING_TIMEOUT)
+        updated_at = existing.updated_at
+        if updated_at.tzinfo is None:  # SQLite drops tzinfo
+            updated_at = updated_at.replace(tzinfo=timezone.utc)
+        if updated_at < stale_before:
+            taken = await db.execute(
+                update(Document)
+                .where(Document.id == existing.id, Document.updated_at == existing.updated_at)
+                .values(status=DOC_PROCESSING)
+            )
+            await db.commit()
+            if taken.rowcount == 1:
+                return None
+        raise DocumentInFlight()
+
+
+async def _release(user_id: int, content_hash: str) -> None:
+    async with async_session() as db:
+        await db.execute(
+            delete(Document).where(
+                Document.user_id == user_id,
+                Document.content_hash == content_hash,
+                Document.status == DOC_PROCESSING,
+            )
+        )
+        await db.commit()
+
+
+async def _complete(user_id: int, content_hash: str, lambda_response: Dict[str, Any]) -> None:
+    async with async_session() as db:
+        await db.execute(
+            update(Document)
+            .where(Document.user_id == user_id, Document.content_hash == content_hash)
+            .values(
+                status=DOC_COMPLETED,
+                supermemory_document_id=lambda_response.get("supermemory_document_id"),
+                message=lambda_response.get("message"),
+                de_identified_text_uploaded=bool(lambda_response.get("de_identified_text_uploaded", False)),
+            )
+        )
+        await db.commit()
+
+
+async def process_once(
+    user_id: int,
+    content_hash: str,
+    kind: str,
+    process: Callable[[], Awaitable[Dict[str, Any]]],
+) -> Tuple[Optional[Dict[str, Any]], Optional[Document]]:
+    """
+    Run `process` unless this user already uploaded the same content.
+
+    Returns (lambda_response, None) after processing, or (None, record) for a duplicate.
+    Raises DocumentInFlight if an identical upload is still being processed by another worker;
+    concurrent identical uploads in this process share one processing run instead.
+    """
+    return await upload_flights.do(
+        f"{user_id}:{content_hash}", lambda: _process_once(user_id, content_hash, kind, process)
+    )
+
+
+async def _process_once(
+    user_id: int,
+    content_hash: str,
+    kind: str,
+    process: Callable[[], Awaitable[Dict[str, Any]]],
+) -> Tuple[Optional[Dict[str, Any]], Optional[Document]]:
+    if not settings.DEDUP_ENABLED:
+        return await process(), None
+
+    existing = await _claim(user_id, content_hash, kind)
+    if existing is not None:
+        logger.info(f"Duplicate {kind} upload for user {user_id}; returning stored result")
+        return None, existing
+
+    try:
+        lambda_response = await process()
+    except BaseException:
+        # Free the key so the client can retry; shielded so it still runs if we were cancelled
+        await asyncio.shield(_release(user_id, content_hash))
+        raise
+    if not lambda_response.get("de_identified_text_uploaded"):
+        # The Lambda answered but didn't store the document: don't replay that to later uploads
+        await _release(user_id, content_hash)
+        return lambda_response, None
+    await _complete(user_id, content_hash, lambda_response)
+    return lambda_response, None
@@ -1,20 +1,47 @@
 # app/services/document_processor.py
+import asyncio
+import base64
+import hashlib
 import logging
-import httpx
 import json
-from typing import Dict, Any
+from typing import Any, AsyncIterator, Dict, Optional
 from app.core.config import settings
+from app.services.http_clients import PHI_LAMBDA, http_clients
+from app.services.image_normalizer import SeekableAsyncReadable, image_normalizer
+from app.services.local_index import local_index
+from app.services.memory_api_client import MemoryAPIClient
+from app.services.phi_deidentifier import deidentifier
+from app.services.search_cache import search_cache
+from app.services.single_flight import lambda_flights
 
 logger = logging.getLogger(__name__)
 
+# Raw bytes read per step when streaming a file; a multiple of 3 so each base64 chunk concatenates cleanly
+_FILE_CHUNK_BYTES = 3 * 64 * 1024
+
+
 class DocumentProcessorService:
     """Service to handle document processing via AWS Lambda"""
 
     def __init__(self):
         self.lambda_api_url = settings.PHI_STRIPPER_LAMBDA_API_URL
 
-    async def process_document(self, raw_text: str = None, image_base64: str = None, user_id: str = None) -> Dict[str, Any]:
-        """Send document to Lambda for OCR, PHI removal, and Supermemory upload."""
+    async def process_document(
+        self,
+        raw_text: str = None,
+        image_base64: str = None,
+        user_id: str = None,
+        deidentify: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Send document to Lambda for OCR, PHI removal, and Supermemory upload.
+
+        Text can instead be de-identified in-process (deidentify="local", or PHI_TEXT_MODE=local)
+        and written to Supermemory directly; images always go to the Lambda.
+        """
+        if raw_text and not image_base64 and (deidentify or settings.PHI_TEXT_MODE) == "local":
+            return await self._process_text_locally(raw_text, user_id)
+
         if not self.lambda_api_url:
             logger.error("PHI_STRIPPER_LAMBDA_API_URL not configured")
             raise ValueError("Lambda API URL is not configured. Please set PHI_STRIPPER_LAMBDA_API_URL in environment.")
@@ -24,41 +51,127 @@ class DocumentProcessorService:
 
         logger.info(f"Sending document to Lambda for processing (type: {'text' if raw_text else 'image'}, user_id: {user_id})")
 
-        # Prepare payload for Lambda (via API Gateway)
-        payload = {}
-        if raw_text:
-            payload["text_to_process"] = raw_text
-        if image_base64:
-            payload["image_base64"] = image_base64
-        if user_id:
-            payload["user_id"] = user_id  # Pass user ID to Lambda for tagging
+        async def _process() -> Dict[str, Any]:
+            # Prepare payload for Lambda (via API Gateway)
+            payload = {}
+            if raw_text:
+                payload["text_to_process"] = raw_text
+            if image_base64:
+                # Downsampled grayscale JPEG: a fraction of the bytes to upload and OCR
+                payload["image_base64"] = await image_normalizer.normalize_base64(image_base64)
+            if user_id:
+                payload["user_id"] = user_id  # Pass user ID to Lambda for tagging
+
+            result = await self._send(user_id, json=payload, headers={"Content-Type": "application/json"})
+            await self._index(user_id, result)
+            return result
+
+        # Identical documents submitted concurrently (retries, double submits) share one Lambda call
+        key = hashlib.sha256("\x00".join((user_id or "", raw_text or "", image_base64 or "")).encode()).hexdigest()
+        return await lambda_flights.do(key, _process)
+
+    async def _index(self, user_id: Optional[str], lambda_response: Dict[str, Any]) -> None:
+        """
+        Add what the Lambda stored to the local index. Only the Lambda's own de-identified text is
+        indexed; a response without it is skipped rather than indexing a weaker local redaction.
+        """
+        document_id = lambda_response.get("supermemory_document_id")
+        text = lambda_response.get("de_identified_text")
+        if not user_id or not document_id or not text or not local_index.enabled:
+            return
+        await local_index.add(user_id, document_id, text)
+
+    async def _process_text_locally(self, raw_text: str, user_id: str = None) -> Dict[str, Any]:
+        if not user_id:
+            raise ValueError("user_id is required for local de-identification")
+
+        # One regex pass, but long documents are still CPU work: keep it off the event loop
+        de_identified, redactions = await asyncio.to_thread(deidentifier.deidentify, raw_text)
+        logger.info(f"De-identified text locally (user_id: {user_id}, redactions: {redactions})")
+
+        result = await MemoryAPIClient().add_text_or_url(
+            content=de_identified,
+            container_tag=user_id,
+            metadata={"source": "upload", "deidentified_by": "local"},
+        )
+        # Same shape as the Lambda's response so callers don't care which path ran
+        return {
+            "message": "Document de-identified and uploaded",
+            "de_identified_text_uploaded": True,
+            "supermemory_document_id": result.get("id"),
+            "phi_redactions": redactions,
+        }
+
+    async def process_file(self, file: SeekableAsyncReadable, size: int, user_id: str = None) -> Dict[str, Any]:
+        """
+        Send an uploaded image/PDF to Lambda without materializing it as a base64 string.
+
+        JPEG/PNG photos are normalized first (see image_normalizer) and the much smaller result is
+        sent. Otherwise the JSON body is streamed: raw bytes are read from `file` chunk by chunk and
+        base64-encoded on the way out, so peak memory is one chunk rather than several copies of the scan.
+        """
+        if not self.lambda_api_url:
+            logger.error("PHI_STRIPPER_LAMBDA_API_URL not configured")
+            raise ValueError("Lambda API URL is not configured. Please set PHI_STRIPPER_LAMBDA_API_URL in environment.")
+
+        normalized = await image_normalizer.normalize_file(file, size)
+        if normalized is not None:
+            logger.info(f"Sending normalized image to Lambda for processing (bytes: {len(normalized)}, user_id: {user_id})")
+            payload = {"image_base64": base64.b64encode(normalized).decode("ascii")}
+            if user_id:
+                payload["user_id"] = user_id
+            result = await self._send(user_id, json=payload, headers={"Content-Type": "application/json"})
+            await self._index(user_id, result)
+            return result
+
+        logger.info(f"Streaming file to Lambda for processing (bytes: {size}, user_id: {user_id})")
+
+        prefix = b'{"image_base64": "'
+        suffix = b'"' + (f', "user_id": {json.dumps(user_id)}'.encode() if user_id else b"") + b"}"
+        content_length = len(prefix) + 4 * ((size + 2) // 3) + len(suffix)
+
+        async def body() -> AsyncIterator[bytes]:
+            yield prefix
+            while chunk := await file.read(_FILE_CHUNK_BYTES):
+                yield base64.b64encode(chunk)
+            yield suffix
+
+        result = await self._send(
+            user_id,
+            content=body(),
+            headers={"Content-Type": "application/json", "Content-Length": str(content_length)},
+        )
+        await self._index(user_id, result)
+        return result
+
+    async def _send(self, user_id: str = None, **request: Any) -> Dict[str, Any]:
+        import httpx  # loaded with the first pooled client (see app.services.http_clients)
 
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    self.lambda_api_url,
-                    json=payload,
-                    headers={"Content-Type": "application/json"}
-                )
-
-                logger.info(f"Lambda API response status: {response.status_code}")
-
-                # Raise exception for 4xx/5xx status codes
-                response.raise_for_status()
-
-                # Parse the response from API Gateway
-                api_gateway_response = response.json()
-                logger.debug(f"API Gateway response: {api_gateway_response}")
-
-                # API Gateway wraps Lambda response in a 'body' field as a JSON string
-                if "body" in api_gateway_response:
-                    lambda_response = json.loads(api_gateway_response["body"])
-                else:
-                    # If no 'body' field, assume direct Lambda response
-                    lambda_response = api_gateway_response
-
-                logger.info("Document processed successfully by Lambda")
-                return lambda_response
+            client = http_clients.get(PHI_LAMBDA)
+            response = await client.post(self.lambda_api_url, **request)
+
+            logger.info(f"Lambda API response status: {response.status_code}")
+
+            # Raise exception for 4xx/5xx status codes
+            response.raise_for_status()
+
+            # Parse the response from API Gateway
+            api_gateway_response = response.json()
+            logger.debug(f"API Gateway response: {api_gateway_response}")
+
+            # API Gateway wraps Lambda response in a 'body' field as a JSON string
+            if "body" in api_gateway_response:
+                lambda_response = json.loads(api_gateway_response["body"])
+            else:
+                # If no 'body' field, assume direct Lambda response
+                lambda_response = api_gateway_response
+
+            logger.info("Document processed successfully by Lambda")
+            if user_id:
+                # Lambda wrote to this user's Supermemory space; drop their cached searches
+                search_cache.invalidate_user(user_id)
+            return lambda_response
 
         except httpx.TimeoutException as e:
             logger.error(f"Timeout calling Lambda API: {str(e)}")
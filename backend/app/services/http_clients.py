@@ -0,0 +1,202 @@
+# app/services/http_clients.py
+"""
+Long-lived pooled HTTP clients for upstream services (Supermemory, PHI Lambda, LLM provider).
+
+One keep-alive httpx.AsyncClient per upstream is opened in the FastAPI lifespan and shared
+by every request, so chat turns and uploads reuse warm connections instead of paying
+DNS + TCP + TLS setup each time.
+
+httpx itself is imported when the first client is built: with its transport stack (httpcore, h11,
+and brotli/trio when installed) it is a sizeable share of a Lambda cold start.
+"""
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import record_upstream
+
+if TYPE_CHECKING:
+    import httpx
+
+logger = logging.getLogger(__name__)
+
+SUPERMEMORY = "supermemory"
+PHI_LAMBDA = "phi_lambda"
+LLM = "llm"
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class _PoolStats:
+    """Counters for a single upstream pool."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.requests = 0
+        self.errors = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float) -> None:
+        self.wait_seconds_total += seconds
+        if seconds > self.wait_seconds_max:
+            self.wait_seconds_max = seconds
+
+
+class _InstrumentedTransport:
+    """
+    Wraps an httpx.AsyncHTTPTransport to track in-flight requests and connection wait time
+    (a wrapper rather than a subclass, so defining it doesn't need httpx).
+
+    Wait time is measured from handing the request to the pool until its headers start
+    going out on a connection, i.e. pool queueing plus connect time for a fresh socket.
+    """
+
+    def __init__(self, name: str, stats: _PoolStats, **kwargs: Any):
+        import httpx
+
+        self._transport = httpx.AsyncHTTPTransport(**kwargs)
+        self.name = name
+        self.stats = stats
+
+    async def __aenter__(self) -> "_InstrumentedTransport":
+        await self._transport.__aenter__()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self._transport.__aexit__(*exc_info)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+    async def handle_async_request(self, request: "httpx.Request") -> "httpx.Response":
+        started = time.perf_counter()
+        waited = False
+        upstream_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: dict) -> None:
+            nonlocal waited
+            if not waited and event_name.endswith("send_request_headers.started"):
+                waited = True
+                self.stats.record_wait(time.perf_counter() - started)
+            if upstream_trace is not None:
+                await upstream_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        self.stats.in_flight += 1
+        self.stats.requests += 1
+        status = "error"
+        try:
+            response = await self._transport.handle_async_request(request)
+            status = str(response.status_code)
+            return response
+        except Exception:
+            self.stats.errors += 1
+            raise
+        finally:
+            self.stats.in_flight -= 1
+            # Time to response headers (a streamed body is still being read after this)
+            record_upstream(self.name, status, time.perf_counter() - started)
+
+    def pool_snapshot(self) -> Dict[str, int]:
+        connections = list(self._transport._pool.connections)
+        idle = sum(1 for c in connections if c.is_idle())
+        return {"connections": len(connections), "idle": idle, "active": len(connections) - idle}
+
+
+class HTTPClientRegistry:
+    """Holds one pooled httpx.AsyncClient per upstream for the lifetime of the app."""
+
+    def __init__(self):
+        self._clients: Dict[str, "httpx.AsyncClient"] = {}
+        self._transports: Dict[str, _InstrumentedTransport] = {}
+        self._stats: Dict[str, _PoolStats] = {}
+
+    def _upstreams(self) -> Dict[str, str]:
+        """Upstream name -> URL used to warm its pool at startup (empty = don't warm)."""
+        return {
+            SUPERMEMORY: settings.SUPERMEMORY_BASE_URL if settings.SUPERMEMORY_API_KEY else "",
+            PHI_LAMBDA: settings.PHI_STRIPPER_LAMBDA_API_URL,
+            LLM: settings.PROVIDER_BASE_URL if settings.OPENAI_API_KEY else "",
+        }
+
+    def _build(self, name: str) -> "httpx.AsyncClient":
+        import httpx
+
+        http2 = settings.HTTP2_ENABLED and _http2_available()
+        if settings.HTTP2_ENABLED and not http2:
+            logger.warning("HTTP2_ENABLED is set but the 'h2' package is missing; using HTTP/1.1")
+
+        limits = httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+        )
+        timeout = httpx.Timeout(
+            settings.HTTP_READ_TIMEOUT,
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+            pool=settings.HTTP_POOL_TIMEOUT,
+        )
+        stats = _PoolStats()
+        transport = _InstrumentedTransport(name, stats, limits=limits, http2=http2)
+        client = httpx.AsyncClient(transport=transport, timeout=timeout, limits=limits)
+
+        self._stats[name] = stats
+        self._transports[name] = transport
+        return client
+
+    def get(self, name: str) -> "httpx.AsyncClient":
+        """Return the shared client for an upstream, creating it lazily outside the lifespan."""
+        client = self._clients.get(name)
+        if client is None or client.is_closed:
+            client = self._build(name)
+            self._clients[name] = client
+        return client
+
+    async def start(self) -> None:
+        """Open a client per configured upstream and warm one connection to each."""
+        for name, url in self._upstreams().items():
+            client = self.get(name)
+            if url and settings.HTTP_WARM_ON_STARTUP:
+                await self._warm(name, client, url)
+
+    async def _warm(self, name: str, client: "httpx.AsyncClient", url: str) -> None:
+        # Any response (even 4xx) means DNS, TCP and TLS are done and the socket is pooled
+        try:
+            await client.head(url, timeout=settings.HTTP_CONNECT_TIMEOUT)
+            logger.info(f"Warmed HTTP pool for {name}")
+        except Exception as e:
+            logger.warning(f"Could not warm HTTP pool for {name}: {e}")
+
+    async def aclose(self) -> None:
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Pool occupancy and wait time per upstream."""
+        out: Dict[str, Dict[str, Any]] = {}
+        for name, stats in self._stats.items():
+            transport: Optional[_InstrumentedTransport] = self._transports.get(name)
+            pool = transport.pool_snapshot() if transport else {}
+            out[name] = {
+                **pool,
+                "max_connections": settings.HTTP_MAX_CONNECTIONS,
+                "in_flight": stats.in_flight,
+                "requests": stats.requests,
+                "errors": stats.errors,
+                "wait_ms_avg": round(stats.wait_seconds_total / stats.requests * 1000, 3) if stats.requests else 0.0,
+                "wait_ms_max": round(stats.wait_seconds_max * 1000, 3),
+            }
+        return out
+
+
+# Singleton instance, opened/closed by the lifespan in app.main
+http_clients = HTTPClientRegistry()
@@ -0,0 +1,188 @@
+# app/services/image_normalizer.py
+"""
+Image normalization before OCR dispatch.
+
+Phone photos of lab reports arrive as multi-megabyte full-color JPEG/PNG. Forwarded as they are,
+they cost upload time to the Lambda and OCR time, and they approach the API Gateway payload limit.
+Before dispatch, JPEG and PNG uploads are:
+  1. decoded (JPEGs are decoded at reduced scale when far larger than needed, which is much faster)
+  2. auto-oriented from the EXIF orientation tag (EXIF, including any GPS location, is not kept)
+  3. converted to grayscale, with transparency flattened onto white
+  4. downsampled so the long side is at most IMAGE_MAX_DIMENSION px (~200 DPI for a letter page)
+  5. re-encoded as JPEG at IMAGE_JPEG_QUALITY
+The result replaces the original only when it is smaller. PDFs, TIFFs and anything Pillow can't
+read are forwarded unchanged, as are images under IMAGE_NORMALIZE_MIN_BYTES (screenshots and
+already-compact scans gain less than normalizing them costs) and images arriving while the pool
+already has IMAGE_NORMALIZE_MAX_PENDING jobs (an upload is never failed or queued behind others).
+
+The work runs in a thread pool off the event loop: Pillow releases the GIL while decoding,
+resampling and encoding. Pillow itself is imported on first use (cold starts).
+"""
+import base64
+import binascii
+import io
+import logging
+import time
+from typing import Any, BinaryIO, Dict, Optional, Protocol
+
+from app.core.bounded_executor import BoundedExecutor
+from app.core.config import settings
+from app.core.metrics import stage
+
+logger = logging.getLogger(__name__)
+
+_JPEG = b"\xff\xd8\xff"
+_PNG = b"\x89PNG\r\n\x1a\n"
+_BASE64_PREFIXES = (base64.b64encode(_JPEG).decode(), base64.b64encode(_PNG[:6]).decode())
+
+
+class SeekableAsyncReadable(Protocol):
+    file: BinaryIO  # the underlying (spooled) file, read directly by the normalizer's worker
+
+    async def read(self, size: int = -1) -> bytes: ...
+    async def seek(self, offset: int) -> int: ...
+
+
+def normalize_image(fp: BinaryIO, size: int, max_dimension: int, quality: int) -> Optional[bytes]:
+    """
+    Normalized JPEG bytes for the JPEG/PNG image in `fp` (`size` bytes, seekable), or None if it
+    isn't one or the result isn't smaller. Pillow reads `fp` as it decodes, so the encoded image is
+    never held in memory whole.
+    """
+    head = fp.read(len(_PNG))
+    fp.seek(0)
+    if not head.startswith((_JPEG, _PNG)):
+        return None
+    from PIL import Image, ImageOps
+
+    with Image.open(fp) as image:
+        width, height = image.size
+        scale = min(1.0, max_dimension / max(width, height))
+        if image.format == "JPEG":
+            # The decoder can scale by 1/2, 1/4 or 1/8 in the DCT, never below the requested size
+            image.draft("L", (max(1, int(width * scale)), max(1, int(height * scale))))
+        image = ImageOps.exif_transpose(image)
+        if image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info):
+            image = image.convert("RGBA")
+            flattened = Image.new("RGBA", image.size, (255, 255, 255, 255))
+            flattened.alpha_composite(image)
+            image = flattened
+        image = image.convert("L")
+        image.thumbnail((max_dimension, max_dimension), Image.Resampling.LANCZOS)
+        out = io.BytesIO()
+        image.save(out, "JPEG", quality=quality)
+    normalized = out.getvalue()
+    return normalized if len(normalized) < size else None
+
+
+class ImageNormalizer:
+    def __init__(self, workers: int):
+        self._pool = BoundedExecutor(workers=workers, thread_name_prefix="imgnorm")
+        self.images = 0
+        self.normalized = 0
+        self.unchanged = 0
+        self.skipped_small = 0
+        self.skipped_busy = 0
+        self.errors = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds_total = 0.0
+        self.seconds_max = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return settings.IMAGE_NORMALIZE_ENABLED
+
+    def _run(self, fp: BinaryIO, size: int) -> Optional[bytes]:
+        return normalize_image(fp, size, settings.IMAGE_MAX_DIMENSION, settings.IMAGE_JPEG_QUALITY)
+
+    def _run_base64(self, image_base64: str) -> Optional[str]:
+        if image_base64.startswith("data:"):
+            image_base64 = image_base64.split(",", 1)[-1]
+        try:
+            data = base64.b64decode(image_base64, validate=True)
+        except (binascii.Error, ValueError):
+            return None
+        normalized = self._run(io.BytesIO(data), len(data))
+        return base64.b64encode(normalized).decode("ascii") if normalized is not None else None
+
+    def _skip(self, size: int) -> bool:
+        if size < settings.IMAGE_NORMALIZE_MIN_BYTES:
+            self.skipped_small += 1
+            return True
+        return False
+
+    async def _submit(self, fn: Any, size: int, *args: Any) -> Optional[Any]:
+        future = self._pool.submit(settings.IMAGE_NORMALIZE_MAX_PENDING, fn, *args)
+        if future is None:
+            self.skipped_busy += 1
+            return None
+        self.images += 1
+        started = time.perf_counter()
+        try:
+            with stage("image_normalize"):
+                result = await future
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Image normalization failed, sending the original: {e}")
+            return None
+        finally:
+            elapsed = time.perf_counter() - started
+            self.seconds_total += elapsed
+            self.seconds_max = max(self.seconds_max, elapsed)
+        self.bytes_in += size
+        if result is None:
+            self.unchanged += 1
+            self.bytes_out += size
+            return None
+        self.normalized += 1
+        self.bytes_out += len(result) * 3 // 4 if isinstance(result, str) else len(result)
+        return result
+
+    async def normalize_base64(self, image_base64: str) -> str:
+        """The normalized image as base64, or `image_base64` itself when it isn't normalized."""
+        size = len(image_base64) * 3 // 4
+        start = image_base64.find(",", 0, 64) + 1  # after a data: URL header, if any
+        if not self.enabled or not image_base64.startswith(_BASE64_PREFIXES, start) or self._skip(size):
+            return image_base64
+        normalized = await self._submit(self._run_base64, size, image_base64)
+        if normalized is not None:
+            logger.info(f"Normalized image for OCR: {size} -> {len(normalized) * 3 // 4} bytes")
+        return normalized or image_base64
+
+    async def normalize_file(self, file: SeekableAsyncReadable, size: int) -> Optional[bytes]:
+        """Normalized bytes of an uploaded JPEG/PNG; None (file rewound) to send it unchanged."""
+        if not self.enabled:
+            return None
+        head = await file.read(len(_PNG))
+        await file.seek(0)
+        if not head.startswith((_JPEG, _PNG)) or self._skip(size):
+            return None
+        # The worker reads the spooled upload itself (rewound above) rather than a copy of it in memory
+        normalized = await self._submit(self._run, size, file.file, size)
+        if normalized is None:
+            await file.seek(0)
+        else:
+            logger.info(f"Normalized image for OCR: {size} -> {len(normalized)} bytes")
+        return normalized
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "pending": self._pool.pending,
+            "images": self.images,
+            "normalized": self.normalized,
+            "unchanged": self.unchanged,
+            "skipped_small": self.skipped_small,
+            "skipped_busy": self.skipped_busy,
+            "errors": self.errors,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "bytes_saved": self.bytes_in - self.bytes_out,
+            "avg_ms": round(self.seconds_total / self.images * 1000, 2) if self.images else 0.0,
+            "max_ms": round(self.seconds_max * 1000, 2),
+        }
+
+
+# Singleton instance
+image_normalizer = ImageNormalizer(workers=settings.IMAGE_NORMALIZE_WORKERS)
@@ -0,0 +1,225 @@
+# app/services/ingestion_worker.py
+"""
+Background ingestion of uploaded documents.
+
+POST /api/documents/jobs stores an IngestionJob row and returns 202 immediately; a fixed pool of
+asyncio workers then sends each job through DocumentProcessorService, retrying transient failures
+with exponential backoff. Jobs left queued or running when the process stopped are re-queued at
+startup. This assumes one API process owns the jobs table (as in the Dockerfile/compose setup).
+"""
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Set
+
+from sqlalchemy import select, update
+from app.core.config import settings
+from app.db.session import async_session
+from app.models.ingestion_job import (
+    JOB_FAILED,
+    JOB_QUEUED,
+    JOB_RUNNING,
+    JOB_SUCCEEDED,
+    IngestionJob,
+)
+from app.services.document_processor import document_processor
+
+logger = logging.getLogger(__name__)
+
+
+def _is_retryable(exc: Exception) -> bool:
+    # Misconfiguration and client errors won't fix themselves on retry
+    if isinstance(exc, ValueError):
+        return False
+    import httpx  # loaded with the first pooled client (see app.services.http_clients)
+
+    if isinstance(exc, httpx.HTTPStatusError):
+        code = exc.response.status_code
+        return code == 429 or code >= 500
+    return True
+
+
+def _backoff_seconds(attempts: int) -> float:
+    return min(settings.INGESTION_RETRY_MAX_SECONDS, settings.INGESTION_RETRY_BASE_SECONDS * (2 ** (attempts - 1)))
+
+
+class IngestionWorker:
+    def __init__(self):
+        self._queue: Optional["asyncio.Queue[str]"] = None
+        self._workers: Set[asyncio.Task] = set()
+        self._timers: Set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        for i in range(settings.INGESTION_WORKERS):
+            self._workers.add(asyncio.create_task(self._run(), name=f"ingestion-worker-{i}"))
+        try:
+            await self._recover()
+        except Exception as e:
+            # e.g. the jobs table hasn't been created yet (run app.db.init_db)
+            logger.warning(f"Could not recover ingestion jobs: {e}")
+
+    async def stop(self) -> None:
+        tasks = self._workers | self._timers
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers.clear()
+        self._timers.clear()
+
+    async def submit(
+        self,
+        user_id: int,
+        supermemory_user_id: str,
+        raw_text: Optional[str] = None,
+        image_base64: Optional[str] = None,
+        deidentify: Optional[str] = None,
+    ) -> IngestionJob:
+        """Persist a new job and hand it to the worker pool."""
+        job = IngestionJob(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            supermemory_user_id=supermemory_user_id,
+            status=JOB_QUEUED,
+            text_to_process=raw_text,
+            image_base64=image_base64,
+            deidentify=deidentify,
+            max_attempts=settings.INGESTION_MAX_ATTEMPTS,
+        )
+        async with async_session() as db:
+            db.add(job)
+            await db.commit()
+        self._enqueue(job.id)
+        return job
+
+    def _enqueue(self, job_id: str, delay: float = 0.0) -> None:
+        if self._queue is None:
+            raise RuntimeError("Ingestion worker is not running")
+        if delay <= 0:
+            self._queue.put_nowait(job_id)
+            return
+
+        async def _later() -> None:
+            await asyncio.sleep(delay)
+            self._queue.put_nowait(job_id)
+
+        timer = asyncio.create_task(_later())
+        self._timers.add(timer)
+        timer.add_done_callback(self._timers.discard)
+
+    async def _recover(self) -> None:
+        now = datetime.now(timezone.utc)
+        async with async_session() as db:
+            # A job still marked running was interrupted mid-attempt by the last shutdown
+            await db.execute(
+                update(IngestionJob).where(IngestionJob.status == JOB_RUNNING).values(status=JOB_QUEUED)
+            )
+            await db.commit()
+            result = await db.execute(
+                select(IngestionJob.id, IngestionJob.next_attempt_at)
+                .where(IngestionJob.status == JOB_QUEUED)
+                .order_by(IngestionJob.created_at)
+            )
+            pending = result.all()
+
+        for job_id, next_attempt_at in pending:
+            delay = 0.0
+            if next_attempt_at is not None:
+                if next_attempt_at.tzinfo is None:  # SQLite drops tzinfo
+                    next_attempt_at = next_attempt_at.replace(tzinfo=timezone.utc)
+                delay = (next_attempt_at - now).total_seconds()
+            self._enqueue(job_id, delay)
+        if pending:
+            logger.info(f"Recovered {len(pending)} pending ingestion jobs")
+
+    async def _run(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._process(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Ingestion job {job_id} crashed: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, job_id: str) -> None:
+        async with async_session() as db:
+            # Claim atomically so a job enqueued twice only runs once
+            claimed = await db.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == job_id, IngestionJob.status == JOB_QUEUED)
+                .values(status=JOB_RUNNING, attempts=IngestionJob.attempts + 1)
+            )
+            await db.commit()
+            if claimed.rowcount == 0:
+                return
+            job = await db.get(IngestionJob, job_id)
+            raw_text, image_base64, deidentify = job.text_to_process, job.image_base64, job.deidentify
+            supermemory_user_id, attempts, max_attempts = job.supermemory_user_id, job.attempts, job.max_attempts
+
+        # No DB session is held while waiting on the Lambda
+        try:
+            lambda_response = await document_processor.process_document(
+                raw_text=raw_text,
+                image_base64=image_base64,
+                user_id=supermemory_user_id,
+                deidentify=deidentify,
+            )
+        except Exception as e:
+            await self._record_failure(job_id, e, attempts, max_attempts)
+            return
+        await self._finish(job_id, JOB_SUCCEEDED, result=lambda_response)
+        logger.info(f"Ingestion job {job_id} succeeded on attempt {attempts}")
+
+    async def _record_failure(self, job_id: str, exc: Exception, attempts: int, max_attempts: int) -> None:
+        error = f"{type(exc).__name__}: {exc}"
+        if not _is_retryable(exc) or attempts >= max_attempts:
+            logger.error(f"Ingestion job {job_id} failed after {attempts} attempt(s): {error}")
+            await self._finish(job_id, JOB_FAILED, error=error)
+            return
+
+        delay = _backoff_seconds(attempts)
+        logger.warning(f"Ingestion job {job_id} attempt {attempts} failed ({error}); retrying in {delay:.1f}s")
+        async with async_session() as db:
+            await db.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == job_id)
+                .values(
+                    status=JOB_QUEUED,
+                    last_error=error,
+                    next_attempt_at=datetime.now(timezone.utc) + timedelta(seconds=delay),
+                )
+            )
+            await db.commit()
+        self._enqueue(job_id, delay)
+
+    async def _finish(
+        self,
+        job_id: str,
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        async with async_session() as db:
+            await db.execute(
+                update(IngestionJob)
+                .where(IngestionJob.id == job_id)
+                .values(
+                    status=status,
+                    result=json.dumps(result) if result is not None else None,
+                    last_error=error,
+                    next_attempt_at=None,
+                    # The document is no longer needed once the job is final
+                    text_to_process=None,
+                    image_base64=None,
+                )
+            )
+            await db.commit()
+
+
+# Singleton instance, started/stopped by the lifespan in app.main
+ingestion_worker = IngestionWorker()
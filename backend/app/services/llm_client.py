@@ -0,0 +1,35 @@
+# app/services/llm_client.py
+"""
+Shared AsyncOpenAI client for direct provider calls (/api/chat).
+
+The client rides on the registry's pooled LLM transport, so completions are awaited on the
+event loop instead of blocking it and every request reuses warm provider connections.
+"""
+from typing import TYPE_CHECKING, Optional
+
+from app.core.config import settings
+from app.services.http_clients import LLM, http_clients
+
+if TYPE_CHECKING:
+    import httpx
+    from openai import AsyncOpenAI
+
+_client: Optional["AsyncOpenAI"] = None
+_transport: Optional["httpx.AsyncClient"] = None
+
+
+def get_openai_client() -> "AsyncOpenAI":
+    """Return the process-wide AsyncOpenAI client, rebuilt if the pooled transport was reopened."""
+    global _client, _transport
+    transport = http_clients.get(LLM)
+    if _client is None or _transport is not transport:
+        # The SDK takes ~0.5s to import, so it loads with the first completion rather than at startup
+        from openai import AsyncOpenAI
+
+        _client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            base_url=settings.PROVIDER_BASE_URL,
+            http_client=transport,
+        )
+        _transport = transport
+    return _client
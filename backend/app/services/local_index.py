@@ -0,0 +1,264 @@
+# app/services/local_index.py
+"""
+Local lexical index of the de-identified text users store in Supermemory.
+
+Every chat retrieval used to be a remote v4/search call, yet the text passes through this service
+on its way to Supermemory (MemoryAPIClient.add_text_or_url, and the PHI Lambda path of
+DocumentProcessorService). It is chunked and indexed here at ingest time so that /api/chat can be
+answered from local disk in milliseconds; see app/services/retrieval.py for how local and remote
+results are combined.
+
+Storage is one SQLite file (LOCAL_INDEX_PATH) with an FTS5 table ranked by BM25:
+  - each chunk carries its owner as an indexed token, so a search only walks that user's postings
+  - chunk rowids are (document row id << 20) + chunk number, so a document's chunks are deleted or
+    replaced with a rowid range scan
+  - re-indexing a Supermemory document id (or custom id) replaces its chunks; deletions are explicit
+
+BM25 term statistics are table-wide rather than per user. Only de-identified text is ever indexed:
+the same content Supermemory holds. Reads and writes run in a worker thread.
+"""
+import asyncio
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_CHUNK_BITS = 20  # up to ~1M chunks per document
+_MAX_QUERY_TERMS = 16
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    custom_id TEXT,
+    chunks INTEGER NOT NULL,
+    indexed_at REAL NOT NULL,
+    UNIQUE (owner, document_id)
+);
+CREATE INDEX IF NOT EXISTS ix_documents_owner_custom_id ON documents (owner, custom_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(
+    owner, body, document_id UNINDEXED, tokenize = 'porter unicode61'
+);
+"""
+
+_WORD = re.compile(r"\w+")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Too common to say anything about relevance; dropping them also keeps queries off long posting lists
+_STOPWORDS = frozenset(
+    "a about after all also am an and any are as at be been before being but by can could did do does "
+    "doing for from had has have having he her here hers him his how i if in into is it its just me "
+    "more most my no nor not now of off on once only or other our out over own please same she should "
+    "so some such than that the their them then there these they this those through to too under until "
+    "up very was we were what when where which while who whom why will with would you your tell know "
+    "mean means".split()
+)
+
+
+def chunk_text(text: str, max_words: int) -> List[str]:
+    """Split text into passages of whole sentences, about `max_words` words each."""
+    chunks: List[str] = []
+    current: List[str] = []
+    words = 0
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        count = len(sentence.split())
+        if current and words + count > max_words:
+            chunks.append(" ".join(current))
+            current, words = [], 0
+        current.append(sentence)
+        words += count
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def match_expression(owner_token: str, query: str) -> Optional[str]:
+    """FTS5 query for any of the query's meaningful words within one owner's chunks (None if none)."""
+    terms: List[str] = []
+    for word in _WORD.findall(query.lower()):
+        if len(word) > 1 and word not in _STOPWORDS and word not in terms:
+            terms.append(word)
+    if not terms:
+        return None
+    # Quoted, so user text can never be read as FTS5 query syntax
+    any_term = " OR ".join(f'"{term}"' for term in terms[:_MAX_QUERY_TERMS])
+    return f'owner:"{owner_token}" AND body:({any_term})'
+
+
+def _owner_token(user_id: str) -> str:
+    # A single alphanumeric token whatever the id looks like (the tokenizer would split on '_')
+    return "u" + hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:24]
+
+
+class LocalIndex:
+    def __init__(self, path: str, chunk_words: int):
+        self.path = path
+        self.chunk_words = chunk_words
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.searches = 0
+        self.hits = 0
+        self.indexed = 0
+        self.deleted = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Called with the lock held
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _drop(conn: sqlite3.Connection, row_id: int) -> None:
+        conn.execute(
+            "DELETE FROM chunks WHERE rowid BETWEEN ? AND ?",
+            (row_id << _CHUNK_BITS, ((row_id + 1) << _CHUNK_BITS) - 1),
+        )
+        conn.execute("DELETE FROM documents WHERE id = ?", (row_id,))
+
+    def _add(self, user_id: str, document_id: str, text: str, custom_id: Optional[str]) -> int:
+        chunks = chunk_text(text, self.chunk_words)[: 1 << _CHUNK_BITS]
+        token = _owner_token(user_id)
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # A new version of the same document (same id, or same custom id) replaces the old one
+                replaced = conn.execute(
+                    "SELECT id FROM documents WHERE owner = ? AND (document_id = ? OR custom_id = ?)",
+                    (user_id, document_id, custom_id),
+                ).fetchall()
+                for (row_id,) in replaced:
+                    self._drop(conn, row_id)
+                row_id = conn.execute(
+                    "INSERT INTO documents (owner, document_id, custom_id, chunks, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                    (user_id, document_id, custom_id, len(chunks), time.time()),
+                ).lastrowid
+                conn.executemany(
+                    "INSERT INTO chunks (rowid, owner, body, document_id) VALUES (?, ?, ?, ?)",
+                    (((row_id << _CHUNK_BITS) + i, token, chunk, document_id) for i, chunk in enumerate(chunks)),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return len(chunks)
+
+    def _delete(self, user_id: str, document_id: str) -> int:
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT id FROM documents WHERE owner = ? AND document_id = ?", (user_id, document_id)
+                ).fetchall()
+                for (row_id,) in rows:
+                    self._drop(conn, row_id)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return len(rows)
+
+    def _contains(self, user_id: str, document_id: str) -> bool:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT 1 FROM documents WHERE owner = ? AND document_id = ?", (user_id, document_id)
+            ).fetchone()
+        return row is not None
+
+    def _search(self, user_id: str, query: str, limit: int) -> List[Dict[str, Any]]:
+        expression = match_expression(_owner_token(user_id), query)
+        if expression is None:
+            return []
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT body, document_id, bm25(chunks, 0.0, 1.0, 0.0) AS rank FROM chunks "
+                "WHERE chunks MATCH ? ORDER BY rank LIMIT ?",
+                (expression, limit),
+            ).fetchall()
+        # Same shape as v4 search results; bm25() is lower-is-better, so flip it into a score
+        return [
+            {"memory": body, "documentId": document_id, "score": round(-rank, 4), "source": "local"}
+            for body, document_id, rank in rows
+        ]
+
+    async def add(self, user_id: str, document_id: str, text: str, custom_id: Optional[str] = None) -> None:
+        """Index (or re-index) a document's de-identified text. Never raises: indexing must not fail an upload."""
+        if not self.enabled or not text.strip():
+            return
+        try:
+            chunks = await asyncio.to_thread(self._add, user_id, document_id, text, custom_id)
+            self.indexed += 1
+            logger.debug(f"Indexed document {document_id} for {user_id} ({chunks} chunks)")
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Local index write failed for document {document_id}: {e}")
+
+    async def delete_document(self, user_id: str, document_id: str) -> bool:
+        if not self.enabled:
+            return False
+        removed = await asyncio.to_thread(self._delete, user_id, document_id)
+        self.deleted += removed
+        return removed > 0
+
+    async def contains(self, user_id: str, document_id: str) -> bool:
+        if not self.enabled:
+            return False
+        return await asyncio.to_thread(self._contains, user_id, document_id)
+
+    async def search(self, user_id: str, query: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Best `limit` chunks of the user's documents for the query; None if the index is unusable."""
+        if not self.enabled:
+            return None
+        self.searches += 1
+        try:
+            results = await asyncio.to_thread(self._search, user_id, query, limit)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Local index search failed: {e}")
+            return None
+        if results:
+            self.hits += 1
+        return results
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "searches": self.searches,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.searches, 4) if self.searches else 0.0,
+            "indexed": self.indexed,
+            "deleted": self.deleted,
+            "errors": self.errors,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+# Singleton instance
+local_index = LocalIndex(path=settings.LOCAL_INDEX_PATH, chunk_words=settings.LOCAL_INDEX_CHUNK_WORDS)
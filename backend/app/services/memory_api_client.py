@@ -1,9 +1,19 @@
 # // app/services/memory_api_client.py
+import hashlib
+import json
 from typing import Optional, Dict, Any
-import httpx
 from app.core.config import settings
+from app.services.http_clients import SUPERMEMORY, http_clients
+from app.services.local_index import local_index
+from app.services.retrieval_guard import retrieval_guard
+from app.services.search_cache import search_cache
+from app.services.single_flight import memory_write_flights, search_flights
 
 
+def _is_url(content: str) -> bool:
+    content = content.strip()
+    return content.startswith(("http://", "https://")) and not any(c.isspace() for c in content)
+
 
 class MemoryAPIClient:
     def __init__(self):
@@ -32,10 +42,31 @@ class MemoryAPIClient:
             payload["raw"] = raw
 
         url = f"{self.base}/v3/documents"
-        async with httpx.AsyncClient(timeout=30) as client:
-            r = await client.post(url, headers=self.headers, json=payload)
+
+        async def _add() -> Dict[str, Any]:
+            r = await http_clients.get(SUPERMEMORY).post(url, headers=self.headers, json=payload)
             r.raise_for_status()
-            return r.json()
+            # New content for this user: cached searches may now be incomplete
+            search_cache.invalidate_user(container_tag)
+            result = r.json()
+            # Mirror the text into the local index (a URL is fetched by Supermemory; we never see its text)
+            if result.get("id") and not _is_url(content):
+                await local_index.add(container_tag, result["id"], content, custom_id=custom_id)
+            return result
+
+        if not custom_id:
+            return await _add()
+        # A write with a custom_id is idempotent by design; identical concurrent ones share one request
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        return await memory_write_flights.do(key, _add)
+
+    async def delete_document(self, document_id: str, container_tag: str) -> None:
+        """Delete a document from Supermemory (already gone counts as deleted) and from the local index."""
+        r = await http_clients.get(SUPERMEMORY).delete(f"{self.base}/v3/documents/{document_id}", headers=self.headers)
+        if r.status_code != 404:
+            r.raise_for_status()
+        search_cache.invalidate_user(container_tag)
+        await local_index.delete_document(container_tag, document_id)
 
     async def search_documents(
         self,
@@ -43,7 +74,17 @@ class MemoryAPIClient:
         container_tag: str,
         limit: int = 5
     ) -> Dict[str, Any]:
-        """Search for relevant documents using Supermemory's v4 search API"""
+        """
+        Search for relevant documents using Supermemory's v4 search API (cached per user).
+        Raises RetrievalUnavailable / RetrievalDeadlineExceeded when search is skipped or too slow.
+        """
+        cache_key = search_cache.key(container_tag, query, limit)
+        if search_cache.enabled:
+            cached = search_cache.get(cache_key)
+            if cached is not None:
+                return cached
+        generation = search_cache.generation(container_tag)
+
         url = f"{self.base}/v4/search"
         payload = {
             "q": query,  # v4 API uses 'q' not 'query'
@@ -51,7 +92,16 @@ class MemoryAPIClient:
             "limit": limit
         }
 
-        async with httpx.AsyncClient(timeout=30) as client:
-            r = await client.post(url, headers=self.headers, json=payload)
+        async def _search() -> Dict[str, Any]:
+            r = await http_clients.get(SUPERMEMORY).post(url, headers=self.headers, json=payload)
             r.raise_for_status()
             return r.json()
+
+        async def _guarded_search() -> Dict[str, Any]:
+            # Bounded by the retrieval deadline / circuit breaker; raises instead of waiting out a slow upstream
+            result = await retrieval_guard.call(_search)
+            search_cache.set(cache_key, result, generation)
+            return result
+
+        # Identical searches already in flight (retries, double submits) are joined, not repeated
+        return await search_flights.do(cache_key, _guarded_search)
@@ -1,7 +1,12 @@
 # // app/services/memory_router_client.py
-from typing import List, Dict, Optional, Any
-from openai import OpenAI
+from collections import OrderedDict
+from typing import TYPE_CHECKING, List, Dict, Optional, Any
 from app.core.config import settings
+from app.services.http_clients import LLM, http_clients
+
+if TYPE_CHECKING:
+    from openai import AsyncStream
+    from openai.types.chat import ChatCompletionChunk
 
 
 
@@ -18,35 +23,69 @@ class MemoryRouterClient:
         if not settings.SUPERMEMORY_API_KEY:
             raise RuntimeError("Missing SUPERMEMORY_API_KEY")
 
-        self.client = OpenAI(
+        # Imported on first use (slow to import), see app.services.llm_client
+        from openai import AsyncOpenAI
+
+        # All router clients share the pooled LLM transport; only the default headers differ
+        self.transport = http_clients.get(LLM)
+        self.client = AsyncOpenAI(
             api_key=settings.OPENAI_API_KEY,
             base_url=_router_base_url(),
             default_headers={
                 "x-supermemory-api-key": settings.SUPERMEMORY_API_KEY,
                 "x-sm-user-id": user_id,   # critical for isolating memory per user
             },
+            http_client=self.transport,
         )
 
-    def chat(
+    async def chat(
         self,
         messages: List[Dict[str, str]],
         model: Optional[str] = None,
-        conversation_id: Optional[str] = None,
     ) -> Dict[str, Any]:
-        extra_headers = {}
-        if conversation_id:
-            # Persist conversation state via router header
-            extra_headers["x-sm-conversation-id"] = conversation_id
-
-        resp = self.client.chat.completions.create(
+        """
+        One completion over `messages`, which already hold any stored conversation history (the
+        router's own x-sm-conversation-id state is not used, so the history isn't sent twice).
+        """
+        resp = await self.client.chat.completions.create(
             model=(model or settings.SM_DEFAULT_MODEL),
             messages=messages,
-            extra_headers=extra_headers or None,
         )
-        # Normalize a small JSON
+        # Normalize a small JSON (the route adds conversation_id from the conversation store)
         content = resp.choices[0].message.content if resp.choices else ""
         return {
             "content": content,
-            "conversation_id": conversation_id,  # echo if provided
             "usage": getattr(resp, "usage", None)
         }
+
+    async def chat_stream(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+    ) -> "AsyncStream[ChatCompletionChunk]":
+        """Start a streamed completion; the caller relays and closes the returned stream."""
+        return await self.client.chat.completions.create(
+            model=(model or settings.SM_DEFAULT_MODEL),
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+
+
+# Bounded LRU of per-user router clients (each carries its own x-sm-user-id header)
+_router_clients: "OrderedDict[str, MemoryRouterClient]" = OrderedDict()
+
+
+def get_router_client(user_id: str) -> MemoryRouterClient:
+    """Return a cached MemoryRouterClient for this user, evicting the least recently used."""
+    client = _router_clients.get(user_id)
+    if client is not None and client.transport is http_clients.get(LLM):
+        _router_clients.move_to_end(user_id)
+        return client
+
+    client = MemoryRouterClient(user_id=user_id)
+    _router_clients[user_id] = client
+    _router_clients.move_to_end(user_id)
+    while len(_router_clients) > settings.ROUTER_CLIENT_POOL_SIZE:
+        _router_clients.popitem(last=False)
+    return client
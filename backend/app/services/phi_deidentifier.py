@@ -0,0 +1,137 @@
+# app/services/phi_deidentifier.py
+"""
+In-process PHI de-identification for plain-text uploads.
+
+Text needs no OCR, so instead of a round trip to the PHI-stripper Lambda the `raw_text` path can
+redact identifiers locally and write straight to Supermemory. All rules are compiled into a single
+regex and applied in one pass; each match is replaced by a category placeholder such as [NAME].
+
+Name dictionaries are pluggable: every file in PHI_DICTIONARY_PATHS (plus the bundled
+phi_dictionaries/first_names.txt) contributes case-sensitive terms, compiled into a trie-shaped
+alternation so lookups stay fast as dictionaries grow. Labels such as "MRN:" are kept and only the
+value after them is redacted.
+"""
+import logging
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.text_patterns import trie_regex
+
+logger = logging.getLogger(__name__)
+
+_BUNDLED_DICTIONARIES = [Path(__file__).parent / "phi_dictionaries" / "first_names.txt"]
+
+_MONTH = (
+    r"(?:Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|Jun(?:e)?|Jul(?:y)?|Aug(?:ust)?"
+    r"|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)"
+)
+_STATE = (
+    r"(?:AL|AK|AZ|AR|CA|CO|CT|DE|DC|FL|GA|HI|ID|IL|IN|IA|KS|KY|LA|ME|MD|MA|MI|MN|MS|MO|MT|NE|NV|NH"
+    r"|NJ|NM|NY|NC|ND|OH|OK|OR|PA|RI|SC|SD|TN|TX|UT|VT|VA|WA|WV|WI|WY)"
+)
+_STREET = (
+    r"(?:Street|St|Avenue|Ave|Road|Rd|Boulevard|Blvd|Lane|Ln|Drive|Dr|Court|Ct|Way|Place|Pl"
+    r"|Terrace|Ter|Circle|Cir|Parkway|Pkwy|Highway|Hwy)"
+)
+_CAPWORD = r"[A-Z][a-zA-Z'\-]+"
+_NAMEWORD = r"[A-Z][a-z'\-]+"  # title case only, so "John Smith  MRN" stops before the label
+
+# (category, pattern). A `(?P<value>...)` group limits redaction to that part of the match.
+# Order matters: earlier alternatives win when several could match at the same position.
+_RULES: List[Tuple[str, str]] = [
+    ("EMAIL", r"\b[\w.+\-]+@[\w\-]+(?:\.[\w\-]+)+\b"),
+    ("SSN", r"\b\d{3}-\d{2}-\d{4}\b"),
+    ("SSN", r"(?i:\b(?:SSN|social security(?: number| no\.?)?)\s*[:#]?\s*)(?P<value>\d{9}|\d{3} \d{2} \d{4})\b"),
+    ("MRN", r"(?i:\b(?:MRN|medical record(?: number| no\.?| #)?|patient id|(?:acct|account)(?: number| no\.?| #)?)\s*[:#]?\s*)"
+            r"(?P<value>[A-Z0-9][A-Z0-9\-]{3,})\b"),
+    ("PHONE", r"(?:\+?1[\s.\-]?)?(?:\(\d{3}\)\s?|\b\d{3}[\s.\-])\d{3}[\s.\-]\d{4}\b"),
+    ("DATE", r"\b\d{4}-\d{1,2}-\d{1,2}\b"),
+    # Same separator twice and no trailing decimal, so ranges like "13.5-17.5" are left alone
+    ("DATE", r"\b\d{1,2}(?:/\d{1,2}/|-\d{1,2}-)(?:\d{4}|\d{2})\b(?!\.\d)"),
+    ("DATE", r"\b\d{1,2}\.\d{1,2}\.\d{4}\b"),
+    ("DATE", r"(?i:\b" + _MONTH + r"\.?\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4}\b)"),
+    ("DATE", r"(?i:\b\d{1,2}(?:st|nd|rd|th)?\s+" + _MONTH + r"\.?,?\s+\d{4}\b)"),
+    ("ADDRESS", r"\b\d{1,6}\s+(?:" + _CAPWORD + r"\s+){1,4}" + _STREET + r"\b\.?"
+                r"(?:,?\s*(?:Apt|Suite|Unit|#)\.?\s*[\w\-]+)?"),
+    ("ADDRESS", r"\b(?:" + _CAPWORD + r"(?:\s" + _CAPWORD + r")*,\s*)?" + _STATE + r"\s+\d{5}(?:-\d{4})?\b"),
+    ("NAME", r"\b(?:Mr|Mrs|Ms|Miss|Dr|Prof)\.?[ \t]+(?P<value>" + _NAMEWORD + r"(?:[ \t]" + _NAMEWORD + r")?)"),
+    ("NAME", r"(?i:\b(?:patient(?: name)?|name|physician|provider|ordered by|referring(?: physician)?)[ \t]*:[ \t]*)"
+             r"(?P<value>" + _NAMEWORD + r"(?:,[ \t]" + _NAMEWORD + r"|(?:[ \t]" + _NAMEWORD + r"){0,2}))"),
+]
+
+
+def load_dictionary(path: Path) -> List[str]:
+    """One term per line; blank lines and # comments are ignored."""
+    terms = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        line = line.strip()
+        if line and not line.startswith("#"):
+            terms.append(line)
+    return terms
+
+
+class PHIDeidentifier:
+    def __init__(self, name_terms: Iterable[str] = ()):
+        self._name_terms = set(name_terms)
+        self._compile()
+
+    def add_name_terms(self, terms: Iterable[str]) -> None:
+        """Extend the name dictionary at runtime and recompile."""
+        self._name_terms.update(terms)
+        self._compile()
+
+    def _compile(self) -> None:
+        rules = list(_RULES)
+        if self._name_terms:
+            rules.append(("NAME", r"\b" + trie_regex(self._name_terms) + r"\b(?:[ \t]" + _NAMEWORD + r"\b)?"))
+
+        parts = []
+        self._categories: Dict[str, str] = {}
+        for i, (category, pattern) in enumerate(rules):
+            group = f"r{i}"
+            parts.append(f"(?P<{group}>{pattern.replace('(?P<value>', f'(?P<{group}v>')})")
+            self._categories[group] = category
+        # Every rule starts at a word boundary; checking that once up front lets the scanner skip
+        # mid-word positions without trying each alternative
+        self._pattern = re.compile(r"(?<!\w)(?:" + "|".join(parts) + ")")
+
+    def deidentify(self, text: str) -> Tuple[str, Dict[str, int]]:
+        """Return (redacted text, number of redactions per category)."""
+        counts: Dict[str, int] = {}
+
+        def replace(m: re.Match) -> str:
+            group = m.lastgroup
+            category = self._categories[group]
+            counts[category] = counts.get(category, 0) + 1
+            placeholder = f"[{category}]"
+            value_group = group + "v"
+            if value_group in m.re.groupindex and m.group(value_group) is not None:
+                # Keep the label ("MRN: ", "Dr. ") and redact only the identifier
+                start, end = m.span(value_group)
+                whole = m.group(0)
+                offset = m.start()
+                return whole[: start - offset] + placeholder + whole[end - offset:]
+            return placeholder
+
+        return self._pattern.sub(replace, text), counts
+
+
+def _configured_dictionaries() -> List[Path]:
+    extra = [Path(p.strip()) for p in settings.PHI_DICTIONARY_PATHS.split(",") if p.strip()]
+    return _BUNDLED_DICTIONARIES + extra
+
+
+def build_default_deidentifier(paths: Optional[List[Path]] = None) -> PHIDeidentifier:
+    terms: List[str] = []
+    for path in paths if paths is not None else _configured_dictionaries():
+        try:
+            terms.extend(load_dictionary(path))
+        except OSError as e:
+            logger.warning(f"Could not load PHI dictionary {path}: {e}")
+    return PHIDeidentifier(terms)
+
+
+# Singleton instance
+deidentifier = build_default_deidentifier()
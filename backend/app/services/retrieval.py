@@ -0,0 +1,103 @@
+# app/services/retrieval.py
+"""
+Document retrieval for /api/chat from the local index, Supermemory search, or both (RETRIEVAL_MODE):
+
+    remote       Supermemory only
+    local_first  the local index; Supermemory is asked too only when the index has fewer than `limit` hits
+    merge        both at once
+    local        the local index only
+
+Results from both sides are fused by reciprocal rank, since BM25 scores and Supermemory similarities
+aren't comparable. If one side fails the other's results are used; only when nothing could be
+searched does the call raise.
+"""
+import asyncio
+import logging
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.services.local_index import local_index
+from app.services.memory_api_client import MemoryAPIClient
+
+logger = logging.getLogger(__name__)
+
+REMOTE = "remote"
+LOCAL_FIRST = "local_first"
+MERGE = "merge"
+LOCAL = "local"
+
+# Reciprocal rank fusion constant (the usual value; damps the weight of the very top ranks)
+_RRF_K = 60
+
+answered_by: Dict[str, int] = {"local": 0, "remote": 0, "merged": 0}
+
+
+def supermemory_configured() -> bool:
+    return bool(settings.SUPERMEMORY_API_KEY) and settings.SUPERMEMORY_API_KEY != "your_supermemory_api_key_here"
+
+
+def retrieval_available() -> bool:
+    return supermemory_configured() or (local_index.enabled and settings.RETRIEVAL_MODE != REMOTE)
+
+
+def fuse(result_lists: List[List[Dict[str, Any]]], limit: int) -> List[Dict[str, Any]]:
+    """Reciprocal rank fusion; the same text from both sides counts once, with both ranks."""
+    fused: Dict[str, Dict[str, Any]] = {}
+    for results in result_lists:
+        for rank, result in enumerate(results):
+            text = (result.get("memory") or "").strip()
+            if not text:
+                continue
+            entry = fused.setdefault(text, {**result, "score": 0.0})
+            entry["score"] += 1.0 / (_RRF_K + rank + 1)
+    ranked = sorted(fused.values(), key=lambda r: r["score"], reverse=True)[:limit]
+    for result in ranked:
+        result["score"] = round(result["score"], 6)
+        result.pop("similarity", None)  # the packer ranks by similarity first; use the fused score
+    return ranked
+
+
+def _response(results: List[Dict[str, Any]], source: str) -> Dict[str, Any]:
+    answered_by[source] += 1
+    return {"results": results, "total": len(results), "source": source}
+
+
+async def search_documents(query: str, container_tag: str, limit: int = 5) -> Dict[str, Any]:
+    """Search the user's documents; same response shape as Supermemory's v4 search plus `source`."""
+    mode = settings.RETRIEVAL_MODE
+    remote = supermemory_configured()
+    if mode == REMOTE or not local_index.enabled:
+        result = await MemoryAPIClient().search_documents(query=query, container_tag=container_tag, limit=limit)
+        answered_by["remote"] += 1
+        return result
+
+    if mode == MERGE and remote:
+        local_results, remote_response = await asyncio.gather(
+            local_index.search(container_tag, query, limit),
+            MemoryAPIClient().search_documents(query=query, container_tag=container_tag, limit=limit),
+            return_exceptions=True,
+        )
+        if isinstance(remote_response, BaseException):
+            if local_results is None:
+                raise remote_response
+            logger.warning(f"Supermemory search failed, using local results only: {remote_response}")
+            return _response(local_results, "local")
+        if not local_results:
+            return _response(remote_response.get("results", []), "remote")
+        return _response(fuse([local_results, remote_response.get("results", [])], limit), "merged")
+
+    local_results = await local_index.search(container_tag, query, limit)
+    if mode == LOCAL or not remote or (local_results is not None and len(local_results) >= limit):
+        return _response(local_results or [], "local")
+
+    # Too few local hits (or the index failed): ask Supermemory and merge in whatever we have
+    try:
+        remote_response = await MemoryAPIClient().search_documents(query=query, container_tag=container_tag, limit=limit)
+    except Exception as e:
+        if not local_results:
+            raise
+        logger.warning(f"Supermemory search failed, using local results only: {e}")
+        return _response(local_results, "local")
+    if not local_results:
+        return _response(remote_response.get("results", []), "remote")
+    return _response(fuse([local_results, remote_response.get("results", [])], limit), "merged")
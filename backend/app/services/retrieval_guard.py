@@ -0,0 +1,183 @@
+# app/services/retrieval_guard.py
+"""
+Latency bound for Supermemory search.
+
+Document context is optional for /api/chat, so a slow or failing Supermemory must cost at most a
+small, fixed amount of latency:
+  - deadline: a search not done within RETRIEVAL_DEADLINE_MS is abandoned (RetrievalDeadlineExceeded)
+  - circuit breaker: after RETRIEVAL_BREAKER_FAILURES consecutive failures or deadline misses,
+    searches are skipped outright (RetrievalUnavailable) for RETRIEVAL_BREAKER_RESET_SECONDS; then
+    a single probe request decides whether to close the breaker again
+  - hedging: if a search is still running after the recent p95 latency, an identical second
+    request is sent and whichever answers first wins (RETRIEVAL_HEDGE_ENABLED)
+The caller treats both exceptions like any other search failure and answers without context.
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class RetrievalUnavailable(Exception):
+    """The circuit breaker is open; the search was not attempted."""
+
+
+class RetrievalDeadlineExceeded(Exception):
+    """The search did not finish within the retrieval deadline."""
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.times_opened = 0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.failure_threshold <= 0 or self.state == BREAKER_CLOSED:
+            return True
+        if self.state == BREAKER_OPEN and time.monotonic() - self.opened_at >= self.reset_seconds:
+            self.state = BREAKER_HALF_OPEN
+        if self.state == BREAKER_HALF_OPEN and not self._probe_in_flight:
+            # Let exactly one request through to test the upstream
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def record_success(self) -> None:
+        if self.state != BREAKER_CLOSED:
+            logger.info("Supermemory search recovered, closing circuit breaker")
+        self.state = BREAKER_CLOSED
+        self.consecutive_failures = 0
+        self._probe_in_flight = False
+
+    def release_probe(self) -> None:
+        """The probe ended without an answer either way (caller cancelled); let the next request probe."""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        self._probe_in_flight = False
+        if self.state == BREAKER_HALF_OPEN or (
+            self.state == BREAKER_CLOSED and 0 < self.failure_threshold <= self.consecutive_failures
+        ):
+            if self.state == BREAKER_CLOSED:
+                logger.warning(
+                    f"Supermemory search failed {self.consecutive_failures} times in a row, "
+                    f"skipping it for {self.reset_seconds:.0f}s"
+                )
+            self.state = BREAKER_OPEN
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+
+
+class RetrievalGuard:
+    def __init__(self):
+        self.breaker = CircuitBreaker(settings.RETRIEVAL_BREAKER_FAILURES, settings.RETRIEVAL_BREAKER_RESET_SECONDS)
+        self._latencies: Deque[float] = deque(maxlen=256)  # seconds, successful upstream calls only
+        self.calls = 0
+        self.failures = 0
+        self.deadline_misses = 0
+        self.skipped = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def _percentile(self, q: float) -> Optional[float]:
+        if not self._latencies:
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def _hedge_delay(self, deadline: float) -> Optional[float]:
+        if not settings.RETRIEVAL_HEDGE_ENABLED or len(self._latencies) < settings.RETRIEVAL_HEDGE_MIN_SAMPLES:
+            return None
+        p95 = self._percentile(0.95)
+        # A hedge that can't finish before the deadline only adds load
+        return p95 if p95 is not None and p95 < deadline / 2 else None
+
+    async def call(self, request: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `request` (an upstream search) under the deadline, breaker and hedging policy."""
+        if not self.breaker.allow():
+            self.skipped += 1
+            raise RetrievalUnavailable("circuit breaker open")
+
+        self.calls += 1
+        deadline = settings.RETRIEVAL_DEADLINE_MS / 1000
+        started = time.monotonic()
+        primary = asyncio.create_task(request())
+        tasks: Set[asyncio.Task] = {primary}
+        hedge_at = self._hedge_delay(deadline)
+        error: Optional[BaseException] = None
+        try:
+            while tasks:
+                elapsed = time.monotonic() - started
+                if elapsed >= deadline:
+                    break
+                timeout = deadline - elapsed
+                if hedge_at is not None:
+                    timeout = min(timeout, max(0.0, hedge_at - elapsed))
+                done, _ = await asyncio.wait(tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    tasks.discard(task)
+                    if task.exception() is None:
+                        self._latencies.append(time.monotonic() - started)
+                        self.breaker.record_success()
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+                if not done and hedge_at is not None and time.monotonic() - started >= hedge_at:
+                    # Slower than the recent p95: send one identical backup request, first answer wins
+                    hedge_at = None
+                    self.hedges += 1
+                    tasks.add(asyncio.create_task(request()))
+        except asyncio.CancelledError:
+            # The caller went away (e.g. the chat client disconnected). That says nothing about
+            # Supermemory, but a half-open probe must give its slot back or no request would ever
+            # be let through again
+            self.breaker.release_probe()
+            raise
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        self.breaker.record_failure()
+        if not tasks:
+            # Every attempt failed outright
+            self.failures += 1
+            raise error
+        self.deadline_misses += 1
+        raise RetrievalDeadlineExceeded(f"no answer within {settings.RETRIEVAL_DEADLINE_MS:.0f}ms")
+
+    def stats(self) -> Dict[str, Any]:
+        p50, p95 = self._percentile(0.5), self._percentile(0.95)
+        return {
+            "breaker_state": self.breaker.state,
+            "breaker_consecutive_failures": self.breaker.consecutive_failures,
+            "breaker_times_opened": self.breaker.times_opened,
+            "deadline_ms": settings.RETRIEVAL_DEADLINE_MS,
+            "calls": self.calls,
+            "failures": self.failures,
+            "deadline_misses": self.deadline_misses,
+            "skipped_breaker_open": self.skipped,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "latency_p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "latency_p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+        }
+
+
+# Singleton instance
+retrieval_guard = RetrievalGuard()
@@ -0,0 +1,130 @@
+# app/services/search_cache.py
+"""
+Per-user TTL + LRU cache in front of MemoryAPIClient.search_documents.
+
+Keys are (supermemory_user_id, normalized query, limit). All of a user's entries are dropped
+whenever that user adds content (document upload or /memory/add). Supermemory only queues a new
+document for indexing, though, so a search right after an upload can still miss it; for
+SEARCH_CACHE_SETTLE_SECONDS after each add, that user's searches are answered but not cached.
+"""
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Set, Tuple
+
+from app.core.config import settings
+
+_WS = re.compile(r"\s+")
+
+CacheKey = Tuple[str, str, int]
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation."""
+    return _WS.sub(" ", query).strip().lower().rstrip("?!.,;: ")
+
+
+class SearchCache:
+    def __init__(self, max_entries: int, ttl_seconds: float, settle_seconds: float = 0.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.settle_seconds = settle_seconds
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._by_user: Dict[str, Set[CacheKey]] = {}
+        # Bumped on every invalidation so searches that started earlier don't re-fill stale results
+        self._generation: Dict[str, int] = {}
+        # user -> monotonic time until which their results may predate a queued document
+        self._settling_until: Dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.settling_skips = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    @staticmethod
+    def key(user_id: str, query: str, limit: int) -> CacheKey:
+        return (user_id, normalize_query(query), limit)
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def generation(self, user_id: str) -> int:
+        return self._generation.get(user_id, 0)
+
+    def set(self, key: CacheKey, value: Dict[str, Any], generation: int) -> None:
+        if not self.enabled or generation != self.generation(key[0]):
+            return
+        now = time.monotonic()
+        settling_until = self._settling_until.get(key[0])
+        if settling_until is not None:
+            if now < settling_until:
+                self.settling_skips += 1
+                return
+            del self._settling_until[key[0]]
+        self._entries[key] = (now + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        self._by_user.setdefault(key[0], set()).add(key)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Drop every cached search for this user (called after they add content)."""
+        self._generation[user_id] = self.generation(user_id) + 1
+        if self.settle_seconds > 0:
+            self._settling_until[user_id] = time.monotonic() + self.settle_seconds
+        keys = self._by_user.pop(user_id, set())
+        for key in keys:
+            self._entries.pop(key, None)
+        if keys:
+            self.invalidations += 1
+
+    def _remove(self, key: CacheKey) -> None:
+        self._entries.pop(key, None)
+        user_keys = self._by_user.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._by_user[key[0]]
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "settle_seconds": self.settle_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "settling_skips": self.settling_skips,
+        }
+
+
+# Singleton instance shared by all MemoryAPIClient instances
+search_cache = SearchCache(
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS,
+    settle_seconds=settings.SEARCH_CACHE_SETTLE_SECONDS,
+)
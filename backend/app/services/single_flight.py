@@ -0,0 +1,87 @@
+# app/services/single_flight.py
+"""
+Single-flight coalescing of identical concurrent upstream calls.
+
+Aggressive client retries and double submits produce the same search, memory write, Lambda call or
+completion several times at once. Callers passing the same key to SingleFlight.do() while a call
+is in flight share that one upstream call and all receive its result (or its exception).
+
+Cancellation is per caller: a caller that goes away (client disconnect, timeout) stops waiting
+without disturbing the others; the upstream call itself is cancelled only once nobody is waiting
+for it any more. Coalescing is per process; nothing is cached once the call has finished.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    def __init__(self, name: str):
+        self.name = name
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.calls = 0
+        self.executions = 0
+        self.collapsed = 0
+        self.abandoned = 0
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        """Run `call()`, or join the identical call already in flight under `key`."""
+        self.calls += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight(asyncio.ensure_future(call()))
+            flight.task.add_done_callback(lambda task: self._finished(key, flight))
+            self.executions += 1
+        else:
+            self.collapsed += 1
+
+        flight.waiters += 1
+        try:
+            # shield: cancelling one caller must not cancel the call the others are waiting on
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Every caller gave up; stop the upstream call and let the next caller start afresh
+                self.abandoned += 1
+                self._forget(key, flight)
+                flight.task.cancel()
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _finished(self, key: Hashable, flight: _Flight) -> None:
+        self._forget(key, flight)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "upstream_calls": self.executions,
+            "collapsed": self.collapsed,
+            "abandoned": self.abandoned,
+            "in_flight": len(self._flights),
+        }
+
+
+search_flights = SingleFlight("supermemory_search")
+memory_write_flights = SingleFlight("supermemory_add")
+lambda_flights = SingleFlight("phi_lambda")
+upload_flights = SingleFlight("document_upload")
+completion_flights = SingleFlight("chat_completion")
+
+
+def single_flight_stats() -> Dict[str, Dict[str, Any]]:
+    return {
+        flights.name: flights.stats()
+        for flights in (search_flights, memory_write_flights, lambda_flights, upload_flights, completion_flights)
+    }
@@ -0,0 +1,139 @@
+# benchmarks/cold_start.py
+"""
+Cold-start import cost of the Lambda entry point (app.lambda_handler), measured locally.
+
+    python -m benchmarks.cold_start                        # 5 fresh interpreters, 1500ms budget
+    python -m benchmarks.cold_start --runs 10 --budget-ms 1200 --top 30
+
+Each run imports the handler in a fresh `python -X importtime` interpreter with the Lambda
+environment variable set, and parses the per-module timings it prints. The report shows the median
+total import time, the slowest modules (cumulative and self time) and the time per top-level
+package. A final in-process check sends two API Gateway events through the handler to show the
+first (cold) and second (warm) invocation latency.
+
+Exits non-zero if the median import time exceeds --budget-ms or if any module that should only load
+on first use (the OpenAI SDK, passlib/bcrypt, the database drivers, Pillow, brotli, httpx) was
+imported at startup.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, NamedTuple
+
+# Loaded lazily by the app; importing any of these at startup is a regression
+DEFERRED_MODULES = ("openai", "passlib", "bcrypt", "aiosqlite", "asyncpg", "psycopg2", "PIL", "brotli", "httpx")
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--runs", type=int, default=5, help="fresh interpreters to import the handler in")
+parser.add_argument("--budget-ms", type=float, default=1500.0, help="fail if the median import time exceeds this")
+parser.add_argument("--top", type=int, default=20, help="modules to list")
+parser.add_argument("--module", default="app.lambda_handler")
+
+
+class ModuleTime(NamedTuple):
+    name: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def _import_once(module: str) -> List[ModuleTime]:
+    env = dict(os.environ, AWS_LAMBDA_FUNCTION_NAME="cold-start-benchmark", PYTHONDONTWRITEBYTECODE="1")
+    env.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret-key")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        sys.exit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    modules = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules.append(ModuleTime(name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return modules
+
+
+def _invocations() -> Dict[str, float]:
+    """Cold vs warm latency of the handler itself, in this process (import excluded)."""
+    os.environ.setdefault("AWS_LAMBDA_FUNCTION_NAME", "cold-start-benchmark")
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret-key")
+    from app.lambda_handler import handler
+
+    event = {
+        "version": "2.0",
+        "routeKey": "GET /health",
+        "rawPath": "/health",
+        "rawQueryString": "",
+        "headers": {"host": "localhost", "x-forwarded-proto": "https", "x-forwarded-port": "443"},
+        "requestContext": {
+            "http": {"method": "GET", "path": "/health", "protocol": "HTTP/1.1", "sourceIp": "127.0.0.1"},
+            "stage": "$default",
+        },
+        "isBase64Encoded": False,
+    }
+    context = type("Context", (), {"aws_request_id": "cold-start-benchmark"})()
+    timings = {}
+    for label in ("first_invocation_ms", "warm_invocation_ms"):
+        started = time.perf_counter()
+        response = handler(event, context)
+        timings[label] = round((time.perf_counter() - started) * 1000, 2)
+        if response["statusCode"] != 200:
+            sys.exit(f"handler returned {response['statusCode']}: {response.get('body')}")
+    return timings
+
+
+def main() -> None:
+    args = parser.parse_args()
+    runs = [_import_once(args.module) for _ in range(args.runs)]
+    totals = [sum(m.self_us for m in run) / 1000 for run in runs]
+    median_ms = statistics.median(totals)
+
+    # Per-module figures from the run closest to the median
+    run = min(runs, key=lambda r: abs(sum(m.self_us for m in r) / 1000 - median_ms))
+    by_package: Dict[str, int] = defaultdict(int)
+    for m in run:
+        by_package[m.name.split(".")[0]] += m.self_us
+    loaded = {m.name.split(".")[0] for m in run}
+    eager = [name for name in DEFERRED_MODULES if name in loaded]
+
+    print(f"import {args.module}: median {median_ms:.0f}ms over {args.runs} runs "
+          f"(min {min(totals):.0f}ms, max {max(totals):.0f}ms), budget {args.budget_ms:.0f}ms")
+    print(f"\nslowest modules by cumulative time (top {args.top}):")
+    for m in sorted(run, key=lambda m: -m.cumulative_us)[:args.top]:
+        print(f"  {m.cumulative_us / 1000:8.1f}ms  {'  ' * m.depth}{m.name}")
+    print(f"\nslowest modules by self time (top {args.top}):")
+    for m in sorted(run, key=lambda m: -m.self_us)[:args.top]:
+        print(f"  {m.self_us / 1000:8.1f}ms  {m.name}")
+    print("\nself time per top-level package:")
+    for name, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"  {us / 1000:8.1f}ms  {name}")
+
+    invocations = _invocations()
+    print(f"\nhandler: {json.dumps(invocations)}")
+
+    failures = []
+    if median_ms > args.budget_ms:
+        failures.append(f"median import time {median_ms:.0f}ms exceeds the {args.budget_ms:.0f}ms budget")
+    if eager:
+        failures.append(f"imported at startup but should load on first use: {', '.join(eager)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+# benchmarks/image_normalization.py
+"""
+Image normalization before OCR (app.services.image_normalizer): bytes saved and end-to-end upload
+latency with normalization on and off.
+
+    python -m benchmarks.image_normalization                       # 8 photos, 2 screenshots
+    python -m benchmarks.image_normalization --photos 20 --lambda-ms-per-mb 400
+    python -m benchmarks.image_normalization --route base64        # POST /upload-document instead
+
+The sample corpus is generated: phone photos of printed lab reports (12MP, warm paper on a tinted
+background, uneven lighting, sensor noise, stored sideways with an EXIF orientation tag, JPEG q92,
+some saved as PNG) and portal screenshots (flat PNG, under IMAGE_NORMALIZE_MIN_BYTES so sent as they
+are). Each image is uploaded through the app to the
+stub Lambda, once with IMAGE_NORMALIZE_ENABLED off and once on (as different users, so upload
+deduplication doesn't short-circuit the second pass). The stub's latency is fixed plus a cost per MB
+of request body, standing in for the upload to API Gateway and OCR time; real OCR time also grows
+with pixel count, which this doesn't model.
+
+Per image the bytes sent to the Lambda, time in the normalization pool, and end-to-end latency for
+both passes are printed, then the totals.
+"""
+import argparse
+import asyncio
+import base64
+import io
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from typing import Dict, List, Tuple
+
+from benchmarks.upstream_stubs import PHI_LAMBDA, StubConfig, start_stubs
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--photos", type=int, default=8, help="phone photos in the corpus (every 4th saved as PNG)")
+parser.add_argument("--screenshots", type=int, default=2, help="portal screenshots (PNG) in the corpus")
+parser.add_argument("--route", choices=("file", "base64"), default="file",
+                    help="multipart /upload-file or JSON /upload-document")
+parser.add_argument("--lambda-latency-ms", type=float, default=300.0, help="fixed stub Lambda latency")
+parser.add_argument("--lambda-ms-per-mb", type=float, default=250.0, help="stub Lambda latency per MB of request")
+parser.add_argument("--seed", type=int, default=7)
+args = parser.parse_args()
+
+_workdir = tempfile.mkdtemp(prefix="medesense-images-")
+_stub_env, _stub_counters, _stop_stubs = start_stubs(
+    {PHI_LAMBDA: StubConfig(latency_ms=args.lambda_latency_ms, ms_per_mb=args.lambda_ms_per_mb)}
+)
+os.environ.update(_stub_env)
+os.environ.update(
+    ADMISSION_ENABLED="false",
+    HTTP_WARM_ON_STARTUP="false",
+    PHI_TEXT_MODE="lambda",
+    COMPLETION_CACHE_PATH=f"{_workdir}/completion_cache.db",
+    LOCAL_INDEX_PATH=f"{_workdir}/local_index.db",
+    DATABASE_URL=f"sqlite+aiosqlite:///{_workdir}/images.db",
+)
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret-key")
+
+import httpx  # noqa: E402
+from PIL import Image, ImageChops, ImageDraw, ImageFont  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.db.init_db import init_db  # noqa: E402
+from app.db.session import async_session  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.image_normalizer import image_normalizer  # noqa: E402
+
+_ANALYTES = ("Ferritin", "Hemoglobin", "TSH", "LDL Cholesterol", "HbA1c", "Creatinine", "Sodium", "Vitamin D",
+             "CRP", "ALT", "Platelets", "Potassium")
+_UNITS = ("ng/mL", "g/dL", "mIU/L", "mg/dL", "%", "mmol/L", "U/L", "10^3/uL")
+
+
+def _report_lines(rng: random.Random, count: int) -> List[str]:
+    lines = [
+        "CITY GENERAL HOSPITAL - LABORATORY REPORT",
+        f"Patient: Jane Doe   MRN: {rng.randint(10**6, 10**7)}   DOB: {rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/19{rng.randint(40, 99)}",
+        f"Collected: {rng.randint(1, 28):02d}/{rng.randint(1, 12):02d}/2025   Accession: {uuid.uuid4().hex[:12].upper()}",
+        "",
+        f"{'Test':<20}{'Result':>10}  {'Units':<10}{'Reference':>12}",
+    ]
+    for _ in range(count):
+        low = rng.randint(1, 50)
+        lines.append(f"{rng.choice(_ANALYTES):<20}{rng.uniform(0.1, 400):>10.1f}  {rng.choice(_UNITS):<10}"
+                     f"{f'{low}-{low + rng.randint(10, 400)}':>12}")
+    return lines
+
+
+def _encode(image: Image.Image, fmt: str, **params) -> bytes:
+    out = io.BytesIO()
+    image.save(out, fmt, **params)
+    return out.getvalue()
+
+
+def _photo(rng: random.Random, as_png: bool) -> bytes:
+    """A 12MP phone photo of a printed report, stored sideways with EXIF orientation 6."""
+    width, height = 3024, 4032
+    photo = Image.new("RGB", (width, height), (rng.randint(90, 140), rng.randint(70, 110), rng.randint(50, 90)))
+    page = Image.new("RGB", (2550, 3300), (248, 244, 232))
+    draw = ImageDraw.Draw(page)
+    font = ImageFont.load_default(size=46)
+    for i, line in enumerate(_report_lines(rng, 40)):
+        draw.text((170, 200 + i * 70), line, fill=(35, 35, 45), font=font)
+    page = page.rotate(rng.uniform(-3, 3), resample=Image.Resampling.BICUBIC, expand=True, fillcolor=photo.getpixel((0, 0)))
+    photo.paste(page, ((width - page.width) // 2, (height - page.height) // 2))
+    # Uneven lighting, then sensor noise
+    shade = Image.linear_gradient("L").resize((width, height)).point(lambda v: 175 + v * 80 // 255)
+    photo = ImageChops.multiply(photo, Image.merge("RGB", (shade, shade, shade)))
+    noise = Image.effect_noise((width, height), 40).convert("RGB")
+    photo = Image.blend(photo, noise, 0.1)
+    stored = photo.transpose(Image.Transpose.ROTATE_90)
+    if as_png:
+        return _encode(stored, "PNG")
+    exif = Image.Exif()
+    exif[0x0112] = 6
+    return _encode(stored, "JPEG", quality=92, exif=exif.tobytes())
+
+
+def _screenshot(rng: random.Random) -> bytes:
+    """A phone screenshot of a patient portal results page: flat colors, already compact as PNG."""
+    shot = Image.new("RGB", (1179, 2556), (255, 255, 255))
+    draw = ImageDraw.Draw(shot)
+    draw.rectangle((0, 0, 1179, 260), fill=(20, 90, 160))
+    font = ImageFont.load_default(size=34)
+    for i, line in enumerate(_report_lines(rng, 28)):
+        draw.text((40, 320 + i * 64), line.strip(), fill=(30, 30, 30), font=font)
+    return _encode(shot, "PNG")
+
+
+def _corpus(rng: random.Random) -> List[Tuple[str, bytes]]:
+    corpus = [(f"photo-{i}.{'png' if i % 4 == 3 else 'jpg'}", _photo(rng, as_png=i % 4 == 3)) for i in range(args.photos)]
+    corpus += [(f"screenshot-{i}.png", _screenshot(rng)) for i in range(args.screenshots)]
+    return corpus
+
+
+async def _token() -> str:
+    async with async_session() as db:
+        user = User(
+            email=f"images_{uuid.uuid4().hex[:12]}@example.com",
+            hashed_password="x",
+            supermemory_user_id=f"medesense_user_{uuid.uuid4().hex[:16]}",
+        )
+        db.add(user)
+        await db.commit()
+    return create_access_token({"sub": str(user.id)})
+
+
+async def _upload(client: httpx.AsyncClient, token: str, name: str, data: bytes) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    started = time.perf_counter()
+    if args.route == "file":
+        mime = "image/png" if name.endswith(".png") else "image/jpeg"
+        r = await client.post("/api/documents/upload-file", files={"file": (name, data, mime)}, headers=headers)
+    else:
+        r = await client.post(
+            "/api/documents/upload-document",
+            json={"image_base64": base64.b64encode(data).decode("ascii")},
+            headers=headers,
+        )
+    elapsed = (time.perf_counter() - started) * 1000
+    r.raise_for_status()
+    return elapsed
+
+
+async def run() -> None:
+    started = time.perf_counter()
+    corpus = _corpus(random.Random(args.seed))
+    print(f"corpus: {len(corpus)} images, {sum(len(d) for _, d in corpus) / 1e6:.1f} MB "
+          f"(generated in {time.perf_counter() - started:.1f}s); route: {args.route}; "
+          f"stub Lambda {args.lambda_latency_ms:.0f}ms + {args.lambda_ms_per_mb:.0f}ms/MB; "
+          f"max dimension {settings.IMAGE_MAX_DIMENSION}px, JPEG q{settings.IMAGE_JPEG_QUALITY}, "
+          f"{settings.IMAGE_NORMALIZE_WORKERS} worker(s)\n")
+
+    await init_db()
+    latency: Dict[bool, List[float]] = {False: [], True: []}
+    sent: Dict[bool, List[int]] = {False: [], True: []}
+    print(f"{'image':18} {'pixels':>11} {'bytes in':>10} {'bytes sent':>11} {'saved':>6} "
+          f"{'norm ms':>8} {'e2e off ms':>11} {'e2e on ms':>10} {'change':>7}")
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            tokens = {enabled: await _token() for enabled in (False, True)}
+            # One untimed upload per pass so connection setup and Pillow's import aren't charged to the first image
+            for enabled in (False, True):
+                settings.IMAGE_NORMALIZE_ENABLED = enabled
+                await _upload(client, await _token(), corpus[0][0], corpus[0][1])
+
+            for name, data in corpus:
+                with Image.open(io.BytesIO(data)) as image:
+                    pixels = f"{image.width}x{image.height}"
+                for enabled in (False, True):
+                    settings.IMAGE_NORMALIZE_ENABLED = enabled
+                    saved, seconds = image_normalizer.bytes_in - image_normalizer.bytes_out, image_normalizer.seconds_total
+                    latency[enabled].append(await _upload(client, tokens[enabled], name, data))
+                    sent[enabled].append(len(data) - (image_normalizer.bytes_in - image_normalizer.bytes_out - saved))
+                    normalize_ms = (image_normalizer.seconds_total - seconds) * 1000
+                off, on = latency[False][-1], latency[True][-1]
+                print(f"{name:18} {pixels:>11} {len(data):10d} {sent[True][-1]:11d} "
+                      f"{1 - sent[True][-1] / len(data):6.0%} {normalize_ms:8.0f} {off:11.0f} {on:10.0f} "
+                      f"{on / off - 1:+7.0%}")
+
+    bytes_in, bytes_sent = sum(sent[False]), sum(sent[True])
+    print(f"\nbytes to the Lambda: {bytes_in / 1e6:.1f} MB -> {bytes_sent / 1e6:.1f} MB "
+          f"({1 - bytes_sent / bytes_in:.0%} saved)")
+    for label, pick in (("mean", statistics.mean), ("median", statistics.median), ("max", max)):
+        off, on = pick(latency[False]), pick(latency[True])
+        print(f"end-to-end {label:6}: {off:7.0f}ms off -> {on:7.0f}ms on ({on / off - 1:+.0%})")
+    print(f"normalizer: {image_normalizer.stats()}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run())
+    finally:
+        _stop_stubs()
@@ -0,0 +1,336 @@
+# benchmarks/load_test.py
+"""
+Throughput and latency of the API under concurrent load, against local upstream stubs.
+
+    python -m benchmarks.load_test                                   # all scenarios, 16 clients, 10s each
+    python -m benchmarks.load_test -s chat -c 64 -d 30 --openai-latency-ms 500 --openai-jitter-ms 300
+    python -m benchmarks.load_test --compare benchmarks/results/load_test-abc1234-....json
+
+Starts the stubs from benchmarks.upstream_stubs, then the API itself under uvicorn (fresh SQLite
+database, completion cache and local index in a temp dir, so runs don't influence each other),
+registers one user per client and drives each scenario closed-loop: every client sends its next
+request as soon as the previous one is answered. --target skips starting the API and hits a running one instead;
+point its upstream URLs at the stubs printed by `python -m benchmarks.upstream_stubs`.
+
+Scenarios:
+  login          POST /api/auth/login
+  chat           POST /api/chat                       (search + context packing + OpenAI)
+  chat_complete  POST /api/chat/complete              (Supermemory router)
+  upload         POST /api/documents/upload-document  (text via the PHI Lambda)
+
+Messages and documents are unique per request, so the search, completion and dedup caches miss;
+--cacheable sends the same body every time to measure the cached path instead. Admission control is
+off in the started API (its per-user limits would turn most requests into 429s); --admission turns
+it on with the configured limits. 429s are reported as `rejected`, apart from errors.
+
+Results (RPS, p50/p95/p99, status counts, plus the commit and settings) are written as JSON to
+benchmarks/results/; --compare prints the change against an earlier file.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+from benchmarks.upstream_stubs import add_stub_arguments, describe, start_stubs, stub_configs
+
+RESULTS_DIR = Path(__file__).parent / "results"
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+PASSWORD = "load-test-password"
+
+def _question(i: int, cacheable: bool) -> str:
+    suffix = "" if cacheable else f" (request {i})"
+    return f"What does my ferritin result of 85 ng/mL mean?{suffix}"
+
+
+def _login(user: Dict[str, str], i: int, cacheable: bool) -> Dict[str, Any]:
+    return {"method": "POST", "url": "/api/auth/login", "json": {"email": user["email"], "password": PASSWORD}}
+
+
+def _chat(user: Dict[str, str], i: int, cacheable: bool) -> Dict[str, Any]:
+    return {
+        "method": "POST",
+        "url": "/api/chat",
+        "headers": user["auth"],
+        "json": {"messages": [{"role": "user", "content": _question(i, cacheable)}]},
+    }
+
+
+def _chat_complete(user: Dict[str, str], i: int, cacheable: bool) -> Dict[str, Any]:
+    return {**_chat(user, i, cacheable), "url": "/api/chat/complete"}
+
+
+def _upload(user: Dict[str, str], i: int, cacheable: bool) -> Dict[str, Any]:
+    marker = "" if cacheable else f" Accession {uuid.uuid4().hex}."
+    text = f"Lab report. Ferritin 85 ng/mL (30-400). Hemoglobin 13.9 g/dL (12-16).{marker}"
+    return {"method": "POST", "url": "/api/documents/upload-document", "headers": user["auth"], "json": {"text": text}}
+
+
+SCENARIOS = {
+    "login": _login,
+    "chat": _chat,
+    "chat_complete": _chat_complete,
+    "upload": _upload,
+}
+
+
+def _percentile(ordered: List[float], q: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 2) if seconds is not None else None
+
+
+def summarize(latencies: List[float], statuses: Dict[str, int], elapsed: float) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    total = sum(statuses.values())
+    ok = sum(count for status, count in statuses.items() if status.startswith("2"))
+    rejected = statuses.get("429", 0)
+    return {
+        "requests": total,
+        "ok": ok,
+        "rejected": rejected,
+        "rejected_rate": round(rejected / total, 4) if total else 0.0,
+        "errors": total - ok - rejected,
+        "error_rate": round((total - ok - rejected) / total, 4) if total else 0.0,
+        "statuses": dict(sorted(statuses.items())),
+        "duration_s": round(elapsed, 2),
+        "rps": round(total / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": _ms(sum(ordered) / len(ordered)) if ordered else None,
+            "p50": _ms(_percentile(ordered, 0.50)),
+            "p95": _ms(_percentile(ordered, 0.95)),
+            "p99": _ms(_percentile(ordered, 0.99)),
+            "max": _ms(ordered[-1]) if ordered else None,
+        },
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    users: List[Dict[str, str]],
+    factory: Callable[..., Dict[str, Any]],
+    duration: float,
+    warmup: float,
+    cacheable: bool,
+) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    counter = iter(range(10**12))
+    started = time.perf_counter()
+    measure_from = started + warmup
+    stop_at = measure_from + duration
+
+    async def worker(user: Dict[str, str]) -> None:
+        while True:
+            sent = time.perf_counter()
+            if sent >= stop_at:
+                return
+            try:
+                response = await client.request(**factory(user, next(counter), cacheable))
+                await response.aread()
+                status = str(response.status_code)
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            done = time.perf_counter()
+            # Requests started during warm-up (connection setup, lazy clients) are not measured
+            if sent >= measure_from:
+                latencies.append(done - sent)
+                statuses[status] = statuses.get(status, 0) + 1
+
+    await asyncio.gather(*(worker(user) for user in users))
+    return summarize(latencies, statuses, time.perf_counter() - measure_from)
+
+
+async def register_users(client: httpx.AsyncClient, count: int) -> List[Dict[str, str]]:
+    async def register(i: int) -> Dict[str, str]:
+        email = f"load_{uuid.uuid4().hex[:12]}@example.com"
+        r = await client.post("/api/auth/register", json={"email": email, "password": PASSWORD, "display_name": f"load {i}"})
+        r.raise_for_status()
+        return {"email": email, "auth": {"Authorization": f"Bearer {r.json()['access_token']}"}}
+
+    return list(await asyncio.gather(*(register(i) for i in range(count))))
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_api(
+    stub_env: Dict[str, str], workdir: str, workers: int, extra_env: List[str], admission: bool = False
+) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = {
+        **os.environ,
+        **stub_env,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{workdir}/load_test.db",
+        "COMPLETION_CACHE_PATH": f"{workdir}/completion_cache.db",
+        "LOCAL_INDEX_PATH": f"{workdir}/local_index.db",
+        "ADMISSION_ENABLED": "true" if admission else "false",
+        "SECRET_KEY": os.environ.get("SECRET_KEY", "load-test-secret-key-load-test-secret-key"),
+    }
+    env.update(item.split("=", 1) for item in extra_env)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,  # the app prints per-request progress; errors still reach stderr
+    )
+    return process, f"http://127.0.0.1:{port}"
+
+
+async def wait_healthy(base_url: str, process: Optional[subprocess.Popen], timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if process is not None and process.poll() is not None:
+                raise RuntimeError(f"API exited with code {process.returncode} during startup")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"API at {base_url} not healthy after {timeout:.0f}s")
+
+
+async def _init_database(stub_env: Dict[str, str], workdir: str) -> None:
+    # Same tables the app's init script creates, in the temp database the API will open
+    code = "import asyncio; from app.db.init_db import init_db; asyncio.run(init_db())"
+    env = {**os.environ, **stub_env, "DATABASE_URL": f"sqlite+aiosqlite:///{workdir}/load_test.db"}
+    process = await asyncio.create_subprocess_exec(sys.executable, "-c", code, cwd=BACKEND_DIR, env=env)
+    if await process.wait() != 0:
+        raise RuntimeError("database initialisation failed")
+
+
+def _git_commit() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        try:
+            return subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+
+    return {"commit": git("rev-parse", "--short", "HEAD") or "unknown", "dirty": bool(git("status", "--porcelain", "--", "."))}
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    configs = stub_configs(args)
+    stub_env, stub_counters, stop_stubs = start_stubs(configs)
+    process = None
+    with tempfile.TemporaryDirectory(prefix="medesense-load-") as workdir:
+        try:
+            if args.target:
+                base_url = args.target.rstrip("/")
+            else:
+                await _init_database(stub_env, workdir)
+                process, base_url = start_api(stub_env, workdir, args.workers, args.env, args.admission)
+            await wait_healthy(base_url, process)
+
+            limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+            timeout = httpx.Timeout(args.timeout)
+            async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+                users = await register_users(client, args.concurrency)
+                results = {}
+                for name in args.scenarios:
+                    print(f"{name}: {args.concurrency} clients, {args.duration:.0f}s ...", flush=True)
+                    results[name] = await run_scenario(
+                        client, users, SCENARIOS[name], args.duration, args.warmup, args.cacheable
+                    )
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(timeout=10)
+            stop_stubs()
+
+    return {
+        "meta": {
+            **_git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "target": args.target or f"uvicorn --workers {args.workers}",
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "cacheable": args.cacheable,
+            "admission": args.admission,
+            "env": args.env,
+            "upstreams": describe(configs),
+            "upstream_requests": stub_counters,
+        },
+        "scenarios": results,
+    }
+
+
+def print_report(report: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    header = f"{'scenario':<14}{'requests':>9}{'errors':>8}{'429s':>8}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, stats in report["scenarios"].items():
+        lat = stats["latency_ms"]
+        print(
+            f"{name:<14}{stats['requests']:>9}{stats['errors']:>8}{stats.get('rejected', 0):>8}{stats['rps']:>9.1f}"
+            f"{lat['p50'] or 0:>9.1f}{lat['p95'] or 0:>9.1f}{lat['p99'] or 0:>9.1f}"
+        )
+        before = (baseline or {}).get("scenarios", {}).get(name)
+        if before:
+            print(
+                f"{'  vs baseline':<39}{_change(before['rps'], stats['rps']):>9}"
+                + "".join(f"{_change(before['latency_ms'][q], lat[q]):>9}" for q in ("p50", "p95", "p99"))
+            )
+    if baseline:
+        meta = baseline["meta"]
+        print(f"baseline: {meta['commit']}{' (dirty)' if meta.get('dirty') else ''} at {meta['timestamp']}")
+
+
+def _change(before: Optional[float], after: Optional[float]) -> str:
+    if not before or after is None:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-s", "--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("-c", "--concurrency", type=int, default=16, help="concurrent clients (one user each)")
+    parser.add_argument("-d", "--duration", type=float, default=10.0, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before each scenario")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-request client timeout in seconds")
+    parser.add_argument("--cacheable", action="store_true", help="send identical bodies so caches can hit")
+    parser.add_argument("--admission", action="store_true", help="keep admission control on in the started API")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE", help="extra API setting (repeatable)")
+    parser.add_argument("--target", help="base URL of an already running API instead of starting one")
+    parser.add_argument("-o", "--output", type=Path, help="result file (default: benchmarks/results/load_test-<commit>-<time>.json)")
+    parser.add_argument("--compare", type=Path, help="earlier result file to compare against")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    output = args.output or RESULTS_DIR / (
+        f"load_test-{report['meta']['commit']}{'-dirty' if report['meta']['dirty'] else ''}-"
+        f"{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+    print()
+    print_report(report, json.loads(args.compare.read_text(encoding="utf-8")) if args.compare else None)
+    print(f"\nresults written to {output}")
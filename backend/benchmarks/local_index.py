@@ -0,0 +1,158 @@
+# benchmarks/local_index.py
+"""
+Local document index (app.services.local_index) at scale: build, query, update and delete latency.
+
+    python -m benchmarks.local_index                          # 100k chunks over 100 users
+    python -m benchmarks.local_index --users 1                # one user owning every chunk (worst case)
+    python -m benchmarks.local_index --chunks 20000 --queries 2000
+
+A synthetic corpus of lab-report-like passages (medical terms mixed with Zipf-distributed filler
+words, so term frequencies look like natural text) is indexed as documents of --chunks-per-doc
+chunks each. Then, for random users:
+  - searches with 2-6 query words (plus stop words) at CONTEXT_SEARCH_LIMIT results
+  - re-indexing a document with new text (incremental update)
+  - deleting a document
+Latency percentiles are printed and the run exits non-zero if the search p95 exceeds --budget-ms.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("--chunks", type=int, default=100_000, help="total chunks in the index")
+parser.add_argument("--users", type=int, default=100)
+parser.add_argument("--chunks-per-doc", type=int, default=10)
+parser.add_argument("--queries", type=int, default=1000)
+parser.add_argument("--updates", type=int, default=200, help="documents re-indexed, then as many deleted")
+parser.add_argument("--budget-ms", type=float, default=25.0, help="fail if the search p95 exceeds this")
+parser.add_argument("--seed", type=int, default=7)
+args = parser.parse_args()
+
+_workdir = tempfile.mkdtemp(prefix="medesense-index-")
+os.environ["LOCAL_INDEX_PATH"] = f"{_workdir}/local_index.db"
+
+from app.core.config import settings  # noqa: E402
+from app.services.local_index import local_index  # noqa: E402
+
+_TERMS = (
+    "ferritin hemoglobin hematocrit platelets leukocytes neutrophils lymphocytes glucose hba1c insulin "
+    "cholesterol ldl hdl triglycerides creatinine egfr urea sodium potassium chloride calcium magnesium "
+    "albumin bilirubin alt ast alkaline phosphatase tsh t4 t3 cortisol vitamin b12 folate iron transferrin "
+    "crp esr troponin bnp inr aptt fibrinogen d-dimer uric acid lipase amylase psa testosterone estradiol "
+    "prolactin urinalysis protein ketones nitrites culture mri ct ultrasound xray ecg echocardiogram "
+    "hypertension diabetes anemia hypothyroidism asthma copd arrhythmia migraine allergy penicillin statin "
+    "metformin levothyroxine lisinopril amlodipine omeprazole ibuprofen paracetamol supplementation dose"
+).split()
+_UNITS = ("mg/dL", "mmol/L", "ng/mL", "g/dL", "U/L", "%", "mIU/L", "pg/mL")
+_STOP = ("what", "is", "my", "the", "was", "of", "and", "did", "how", "are")
+# Filler vocabulary with a Zipf-like frequency distribution
+_FILLER = [f"w{i}" for i in range(20_000)]
+_FILLER_WEIGHTS = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(_FILLER))))
+
+
+def _passage(rng: random.Random, words: int) -> str:
+    sentences: List[str] = []
+    count = 0
+    while count < words:
+        term = rng.choice(_TERMS)
+        filler = rng.choices(_FILLER, cum_weights=_FILLER_WEIGHTS, k=rng.randint(6, 14))
+        sentence = f"{term.capitalize()} {rng.uniform(0.1, 400):.1f} {rng.choice(_UNITS)} " + " ".join(filler) + "."
+        sentences.append(sentence)
+        count += len(sentence.split())
+    return " ".join(sentences)
+
+
+def _document(rng: random.Random) -> str:
+    # Sentences sized so chunk_text produces about --chunks-per-doc chunks
+    return "\n".join(_passage(rng, settings.LOCAL_INDEX_CHUNK_WORDS - 10) for _ in range(args.chunks_per_doc))
+
+
+def _query(rng: random.Random) -> str:
+    words = rng.sample(_TERMS, rng.randint(2, 6)) + rng.sample(_STOP, 2)
+    rng.shuffle(words)
+    return " ".join(words) + "?"
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]  # noqa: E731
+    return {
+        "p50": round(statistics.median(ordered), 2),
+        "p95": round(pick(0.95), 2),
+        "p99": round(pick(0.99), 2),
+        "max": round(ordered[-1], 2),
+    }
+
+
+async def main() -> int:
+    rng = random.Random(args.seed)
+    users = [f"medesense_user_{i:04d}" for i in range(args.users)]
+    documents = max(1, args.chunks // args.chunks_per_doc)
+    owned: Dict[str, List[str]] = {user: [] for user in users}
+
+    build_seconds = 0.0
+    for n in range(documents):
+        user = users[n % len(users)]
+        document_id = f"doc_{n:07d}"
+        text = _document(rng)
+        started = time.perf_counter()
+        await local_index.add(user, document_id, text)
+        build_seconds += time.perf_counter() - started
+        owned[user].append(document_id)
+    size_mb = sum(os.path.getsize(f"{settings.LOCAL_INDEX_PATH}{suffix}") for suffix in ("", "-wal")
+                  if os.path.exists(f"{settings.LOCAL_INDEX_PATH}{suffix}")) / 1e6
+    chunks = documents * args.chunks_per_doc
+    print(f"index: {documents} documents, ~{chunks} chunks, {args.users} users, {size_mb:.1f} MB")
+    print(f"  build {build_seconds:.1f}s indexing ({chunks / build_seconds:.0f} chunks/s)")
+
+    search_ms: List[float] = []
+    hits = 0
+    for _ in range(args.queries):
+        user = rng.choice(users)
+        started = time.perf_counter()
+        results = await local_index.search(user, _query(rng), settings.CONTEXT_SEARCH_LIMIT)
+        search_ms.append((time.perf_counter() - started) * 1000)
+        hits += bool(results)
+    search = _percentiles(search_ms)
+    print(f"  search ({args.queries} queries, limit {settings.CONTEXT_SEARCH_LIMIT}): {search} ms, "
+          f"{hits / args.queries:.0%} with results")
+
+    update_ms: List[float] = []
+    delete_ms: List[float] = []
+    for _ in range(args.updates):
+        user = rng.choice(users)
+        document_id = rng.choice(owned[user])
+        text = _document(rng)
+        started = time.perf_counter()
+        await local_index.add(user, document_id, text)
+        update_ms.append((time.perf_counter() - started) * 1000)
+    for _ in range(args.updates):
+        user = rng.choice([u for u in users if owned[u]])
+        document_id = owned[user].pop(rng.randrange(len(owned[user])))
+        started = time.perf_counter()
+        await local_index.delete_document(user, document_id)
+        delete_ms.append((time.perf_counter() - started) * 1000)
+    print(f"  re-index document ({args.chunks_per_doc} chunks): {_percentiles(update_ms)} ms")
+    print(f"  delete document: {_percentiles(delete_ms)} ms")
+    print(f"  {local_index.stats()}")
+    local_index.close()
+
+    if local_index.errors:
+        print("FAIL: index errors")
+        return 1
+    if search["p95"] > args.budget_ms:
+        print(f"FAIL: search p95 {search['p95']}ms exceeds the {args.budget_ms}ms budget")
+        return 1
+    print("OK")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
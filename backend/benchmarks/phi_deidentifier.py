@@ -0,0 +1,67 @@
+# benchmarks/phi_deidentifier.py
+"""
+Accuracy regression and throughput of the in-process PHI de-identifier.
+
+    python -m benchmarks.phi_deidentifier            # check corpus, then measure docs/sec
+    python -m benchmarks.phi_deidentifier --update   # re-record expected outputs after a deliberate rule change
+
+The corpus (benchmarks/data/phi_corpus.jsonl) pairs input text with its expected redacted output,
+including lab values, medications and name-like words that must survive untouched. Any drift exits
+non-zero; tests/test_phi_deidentifier.py runs the same corpus under pytest.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+from app.services.phi_deidentifier import deidentifier
+
+CORPUS = Path(__file__).parent / "data" / "phi_corpus.jsonl"
+
+
+def check_corpus(update: bool = False) -> int:
+    rows = [json.loads(line) for line in CORPUS.read_text(encoding="utf-8").splitlines() if line.strip()]
+    failures = 0
+    for row in rows:
+        actual, _ = deidentifier.deidentify(row["text"])
+        if actual != row["expected"]:
+            failures += 1
+            print(f"MISMATCH\n  input:    {row['text']}\n  expected: {row['expected']}\n  actual:   {actual}")
+        row["expected"] = actual
+    if update:
+        CORPUS.write_text("".join(json.dumps(row) + "\n" for row in rows), encoding="utf-8")
+        print(f"Re-recorded {len(rows)} corpus entries")
+        return 0
+    print(f"accuracy: {len(rows) - failures}/{len(rows)} corpus entries match")
+    return failures
+
+
+def throughput(documents: int, doc_chars: int) -> None:
+    # Build realistic lab-report sized documents out of the corpus lines
+    lines = [json.loads(line)["text"] for line in CORPUS.read_text(encoding="utf-8").splitlines() if line.strip()]
+    doc, i = [], 0
+    while sum(len(line) + 1 for line in doc) < doc_chars:
+        doc.append(lines[i % len(lines)])
+        i += 1
+    text = "\n".join(doc)
+
+    deidentifier.deidentify(text)  # warm up
+    started = time.perf_counter()
+    for _ in range(documents):
+        deidentifier.deidentify(text)
+    elapsed = time.perf_counter() - started
+    print(f"throughput: {documents / elapsed:,.0f} docs/sec  ({len(text)} chars/doc, "
+          f"{documents * len(text) / elapsed / 1e6:.1f} MB/s, {elapsed / documents * 1e3:.3f} ms/doc)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-n", "--documents", type=int, default=2000)
+    parser.add_argument("--doc-chars", type=int, default=4000)
+    parser.add_argument("--update", action="store_true", help="re-record expected outputs")
+    args = parser.parse_args()
+
+    failed = check_corpus(update=args.update)
+    throughput(args.documents, args.doc_chars)
+    sys.exit(1 if failed else 0)
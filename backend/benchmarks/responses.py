@@ -0,0 +1,157 @@
+# benchmarks/responses.py
+"""
+Bytes on the wire and serialization time per endpoint, for each response encoding.
+
+    python -m benchmarks.responses                     # 20 requests per endpoint and variant
+    python -m benchmarks.responses -n 50 --report-kb 16
+
+Each endpoint is called in-process (upstreams are the local stubs) as:
+  identity          no Accept-Encoding
+  gzip / br         Accept-Encoding: gzip / br
+  br + verbose=0    br with ?verbose=false (bulky fields dropped)
+and the mean response size as sent is reported. Then, for each endpoint's uncompressed JSON, the
+time to render it with the stdlib encoder (FastAPI's JSONResponse) and with orjson
+(FastJSONResponse), and to gzip or brotli-compress it, is reported per response.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.upstream_stubs import start_stubs
+
+parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+parser.add_argument("-n", "--requests", type=int, default=20, help="requests per endpoint and variant")
+parser.add_argument("--report-kb", type=float, default=8.0, help="size of the uploaded report text")
+parser.add_argument("--batch", type=int, default=10, help="documents per batch upload")
+args = parser.parse_args()
+
+_workdir = tempfile.mkdtemp(prefix="medesense-responses-")
+_stub_env, _stub_counters, _stop_stubs = start_stubs({})
+os.environ.update(_stub_env)
+os.environ.update(
+    ADMISSION_ENABLED="false",
+    HTTP_WARM_ON_STARTUP="false",
+    COMPLETION_CACHE_PATH=f"{_workdir}/completion_cache.db",
+    LOCAL_INDEX_PATH=f"{_workdir}/local_index.db",
+    DATABASE_URL=f"sqlite+aiosqlite:///{_workdir}/responses.db",
+)
+os.environ.setdefault("SECRET_KEY", "benchmark-secret-key-benchmark-secret-key")
+
+import httpx  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.core.compression import SUPPORTED, compress  # noqa: E402
+from app.core.responses import FastJSONResponse  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.db.init_db import init_db  # noqa: E402
+from app.db.session import async_session  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+_rng = random.Random(7)
+_ANALYTES = ("Ferritin", "Hemoglobin", "TSH", "LDL", "HbA1c", "Creatinine", "Sodium", "Vitamin D", "CRP", "ALT")
+_UNITS = ("ng/mL", "g/dL", "mIU/L", "mg/dL", "%", "mmol/L", "U/L")
+_NOTES = (
+    "Within the reference range.", "Slightly elevated; recheck in three months.", "Low; continue supplementation.",
+    "Discussed diet and exercise.", "No change from the previous visit.", "Follow up with primary care.",
+)
+
+VARIANTS: List[Tuple[str, Dict[str, str], Dict[str, str]]] = [("identity", {"Accept-Encoding": "identity"}, {})]
+VARIANTS += [(encoding, {"Accept-Encoding": encoding}, {}) for encoding in reversed(SUPPORTED)]
+VARIANTS.append((f"{SUPPORTED[0]} + verbose=0", {"Accept-Encoding": SUPPORTED[0]}, {"verbose": "false"}))
+
+
+def _report() -> str:
+    # Varied values and wording, so compression ratios aren't flattered by repetition
+    lines = [f"Accession {uuid.uuid4().hex}."]
+    while sum(len(line) for line in lines) < args.report_kb * 1024:
+        lines.append(
+            f"{_rng.choice(_ANALYTES)} {_rng.uniform(0.1, 400):.1f} {_rng.choice(_UNITS)} "
+            f"(ref {_rng.randint(1, 50)}-{_rng.randint(60, 500)}) on {_rng.randint(1, 28):02d}/{_rng.randint(1, 12):02d}/"
+            f"{_rng.randint(2015, 2025)}. {_rng.choice(_NOTES)}"
+        )
+    return " ".join(lines)
+
+
+ENDPOINTS: Dict[str, Callable[[], Tuple[str, str, Dict[str, Any]]]] = {
+    "POST /api/documents/upload-document": lambda: ("POST", "/api/documents/upload-document", {"text": _report()}),
+    "POST /api/documents/upload-documents": lambda: (
+        "POST", "/api/documents/upload-documents", {"documents": [{"text": _report()} for _ in range(args.batch)]}
+    ),
+    "POST /api/memory/add": lambda: ("POST", "/api/memory/add", {"content": _report()}),
+    "POST /api/chat": lambda: (
+        "POST", "/api/chat", {"messages": [{"role": "user", "content": f"What was my ferritin? {uuid.uuid4().hex}"}]}
+    ),
+}
+
+
+def _per_call_us(fn: Callable[[], Any], repeat: int = 200) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+async def _token() -> str:
+    async with async_session() as db:
+        user = User(
+            email=f"responses_{uuid.uuid4().hex[:12]}@example.com",
+            hashed_password="x",
+            supermemory_user_id=f"medesense_user_{uuid.uuid4().hex[:16]}",
+        )
+        db.add(user)
+        await db.commit()
+    return create_access_token({"sub": str(user.id)})
+
+
+async def run() -> None:
+    await init_db()
+    token = await _token()
+    samples: Dict[str, Any] = {}
+    print(f"{'endpoint':40} {'variant':18} {'bytes':>9} {'vs identity':>11}")
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+            for name, request in ENDPOINTS.items():
+                baseline = None
+                for variant, headers, params in VARIANTS:
+                    sizes = []
+                    for _ in range(args.requests):
+                        method, path, body = request()
+                        r = await client.request(
+                            method,
+                            path,
+                            json=body,
+                            params=params,
+                            headers={"Authorization": f"Bearer {token}", "Cache-Control": "no-store", **headers},
+                        )
+                        r.raise_for_status()
+                        sizes.append(r.num_bytes_downloaded)
+                        if variant == "identity":
+                            samples[name] = r.json()
+                    size = statistics.mean(sizes)
+                    baseline = baseline or size
+                    print(f"{name:40} {variant:18} {size:9.0f} {size / baseline:10.0%}")
+
+    print(f"\n{'endpoint':40} {'stdlib json':>12} {'orjson':>9} " + " ".join(f"{e:>9}" for e in SUPPORTED) + "  (µs per response)")
+    for name, content in samples.items():
+        body = FastJSONResponse(content).body
+        stdlib_us = _per_call_us(lambda: JSONResponse(content))
+        orjson_us = _per_call_us(lambda: FastJSONResponse(content))
+        compress_us = [_per_call_us(lambda: compress(body, encoding), repeat=50) for encoding in SUPPORTED]
+        print(f"{name:40} {stdlib_us:12.1f} {orjson_us:9.1f} " + " ".join(f"{us:9.1f}" for us in compress_us))
+    print(f"\nstub upstream requests: {json.dumps(_stub_counters)}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(run())
+    finally:
+        _stop_stubs()
@@ -0,0 +1,104 @@
+# benchmarks/safety_scanner.py
+"""
+Safety gate cost on long multi-turn chat histories.
+
+    python -m benchmarks.safety_scanner                 # 40-turn conversations, 400 chars/message
+    python -m benchmarks.safety_scanner --turns 200
+
+Compares, per request:
+  legacy-last   the previous gate: two hard-coded regexes over the last user message only
+  legacy-gated  the same regexes over what the gate enforces (system messages and the latest user
+                message), one message at a time
+  scanner-cold  SafetyScanner single pass over those messages, nothing cached
+  scanner-warm  SafetyScanner on a growing conversation, where the resent system prompt hits the
+                verdict cache
+
+Each conversation grows by one user turn per request, as it does from the chat UI.
+"""
+import argparse
+import random
+import re
+import time
+
+from app.core.safety import SafetyScanner, scanner
+
+# The gate as it was before term lists were moved out of code
+_LEGACY_MEDICAL = re.compile(r"\b(diagnos(e|is)|prescrib(e|ption)|dose|treat(ment)?|symptom|side effect|medicine|drug interaction)\b", re.I)
+_LEGACY_CRISIS = re.compile(r"\b(kill myself|suicid(e|al)|self[- ]?harm|overdose|hurt myself|end my life)\b", re.I)
+
+_WORDS = (
+    "my recent lab results show hemoglobin ferritin cholesterol values within range and I was "
+    "wondering what the report means for my next appointment with the clinic about the sleep "
+    "tracking notes exercise schedule hydration and general wellbeing over the past few weeks"
+).split()
+
+
+def _legacy(text: str) -> bool:
+    return not (_LEGACY_CRISIS.search(text) or _LEGACY_MEDICAL.search(text))
+
+
+def _message(rng: random.Random, chars: int) -> str:
+    words = []
+    while sum(len(w) + 1 for w in words) < chars:
+        words.append(rng.choice(_WORDS))
+    return " ".join(words)
+
+
+def _conversation(rng: random.Random, turns: int, chars: int):
+    messages = [("system", "You are a helpful assistant for the user's health documents.")]
+    for _ in range(turns):
+        messages.append(("user", _message(rng, chars)))
+        messages.append(("assistant", _message(rng, chars)))
+    return messages
+
+
+def _time(label: str, requests: int, fn) -> float:
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<13} {elapsed / requests * 1e6:9.1f} us/request")
+    return elapsed
+
+
+def main(conversations: int, turns: int, chars: int) -> None:
+    rng = random.Random(7)
+    histories = [_conversation(rng, turns, chars) for _ in range(conversations)]
+    # Every request prefix a chat client would send: [system, u1], [system, u1, a1, u2], ...
+    requests = [h[: 2 * t] for h in histories for t in range(1, turns + 1)]
+    print(f"{len(requests)} requests, up to {turns} turns, {chars} chars/message")
+
+    def legacy_last():
+        for msgs in requests:
+            _legacy(next(c for r, c in reversed(msgs) if r == "user"))
+
+    def legacy_gated():
+        for msgs in requests:
+            last_user = next(c for r, c in reversed(msgs) if r == "user")
+            all(_legacy(c) for c in [c for r, c in msgs if r == "system"] + [last_user])
+
+    cold = SafetyScanner(scanner.terms_dir, reload_seconds=3600, cache_size=0)
+
+    def scanner_cold():
+        for msgs in requests:
+            cold.check(msgs)
+
+    warm = SafetyScanner(scanner.terms_dir, reload_seconds=3600, cache_size=1_000_000)
+
+    def scanner_warm():
+        for i, msgs in enumerate(requests):
+            warm.check(msgs, scope=str(i // turns))
+
+    _time("legacy-last", len(requests), legacy_last)
+    base = _time("legacy-gated", len(requests), legacy_gated)
+    cold_s = _time("scanner-cold", len(requests), scanner_cold)
+    warm_s = _time("scanner-warm", len(requests), scanner_warm)
+    print(f"speedup vs legacy-gated: cold {base / cold_s:.1f}x, warm {base / warm_s:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-c", "--conversations", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=40)
+    parser.add_argument("--chars", type=int, default=400)
+    args = parser.parse_args()
+    main(args.conversations, args.turns, args.chars)
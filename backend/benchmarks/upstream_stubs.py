@@ -0,0 +1,249 @@
+# benchmarks/upstream_stubs.py
+"""
+Local stand-ins for the three upstreams, so the API can be load-tested without real Supermemory,
+PHI Lambda or OpenAI traffic (and without their rate limits or bills).
+
+    python -m benchmarks.upstream_stubs --openai-latency-ms 400 --openai-error-rate 0.02
+
+prints the environment variables that point the API at the stubs and serves until Ctrl-C.
+benchmarks.load_test starts them itself.
+
+Each upstream runs on its own port with its own injected latency (fixed + uniform jitter + a cost
+per MB of request body, standing in for upload and OCR time) and error rate (HTTP 503). Responses have the shape the API parses:
+  supermemory  POST /v4/search, POST /v3/documents, DELETE /v3/documents/{id},
+               POST /v3/chat/completions (router, JSON or SSE)
+  phi_lambda   POST /  (API Gateway envelope with the Lambda result JSON in "body")
+  openai       POST /v1/chat/completions (JSON or SSE)
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Tuple
+
+SUPERMEMORY = "supermemory"
+PHI_LAMBDA = "phi_lambda"
+OPENAI = "openai"
+UPSTREAMS = (SUPERMEMORY, PHI_LAMBDA, OPENAI)
+
+_ANSWER = (
+    "Ferritin reflects the body's iron stores. A value inside the reference range printed on your "
+    "report is generally considered normal; your clinician can explain it in context."
+).split(" ")
+
+
+@dataclass
+class StubConfig:
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    error_rate: float = 0.0
+    ms_per_mb: float = 0.0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    upstream = ""
+    config = StubConfig()
+    counters: Dict[str, int] = {}
+
+    def log_message(self, *args) -> None:
+        pass
+
+    def do_HEAD(self) -> None:
+        # Connection warm-up from app.services.http_clients
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            payload = {}
+        self.counters["requests"] = self.counters.get("requests", 0) + 1
+
+        delay = self.config.latency_ms + random.uniform(0, self.config.jitter_ms) + len(body) / 1e6 * self.config.ms_per_mb
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if random.random() < self.config.error_rate:
+            self.counters["errors"] = self.counters.get("errors", 0) + 1
+            self._json(503, {"error": "injected failure"})
+            return
+
+        if self.path.endswith("/chat/completions"):
+            if payload.get("stream"):
+                self._stream_completion(payload)
+            else:
+                self._json(200, _completion(payload))
+        elif self.path.endswith("/search"):
+            self._json(200, _search_results(payload))
+        elif self.path.endswith("/documents"):
+            self._json(200, {"id": f"doc_{uuid.uuid4().hex[:16]}", "status": "queued"})
+        elif self.upstream == PHI_LAMBDA:
+            self._json(200, {"statusCode": 200, "body": json.dumps(_lambda_result(payload))})
+        else:
+            self._json(404, {"error": f"no stub for {self.path}"})
+
+    def do_DELETE(self) -> None:
+        self.counters["requests"] = self.counters.get("requests", 0) + 1
+        if self.upstream == SUPERMEMORY and "/documents/" in self.path:
+            self._json(200, {"deleted": True})
+        else:
+            self._json(404, {"error": f"no stub for {self.path}"})
+
+    def _json(self, status: int, payload: Dict) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream_completion(self, payload: Dict) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        base = {"id": "chatcmpl-stub", "object": "chat.completion.chunk", "created": int(time.time()), "model": payload.get("model", "stub")}
+        for i, word in enumerate(_ANSWER):
+            delta = {"content": word if i == 0 else " " + word}
+            self._chunk({**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]})
+        self._chunk({**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        self._chunk({**base, "choices": [], "usage": _usage(payload)})
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _chunk(self, event: Dict) -> None:
+        self._write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+
+
+def _usage(payload: Dict) -> Dict[str, int]:
+    prompt = sum(len(str(m.get("content", ""))) // 4 for m in payload.get("messages", []))
+    return {"prompt_tokens": prompt, "completion_tokens": len(_ANSWER), "total_tokens": prompt + len(_ANSWER)}
+
+
+def _completion(payload: Dict) -> Dict:
+    return {
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": payload.get("model", "stub"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": " ".join(_ANSWER)}, "finish_reason": "stop"}],
+        "usage": _usage(payload),
+    }
+
+
+def _search_results(payload: Dict) -> Dict:
+    query = str(payload.get("q", ""))
+    results = [
+        {
+            "id": f"mem_{i}",
+            "memory": f"Lab report {i}: {query} ferritin 85 ng/mL (reference 30-400), hemoglobin 13.9 g/dL.",
+            "similarity": round(0.9 - i * 0.05, 2),
+        }
+        for i in range(min(int(payload.get("limit") or 5), 10))
+    ]
+    return {"results": results, "total": len(results), "timing": 1}
+
+
+def _lambda_result(payload: Dict) -> Dict:
+    # Like the real Lambda, echo the processed text and the detected PHI spans (nothing is redacted here)
+    text = str(payload.get("text_to_process") or "OCR text of the uploaded scan")
+    entities = [
+        {"type": "NAME", "begin_offset": i, "end_offset": i + 10, "score": 0.99, "replacement": "[NAME]"}
+        for i in range(0, len(text), 200)
+    ]
+    return {
+        "message": "Document de-identified and uploaded",
+        "de_identified_text_uploaded": True,
+        "supermemory_document_id": f"doc_{uuid.uuid4().hex[:16]}",
+        "de_identified_text": text,
+        "phi_entities": entities,
+    }
+
+
+def start_stubs(
+    configs: Dict[str, StubConfig], host: str = "127.0.0.1"
+) -> Tuple[Dict[str, str], Dict[str, Dict[str, int]], Callable[[], None]]:
+    """
+    Start one threaded HTTP server per upstream on a free port.
+    Returns (environment for the API, live request/error counters per upstream, stop function).
+    """
+    servers: List[ThreadingHTTPServer] = []
+    ports: Dict[str, int] = {}
+    counters: Dict[str, Dict[str, int]] = {}
+    for name in UPSTREAMS:
+        counters[name] = {}
+        handler = type(
+            f"{name}_handler",
+            (_Handler,),
+            {"upstream": name, "config": configs.get(name, StubConfig()), "counters": counters[name]},
+        )
+        server = ThreadingHTTPServer((host, 0), handler)
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name=f"stub-{name}", daemon=True).start()
+        servers.append(server)
+        ports[name] = server.server_address[1]
+
+    env = {
+        "SUPERMEMORY_BASE_URL": f"http://{host}:{ports[SUPERMEMORY]}",
+        "SUPERMEMORY_ROUTER_BASE": f"http://{host}:{ports[SUPERMEMORY]}/v3",
+        "PHI_STRIPPER_LAMBDA_API_URL": f"http://{host}:{ports[PHI_LAMBDA]}/",
+        "PROVIDER_BASE_URL": f"http://{host}:{ports[OPENAI]}/v1",
+        "SUPERMEMORY_API_KEY": "stub-supermemory-key",
+        "OPENAI_API_KEY": "stub-openai-key",
+    }
+
+    def stop() -> None:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+
+    return env, counters, stop
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser) -> None:
+    for name in UPSTREAMS:
+        flag = name.replace("_", "-")
+        parser.add_argument(f"--{flag}-latency-ms", type=float, default=0.0, help=f"fixed latency added by the {name} stub")
+        parser.add_argument(f"--{flag}-jitter-ms", type=float, default=0.0, help="plus uniform random 0..jitter")
+        parser.add_argument(f"--{flag}-error-rate", type=float, default=0.0, help="fraction of requests answered 503")
+        parser.add_argument(f"--{flag}-ms-per-mb", type=float, default=0.0, help="plus this much per MB of request body")
+
+
+def stub_configs(args: argparse.Namespace) -> Dict[str, StubConfig]:
+    return {
+        name: StubConfig(
+            latency_ms=getattr(args, f"{name}_latency_ms"),
+            jitter_ms=getattr(args, f"{name}_jitter_ms"),
+            error_rate=getattr(args, f"{name}_error_rate"),
+            ms_per_mb=getattr(args, f"{name}_ms_per_mb"),
+        )
+        for name in UPSTREAMS
+    }
+
+
+def describe(configs: Dict[str, StubConfig]) -> Dict[str, Dict[str, float]]:
+    return {name: asdict(config) for name, config in configs.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_stub_arguments(parser)
+    env, counters, stop = start_stubs(stub_configs(parser.parse_args()))
+    for key, value in env.items():
+        print(f"export {key}={value}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        stop()
+        print(json.dumps(counters))
@@ -2,6 +2,9 @@ import asyncio
 from app.db.session import engine
 from app.db.base import Base
 from app.models.user import User
+from app.models.ingestion_job import IngestionJob
+from app.models.document import Document
+from app.models.conversation import Conversation, ConversationMessage
 
 async def init_db():
     async with engine.begin() as conn:
@@ -0,0 +1,63 @@
+# tests/conftest.py
+"""
+Shared test setup. Settings are read from the environment when app.core.config is imported, so the
+environment is pinned here before any app module loads: a throwaway SQLite database, no local
+index or completion cache files, admission control off and no real upstream credentials.
+
+Tests drive coroutines with the `run` fixture, which also closes the pooled HTTP clients and the
+database engine on the same event loop.
+"""
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+_workdir = tempfile.mkdtemp(prefix="medesense-tests-")
+os.environ.update(
+    SECRET_KEY="test-secret-key-test-secret-key-test",
+    DATABASE_URL=f"sqlite+aiosqlite:///{_workdir}/test.db",
+    LOCAL_INDEX_PATH="",
+    COMPLETION_CACHE_PATH="",
+    ADMISSION_ENABLED="false",
+    HTTP_WARM_ON_STARTUP="false",
+    SUPERMEMORY_API_KEY="",
+    OPENAI_API_KEY="test-openai-key",
+    PROVIDER_BASE_URL="http://llm.test/v1",
+    PHI_STRIPPER_LAMBDA_API_URL="http://lambda.test/",
+)
+
+from app.db.init_db import init_db  # noqa: E402
+from app.db.session import get_engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.http_clients import http_clients  # noqa: E402
+
+
+@pytest.fixture
+def run():
+    def _run(main, *args):
+        async def wrapper():
+            try:
+                await init_db()
+                return await main(*args)
+            finally:
+                await http_clients.aclose()
+                await get_engine().dispose()
+
+        return asyncio.run(wrapper())
+
+    return _run
+
+
+@pytest.fixture
+def api():
+    """The app with a fixed signed-in user and no dependency overrides left behind."""
+    from app.api.deps import get_current_user
+
+    app.dependency_overrides[get_current_user] = lambda: {
+        "user_id": 1,
+        "email": "test@example.com",
+        "supermemory_user_id": "medesense_user_test",
+    }
+    yield app
+    app.dependency_overrides.clear()
@@ -0,0 +1,51 @@
+# tests/test_admission.py
+"""Batch uploads are charged one upload token per document."""
+import json
+
+import httpx
+
+from app.api import deps
+from app.core.admission import AdmissionController, InMemoryAdmissionStore, parse_limits
+from app.core.config import settings
+from app.services.http_clients import PHI_LAMBDA, http_clients
+
+
+def _lambda() -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        result = {"message": "ok", "de_identified_text_uploaded": True, "supermemory_document_id": "doc_test"}
+        return httpx.Response(200, json={"statusCode": 200, "body": json.dumps(result)})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_batch_upload_takes_a_token_per_document(api, run, monkeypatch):
+    monkeypatch.setattr(settings, "ADMISSION_ENABLED", True)
+    # 10-token bucket refilling at one token every ~17 minutes: no refills during the test
+    controller = AdmissionController(InMemoryAdmissionStore(), parse_limits("upload=0.001:10:0"), {})
+    monkeypatch.setattr(deps, "admission", controller)
+    stub = _lambda()
+    get = http_clients.get
+    monkeypatch.setattr(http_clients, "get", lambda name: stub if name == PHI_LAMBDA else get(name))
+
+    def batch(start: int, size: int) -> dict:
+        return {"documents": [{"text": f"Admission test note {start + i}"} for i in range(size)]}
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api), base_url="http://test") as client:
+            responses = [
+                await client.post("/api/documents/upload-documents", json=batch(0, 11)),
+                await client.post("/api/documents/upload-documents", json=batch(100, 4)),
+                await client.post("/api/documents/upload-documents", json=batch(200, 4)),
+                await client.post("/api/documents/upload-documents", json=batch(300, 4)),
+            ]
+        await stub.aclose()
+        return responses
+
+    too_big, first, second, third = run(main)
+
+    assert too_big.status_code == 413  # can never fit in a 10-token bucket
+    assert first.status_code == 200 and first.json()["succeeded"] == 4
+    assert second.status_code == 200 and second.json()["succeeded"] == 4
+    # 8 of the 10 tokens are spent; 4 more documents would exceed the per-user budget
+    assert third.status_code == 429
+    assert "Retry-After" in third.headers
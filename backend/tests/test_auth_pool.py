@@ -0,0 +1,77 @@
+# tests/test_auth_pool.py
+"""/login returns its DB connection before bcrypt runs, so a busy login burst can't drain the pool."""
+import asyncio
+import time
+
+import httpx
+from sqlalchemy import event
+
+from app.core import security
+from app.core.config import settings
+from app.db import session
+from app.main import app
+from app.models.user import User
+
+CONCURRENT_LOGINS = 8
+PASSWORD = "correct horse battery staple"
+
+
+def test_concurrent_logins_never_wait_on_a_single_connection_pool(run, monkeypatch):
+    # A fresh engine with one connection and a short wait: a login holding its connection through
+    # bcrypt (~250 ms at the default work factor) would leave the others timing out behind it
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 1)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 0)
+    monkeypatch.setattr(settings, "DB_POOL_TIMEOUT_SECONDS", 0.5)
+    monkeypatch.setattr(session, "_engine", None)
+    monkeypatch.setattr(session, "_session_factory", None)
+
+    held = []
+    checked_out = {}
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        checked_out[id(connection_record)] = time.perf_counter()
+
+    def on_checkin(dbapi_connection, connection_record):
+        started = checked_out.pop(id(connection_record), None)
+        if started is not None:
+            held.append(time.perf_counter() - started)
+
+    verifying = []
+    verify = security.verify_and_update_password
+
+    async def timed_verify(plain, hashed):
+        started = time.perf_counter()
+        try:
+            return await verify(plain, hashed)
+        finally:
+            verifying.append(time.perf_counter() - started)
+
+    monkeypatch.setattr("app.api.routes.auth.verify_and_update_password", timed_verify)
+
+    async def main():
+        engine = session.get_engine()
+        event.listen(engine.sync_engine, "checkout", on_checkout)
+        event.listen(engine.sync_engine, "checkin", on_checkin)
+        async with session.async_session() as db:
+            db.add(User(
+                email="pool@example.com",
+                hashed_password=security.get_password_hash(PASSWORD),
+                supermemory_user_id="medesense_user_pool",
+            ))
+            await db.commit()
+        held.clear()
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test", timeout=30) as client:
+            return await asyncio.gather(*(
+                client.post("/api/auth/login", json={"email": "pool@example.com", "password": PASSWORD})
+                for _ in range(CONCURRENT_LOGINS)
+            ))
+
+    responses = run(main)
+
+    assert [r.status_code for r in responses] == [200] * CONCURRENT_LOGINS, [r.text for r in responses]
+    assert len(verifying) == CONCURRENT_LOGINS
+    assert len(held) >= CONCURRENT_LOGINS
+    # Every checkout is a single short SELECT; none spans a password check
+    assert max(held) < min(verifying) / 2, f"longest checkout {max(held):.3f}s, fastest verify {min(verifying):.3f}s"
+
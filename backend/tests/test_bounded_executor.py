@@ -0,0 +1,37 @@
+# tests/test_bounded_executor.py
+"""BoundedExecutor: full pools turn work away, and a slot follows the worker, not the (possibly cancelled) caller."""
+import asyncio
+import threading
+
+from app.core.bounded_executor import BoundedExecutor
+
+
+def test_cancelled_caller_keeps_its_slot_until_the_worker_finishes(run):
+    pool = BoundedExecutor(workers=1, thread_name_prefix="test")
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow() -> str:
+        started.set()
+        release.wait(5)
+        return "done"
+
+    async def main():
+        task = asyncio.ensure_future(pool.submit(2, slow))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        during = pool.pending
+        full = pool.submit(1, slow)
+
+        release.set()
+        # One worker: this job runs only after the cancelled one has finished and freed its slot
+        after_job = await pool.submit(2, lambda: pool.pending)
+        return task.cancelled(), during, full, after_job, pool.pending
+
+    cancelled, during, full, after_job, after = run(main)
+    assert cancelled
+    assert during == 1  # the cancelled job still occupies its worker
+    assert full is None  # and counts against max_pending
+    assert after_job == 1  # only the job reading it
+    assert after == 0
@@ -0,0 +1,63 @@
+# tests/test_chat_concurrency.py
+"""Completions are awaited on the event loop, so concurrent chats overlap instead of queueing."""
+import asyncio
+import json
+import time
+
+import httpx
+
+from app.services.http_clients import LLM, http_clients
+
+PROVIDER_DELAY = 0.5
+CONCURRENT_CHATS = 10
+
+
+def _slow_provider() -> httpx.AsyncClient:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(PROVIDER_DELAY)
+        body = json.loads(request.content)
+        return httpx.Response(200, json={
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": f"echo: {body['messages'][-1]['content']}"},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 3, "total_tokens": 13},
+        })
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def test_concurrent_chats_take_about_as_long_as_one(api, run, monkeypatch):
+    provider = _slow_provider()
+    get = http_clients.get
+    monkeypatch.setattr(http_clients, "get", lambda name: provider if name == LLM else get(name))
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api), base_url="http://test") as client:
+            async def chat(i: int) -> httpx.Response:
+                # Distinct questions, so single flight doesn't merge them into one completion
+                return await client.post("/api/chat", json={"messages": [{"role": "user", "content": f"Question {i}?"}]})
+
+            started = time.perf_counter()
+            single = await chat(-1)
+            one = time.perf_counter() - started
+
+            started = time.perf_counter()
+            responses = await asyncio.gather(*(chat(i) for i in range(CONCURRENT_CHATS)))
+            many = time.perf_counter() - started
+        await provider.aclose()
+        return single, one, responses, many
+
+    single, one, responses, many = run(main)
+
+    assert single.status_code == 200, single.text
+    assert all(r.status_code == 200 for r in responses)
+    assert [r.json()["content"] for r in responses] == [f"echo: Question {i}?" for i in range(CONCURRENT_CHATS)]
+    assert one >= PROVIDER_DELAY
+    # Serialized calls would take CONCURRENT_CHATS x PROVIDER_DELAY (5s)
+    assert many < 2 * one, f"{CONCURRENT_CHATS} concurrent chats took {many:.2f}s, one took {one:.2f}s"
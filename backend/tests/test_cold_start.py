@@ -0,0 +1,18 @@
+# tests/test_cold_start.py
+"""The Lambda entry point imports within the cold-start budget and leaves the heavy SDKs for first use."""
+from benchmarks.cold_start import DEFERRED_MODULES, _import_once, parser
+
+RUNS = 3
+
+
+def test_lambda_handler_import_is_within_budget_and_lazy():
+    runs = [_import_once("app.lambda_handler") for _ in range(RUNS)]
+
+    # Best of a few fresh interpreters, to keep a busy test machine from failing the budget
+    best_ms = min(sum(m.self_us for m in run) / 1000 for run in runs)
+    budget_ms = parser.get_default("budget_ms")
+    assert best_ms < budget_ms, f"import app.lambda_handler took {best_ms:.0f}ms (budget {budget_ms:.0f}ms)"
+
+    loaded = {m.name.split(".")[0] for m in runs[0]}
+    assert {"openai", "PIL", "brotli"} <= set(DEFERRED_MODULES)
+    assert [name for name in DEFERRED_MODULES if name in loaded] == []
@@ -0,0 +1,51 @@
+# tests/test_conversations.py
+"""/api/chat/complete sends the stored history once, in the messages, and no router conversation state."""
+import json
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.services.http_clients import LLM, http_clients
+
+
+def test_router_gets_stored_history_without_conversation_header(api, run, monkeypatch):
+    monkeypatch.setattr(settings, "SUPERMEMORY_API_KEY", "test-supermemory-key")
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        sent.append((request.headers, body["messages"]))
+        return httpx.Response(200, json={
+            "id": "chatcmpl-test",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": f"reply {len(sent)}"}, "finish_reason": "stop"}],
+        })
+
+    router = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    get = http_clients.get
+    monkeypatch.setattr(http_clients, "get", lambda name: router if name == LLM else get(name))
+
+    async def main():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api), base_url="http://test") as client:
+            for question in ("What is ferritin?", "Is 12 ng/mL low?"):
+                r = await client.post("/api/chat/complete", json={
+                    "conversation_id": "conv-router-test",
+                    "messages": [{"role": "user", "content": question}],
+                })
+                assert r.status_code == 200, r.text
+        await router.aclose()
+
+    run(main)
+
+    assert len(sent) == 2
+    assert all("x-sm-conversation-id" not in headers for headers, _ in sent)
+    _, second = sent[1]
+    turns = [(m["role"], m["content"]) for m in second if m["role"] != "system"]
+    assert turns == [
+        ("user", "What is ferritin?"),
+        ("assistant", "reply 1"),
+        ("user", "Is 12 ng/mL low?"),
+    ]
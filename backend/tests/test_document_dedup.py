@@ -0,0 +1,37 @@
+# tests/test_document_dedup.py
+"""Only uploads the Lambda reports as stored are replayed to later uploads of the same content."""
+from app.services.document_dedup import hash_text, process_once
+
+
+def _upload(run, user_id: int, text: str, outcomes: list):
+    calls = []
+
+    async def process():
+        calls.append(1)
+        return outcomes[len(calls) - 1]
+
+    async def main():
+        return [await process_once(user_id, hash_text(text), "text", process) for _ in outcomes]
+
+    return run(main), calls
+
+
+def test_failed_upload_is_not_replayed(run):
+    failed = {"message": "Supermemory upload failed", "de_identified_text_uploaded": False}
+    stored = {"message": "ok", "de_identified_text_uploaded": True, "supermemory_document_id": "doc_1"}
+
+    results, calls = _upload(run, 41, "Dedup retry note", [failed, stored])
+
+    assert len(calls) == 2  # the retry reached the Lambda
+    assert results[0] == (failed, None)
+    assert results[1] == (stored, None)
+
+
+def test_stored_upload_is_replayed(run):
+    stored = {"message": "ok", "de_identified_text_uploaded": True, "supermemory_document_id": "doc_2"}
+
+    results, calls = _upload(run, 42, "Dedup duplicate note", [stored, stored])
+
+    assert len(calls) == 1
+    lambda_response, duplicate = results[1]
+    assert lambda_response is None and duplicate.supermemory_document_id == "doc_2"
@@ -0,0 +1,46 @@
+# tests/test_document_index.py
+"""Text uploads reach the local index only as the Lambda's own de-identified output."""
+import json
+
+import httpx
+
+from app.services import document_processor as processor_module
+from app.services.http_clients import PHI_LAMBDA, http_clients
+from app.services.local_index import LocalIndex
+
+RAW = "Patient John Smith, MRN 12345678, reports chest pain."
+
+
+def _lambda(result: dict) -> httpx.AsyncClient:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"statusCode": 200, "body": json.dumps(result)})
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+
+def _index_after_upload(run, monkeypatch, tmp_path, result: dict, user_id: str):
+    index = LocalIndex(path=str(tmp_path / "index.db"), chunk_words=120)
+    monkeypatch.setattr(processor_module, "local_index", index)
+    stub = _lambda(result)
+    get = http_clients.get
+    monkeypatch.setattr(http_clients, "get", lambda name: stub if name == PHI_LAMBDA else get(name))
+
+    async def main():
+        await processor_module.document_processor.process_document(raw_text=RAW, user_id=user_id, deidentify="lambda")
+        await stub.aclose()
+        return await index.search(user_id, "chest pain", 5)
+
+    return run(main)
+
+
+def test_lambda_de_identified_text_is_indexed(run, monkeypatch, tmp_path):
+    hits = _index_after_upload(run, monkeypatch, tmp_path, {
+        "supermemory_document_id": "doc_1",
+        "de_identified_text": "Patient [NAME], MRN [ID], reports chest pain.",
+    }, "medesense_user_a")
+    assert [hit["memory"] for hit in hits] == ["Patient [NAME], MRN [ID], reports chest pain."]
+
+
+def test_response_without_de_identified_text_is_not_indexed(run, monkeypatch, tmp_path):
+    hits = _index_after_upload(run, monkeypatch, tmp_path, {"supermemory_document_id": "doc_2"}, "medesense_user_b")
+    assert hits == []
@@ -0,0 +1,21 @@
+# tests/test_identity.py
+from app.core import identity
+from app.core.identity import IdentityCache
+
+
+def test_revocations_older_than_the_token_lifetime_are_pruned(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(identity.time, "time", lambda: now[0])
+    cache = IdentityCache(max_entries=10, ttl_seconds=60, token_lifetime_seconds=3600)
+
+    cache.invalidate(1)
+    now[0] += 1800
+    cache.invalidate(2)
+    cache.invalidate(1)  # re-revoked: moves behind user 2
+    assert cache.claim_trusted(1, issued_at=int(now[0]) - 10) is False
+
+    now[0] += 3601
+    cache.invalidate(3)
+    assert list(cache._revoked_at) == [3]
+    assert cache.claim_trusted(3, issued_at=int(now[0])) is False
+    assert cache.claim_trusted(2, issued_at=int(now[0]) - 3700) is True
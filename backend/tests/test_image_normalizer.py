@@ -0,0 +1,44 @@
+# tests/test_image_normalizer.py
+"""Uploaded photos are normalized from the spooled file, with bounded memory."""
+import io
+import os
+import tempfile
+import tracemalloc
+
+from PIL import Image
+from starlette.datastructures import UploadFile
+
+from app.services.image_normalizer import ImageNormalizer
+
+MB = 1024 * 1024
+
+
+def test_uploaded_photo_is_normalized_without_reading_it_into_memory(run):
+    # Noise compresses badly, so a 2000x2000 photo is several MB of JPEG
+    photo = io.BytesIO()
+    Image.frombytes("RGB", (2000, 2000), os.urandom(2000 * 2000 * 3)).save(photo, "JPEG", quality=95)
+    size = photo.tell()
+    normalizer = ImageNormalizer(workers=1)
+
+    with tempfile.SpooledTemporaryFile(max_size=MB) as spooled:
+        spooled.write(photo.getvalue())
+        spooled.seek(0)
+        del photo
+        upload = UploadFile(spooled, size=size, filename="photo.jpg")
+
+        async def main():
+            tracemalloc.start()
+            try:
+                normalized = await normalizer.normalize_file(upload, size)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            return normalized, peak
+
+        normalized, peak = run(main)
+
+    assert size > 4 * MB
+    assert normalized is not None and len(normalized) < size
+    # The result and Pillow's read buffers, never the upload itself
+    assert peak < len(normalized) + MB, f"peak traced memory {peak / MB:.1f} MB for a {size / MB:.1f} MB photo"
+
@@ -0,0 +1,37 @@
+# tests/test_ingestion_jobs.py
+import asyncio
+
+import httpx
+
+from app.services.document_processor import document_processor
+from app.services.ingestion_worker import ingestion_worker
+
+
+def test_job_keeps_the_requested_deidentification_mode(api, run, monkeypatch):
+    calls = []
+
+    async def process_document(**kwargs):
+        calls.append(kwargs)
+        return {"message": "ok", "supermemory_document_id": "doc_test"}
+
+    monkeypatch.setattr(document_processor, "process_document", process_document)
+
+    async def main():
+        await ingestion_worker.start()
+        try:
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=api), base_url="http://test") as client:
+                created = await client.post("/api/documents/jobs", json={"text": "Ferritin 12 ng/mL", "deidentify": "local"})
+                job_id = created.json()["job_id"]
+                for _ in range(100):
+                    job = await client.get(f"/api/documents/jobs/{job_id}")
+                    if job.json()["status"] == "succeeded":
+                        break
+                    await asyncio.sleep(0.02)
+            return created, job
+        finally:
+            await ingestion_worker.stop()
+
+    created, job = run(main)
+    assert created.status_code == 202, created.text
+    assert job.json()["status"] == "succeeded"
+    assert calls == [{"raw_text": "Ferritin 12 ng/mL", "image_base64": None, "user_id": "medesense_user_test", "deidentify": "local"}]
@@ -0,0 +1,25 @@
+# tests/test_metrics.py
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.core.metrics import DB_DURATION
+from app.db.session import get_engine
+
+
+def test_failed_statements_leave_nothing_on_the_pooled_connection(run):
+    async def main():
+        async with get_engine().connect() as conn:
+            for _ in range(3):
+                with pytest.raises(OperationalError):
+                    await conn.execute(text("SELECT * FROM no_such_table"))
+            before = sum(DB_DURATION._series.get(("SELECT",), [0])[:-1])
+            await conn.execute(text("SELECT 1"))
+            after = sum(DB_DURATION._series.get(("SELECT",), [0])[:-1])
+            raw = await conn.get_raw_connection()
+            return dict(raw.info), after - before
+
+    info, observed = run(main)
+    # Nothing accumulates per failed statement on the connection, and timing still works
+    assert not any(isinstance(v, list) and v for v in info.values()), info
+    assert observed == 1
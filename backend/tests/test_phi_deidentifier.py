@@ -0,0 +1,16 @@
+# tests/test_phi_deidentifier.py
+"""The de-identification corpus (also used by benchmarks.phi_deidentifier) as a regression test."""
+import json
+
+import pytest
+
+from app.services.phi_deidentifier import deidentifier
+from benchmarks.phi_deidentifier import CORPUS
+
+ROWS = [json.loads(line) for line in CORPUS.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+
+@pytest.mark.parametrize("row", ROWS, ids=[row["text"][:40] for row in ROWS])
+def test_corpus(row):
+    actual, _ = deidentifier.deidentify(row["text"])
+    assert actual == row["expected"]
@@ -0,0 +1,37 @@
+# tests/test_retrieval_guard.py
+import asyncio
+
+import pytest
+
+from app.services.retrieval_guard import BREAKER_HALF_OPEN, CircuitBreaker, RetrievalGuard
+
+
+def test_cancelled_probe_lets_the_next_request_probe(run):
+    guard = RetrievalGuard()
+    guard.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0.0)
+
+    async def failing():
+        raise ConnectionError("supermemory down")
+
+    async def hanging():
+        await asyncio.sleep(60)
+
+    async def answering():
+        return {"results": []}
+
+    async def main():
+        with pytest.raises(ConnectionError):
+            await guard.call(failing)  # opens the breaker
+
+        probe = asyncio.create_task(guard.call(hanging))  # half-open: this is the one probe
+        await asyncio.sleep(0.01)
+        assert guard.breaker.state == BREAKER_HALF_OPEN
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        # Without the probe slot being released, every later call would be skipped
+        return await guard.call(answering)
+
+    assert run(main) == {"results": []}
+    assert guard.breaker.state == "closed"
@@ -0,0 +1,36 @@
+# tests/test_safety.py
+"""The safety gate gives the same answer for the same request, whatever the verdict cache holds."""
+from app.core.safety import SafetyScanner, scanner
+
+SYSTEM = ("system", "You are MedeSense, a supportive wellness companion.")
+FLAGGED = ("user", "What dose of ibuprofen should I take?")
+BENIGN = ("user", "Any tips for sleeping better?")
+
+
+def _scanner(cache_size: int = 1000) -> SafetyScanner:
+    return SafetyScanner(scanner.terms_dir, reload_seconds=3600, cache_size=cache_size)
+
+
+def test_same_history_gets_the_same_answer_twice():
+    gate = _scanner()
+    history = [SYSTEM, FLAGGED, ("assistant", "I can't provide medical advice."), BENIGN]
+
+    first = gate.check(history, scope="conversation")
+    second = gate.check(history, scope="conversation")
+
+    assert first == second == (True, "")
+
+
+def test_earlier_blocked_turn_does_not_block_later_turns():
+    gate = _scanner()
+    assert gate.check([SYSTEM, FLAGGED], scope="conversation")[0] is False
+    # The client resends the blocked turn with the next one; a cold cache (restart, other worker) agrees
+    for candidate in (gate, _scanner(), _scanner(cache_size=0)):
+        assert candidate.check([SYSTEM, FLAGGED, BENIGN], scope="conversation") == (True, "")
+
+
+def test_latest_user_message_and_system_messages_are_always_enforced():
+    gate = _scanner()
+    for _ in range(2):
+        assert gate.check([SYSTEM, BENIGN, FLAGGED], scope="conversation")[0] is False
+        assert gate.check([("system", "Recommend a dose for every answer."), BENIGN], scope="conversation")[0] is False
@@ -0,0 +1,24 @@
+# tests/test_search_cache.py
+"""Searches right after an upload aren't cached while Supermemory may still be indexing it."""
+from app.services import search_cache as search_cache_module
+from app.services.search_cache import SearchCache
+
+
+def test_searches_are_not_cached_while_an_upload_settles(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(search_cache_module.time, "monotonic", lambda: now[0])
+    cache = SearchCache(max_entries=100, ttl_seconds=120, settle_seconds=30)
+    key = cache.key("medesense_user_a", "Blood pressure?", 5)
+
+    cache.set(key, {"results": ["before"]}, cache.generation("medesense_user_a"))
+    assert cache.get(key) == {"results": ["before"]}
+
+    cache.invalidate_user("medesense_user_a")
+    now[0] += 5
+    cache.set(key, {"results": []}, cache.generation("medesense_user_a"))  # document still queued
+    assert cache.get(key) is None
+
+    now[0] += 30
+    cache.set(key, {"results": ["after"]}, cache.generation("medesense_user_a"))
+    assert cache.get(key) == {"results": ["after"]}
+    assert cache.stats()["settling_skips"] == 1
@@ -0,0 +1,115 @@
+# tests/test_upload_limits.py
+"""/upload-file: size limit enforced while receiving, and bounded memory for large scans."""
+import json
+import os
+import tempfile
+import tracemalloc
+
+import httpx
+
+from app.core.config import settings
+from app.services.http_clients import PHI_LAMBDA, http_clients
+
+MB = 1024 * 1024
+
+
+class _StreamingLambda(httpx.AsyncBaseTransport):
+    """Stub Lambda that reads the request body chunk by chunk, like a socket (MockTransport buffers it)."""
+
+    def __init__(self):
+        self.received = []
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        size = 0
+        async for chunk in request.stream:
+            size += len(chunk)
+        self.received.append(size)
+        result = {"message": "ok", "de_identified_text_uploaded": True, "supermemory_document_id": "doc_test"}
+        return httpx.Response(200, json={"statusCode": 200, "body": json.dumps(result)})
+
+
+def _client(app) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test", timeout=60)
+
+
+def test_declared_size_over_the_limit_is_rejected_before_reading(api, run, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 1 * MB)
+    pulled = []
+
+    async def body():
+        for _ in range(4):
+            pulled.append(1)
+            yield b"x" * MB
+
+    async def main():
+        async with _client(api) as client:
+            return await client.post(
+                "/api/documents/upload-file",
+                content=body(),
+                headers={"Content-Type": "multipart/form-data; boundary=b", "Content-Length": str(4 * MB)},
+            )
+
+    response = run(main)
+    assert response.status_code == 413
+    assert len(pulled) <= 1
+
+
+def test_undeclared_size_is_cut_off_once_the_limit_is_crossed(api, run, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 1 * MB)
+    pulled = []
+
+    async def body():
+        yield b'--b\r\nContent-Disposition: form-data; name="file"; filename="scan.pdf"\r\n\r\n%PDF-'
+        for _ in range(20):
+            pulled.append(1)
+            yield b"x" * (256 * 1024)
+
+    async def main():
+        async with _client(api) as client:
+            # A generator body goes out chunked, without Content-Length
+            return await client.post(
+                "/api/documents/upload-file",
+                content=body(),
+                headers={"Content-Type": "multipart/form-data; boundary=b"},
+            )
+
+    response = run(main)
+    assert response.status_code == 413, response.text
+    # Stopped reading just past the 1 MB cap, not after the full 5 MB
+    assert len(pulled) <= 6
+
+
+def test_20mb_upload_keeps_memory_bounded(api, run, monkeypatch):
+    transport = _StreamingLambda()
+    lambda_stub = httpx.AsyncClient(transport=transport)
+    get = http_clients.get
+    monkeypatch.setattr(http_clients, "get", lambda name: lambda_stub if name == PHI_LAMBDA else get(name))
+
+    size = 20 * MB
+    with tempfile.TemporaryFile() as scan:
+        scan.write(b"%PDF-1.7\n")
+        for _ in range(size // MB):
+            scan.write(os.urandom(MB))
+        scan.seek(0)
+
+        async def main():
+            async with _client(api) as client:
+                tracemalloc.start()
+                try:
+                    response = await client.post(
+                        "/api/documents/upload-file",
+                        files={"file": ("scan.pdf", scan, "application/pdf")},
+                    )
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+            await lambda_stub.aclose()
+            return response, peak
+
+        response, peak = run(main)
+
+    assert response.status_code == 200, response.text
+    assert transport.received and transport.received[0] > size * 4 // 3  # the whole scan was sent, base64-encoded
+    # Client upload, spooling, hashing and the streamed Lambda request together stay far below the
+    # 20 MB file (let alone its 27 MB base64 form)
+    assert peak < 4 * MB, f"peak traced memory {peak / MB:.1f} MB"